@@ -7,10 +7,14 @@
  * Datei: /api.ts
  * Beschreibung: Kapselt alle `fetch`-Aufrufe. Die Authentifizierung erfolgt nun über serverseitige HTTP-only Cookies. Die globale 401-Behandlung wurde korrigiert, um die Redirect-Schleife zu beheben.
  */
-import type { TimeEntry, EntryChangeRequestPayload, MasterData, Role, GlobalSettings } from './src/types';
+import type { TimeEntry, EntryChangeRequestPayload, MasterData, Role, GlobalSettings, DailySummary, User } from './src/types';
 import { API } from './src/constants';
 
 
+// Letzte Antwort + ETag je GET-Endpunkt (settings, masterdata, users): bei 304 wird die
+// gespeicherte Antwort zurückgegeben, statt die Daten erneut zu übertragen
+const etagCache = new Map<string, { etag: string; data: any }>();
+
 const fetchApi = async (endpoint: string, options: RequestInit & { isAuthCheck?: boolean } = {}) => {
     // Enhanced console logging for debugging OAuth → Dashboard flow
     const debugPrefix = '[AZE-API]';
@@ -25,12 +29,20 @@ const fetchApi = async (endpoint: string, options: RequestInit & { isAuthCheck?:
         new Headers(options.headers).forEach((value, key) => headers.set(key, value));
     }
 
+    const isGet = (options.method || 'GET').toUpperCase() === 'GET';
+    const cached = isGet ? etagCache.get(endpoint) : undefined;
+    if (cached) {
+        headers.set('If-None-Match', cached.etag);
+    }
+
     const controller = new AbortController();
     const fetchOptions: RequestInit = {
         ...options,
         headers,
         credentials: 'include',
         signal: controller.signal,
+        // Revalidierung läuft über etagCache; der Browser-Cache darf 304 nicht selbst auflösen
+        ...(isGet ? { cache: 'no-store' as RequestCache } : {}),
     };
     const timeoutId = setTimeout(() => controller.abort(), API.TIMEOUT_MS);
 
@@ -68,6 +80,11 @@ const fetchApi = async (endpoint: string, options: RequestInit & { isAuthCheck?:
         throw new Error('Session expired or invalid.');
     }
 
+    if (response.status === 304 && cached) {
+        console.log(`${debugPrefix} Not Modified: cached data used`, { endpoint });
+        return cached.data;
+    }
+
     if (!response.ok) {
         const errorText = await response.text();
         console.error(`${debugPrefix} API Error Response:`, {
@@ -98,6 +115,10 @@ const fetchApi = async (endpoint: string, options: RequestInit & { isAuthCheck?:
     const contentType = response.headers.get("content-type");
     if (contentType && contentType.includes("application/json")) {
         const jsonData = await response.text().then(text => text ? JSON.parse(text) : null);
+        const etag = response.headers.get('etag');
+        if (isGet && etag) {
+            etagCache.set(endpoint, { etag, data: jsonData });
+        }
         console.log(`${debugPrefix} Success: JSON data received`, {
             endpoint,
             dataKeys: jsonData ? Object.keys(jsonData) : [],
@@ -128,6 +149,35 @@ const getCsrfToken = async (): Promise<string> => {
     return d?.csrfToken;
 };
 
+// Mehrere Lese-Anfragen in einem Request (batch.php): eine Session-/Rollenauflösung statt N Round-Trips.
+// settings, masterData und users werden per ETag revalidiert (status 304 -> zuletzt geladene Daten).
+type BatchResource = 'csrfToken' | 'currentUser' | 'settings' | 'masterData' | 'users' | 'timeEntries' | 'approvals' | 'history';
+
+const fetchBatch = async <K extends BatchResource>(resources: K[]): Promise<Record<K, any>> => {
+    const res = await fetchApi('/batch.php', {
+        method: 'POST',
+        body: JSON.stringify({
+            requests: resources.map(resource => ({ id: resource, resource, ifNoneMatch: etagCache.get(`batch:${resource}`)?.etag })),
+        }),
+    });
+    const out = {} as Record<K, any>;
+    for (const resource of resources) {
+        const part = res?.responses?.[resource];
+        if (part?.status === 304 && etagCache.has(`batch:${resource}`)) {
+            out[resource] = etagCache.get(`batch:${resource}`)!.data;
+            continue;
+        }
+        if (!part || part.status !== 200) {
+            throw new Error(part?.body?.message || `API-Fehler: batch ${resource}`);
+        }
+        if (part.etag) {
+            etagCache.set(`batch:${resource}`, { etag: part.etag, data: part.body });
+        }
+        out[resource] = part.body;
+    }
+    return out;
+};
+
 
 // === API-Methoden ===
 export const api = {
@@ -155,6 +205,22 @@ export const api = {
         return fetchApi('/login.php', { method: 'POST' });
     },
 
+    batch: fetchBatch,
+
+    // Aktualisieren ohne erneuten Login (keine Benutzer-Synchronisation), gleiche Form wie loginAndGetInitialData
+    refreshInitialData: async () => {
+        const d = await fetchBatch(['currentUser', 'users', 'masterData', 'timeEntries', 'history', 'settings']);
+        return {
+            currentUser: d.currentUser,
+            currentLocation: d.currentUser?.location,
+            users: d.users as User[],
+            masterData: d.masterData as Record<number, MasterData>,
+            timeEntries: d.timeEntries as TimeEntry[],
+            history: d.history,
+            globalSettings: d.settings as GlobalSettings,
+        };
+    },
+
     addTimeEntry: async (entryData: Omit<TimeEntry, 'id'>) => {
         const csrf = await getCsrfToken();
         return fetchApi('/time-entries.php', {
@@ -214,6 +280,71 @@ export const api = {
     return [];
   },
 
+  // Seitenweises Laden (Keyset-Cursor): nextCursor der Antwort als cursor für die nächste Seite übergeben
+  getApprovalsPage: async (status: 'pending' | 'all' | 'history', cursor?: string | null, limit = 50) => {
+    const params = new URLSearchParams({ status, limit: String(limit) });
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetchApi(`/approvals.php?${params}`, { method: 'GET' });
+    return { items: Array.isArray(res?.items) ? res.items : [], nextCursor: (res?.nextCursor ?? null) as string | null };
+  },
+
+  getTimeEntriesPage: async (cursor?: string | null, limit = 100) => {
+    const params = new URLSearchParams({ action: 'list', limit: String(limit) });
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetchApi(`/time-entries.php?${params}`, { method: 'GET' });
+    return { items: (Array.isArray(res?.items) ? res.items : []) as TimeEntry[], nextCursor: (res?.nextCursor ?? null) as string | null };
+  },
+
+  getDailySummaryPage: async (filters: { from?: string; to?: string; userId?: number } = {}, cursor?: string | null, limit = 100) => {
+    const params = new URLSearchParams({ action: 'summary', limit: String(limit) });
+    if (filters.from) params.set('from', filters.from);
+    if (filters.to) params.set('to', filters.to);
+    if (filters.userId) params.set('userId', String(filters.userId));
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetchApi(`/time-entries.php?${params}`, { method: 'GET' });
+    return { items: (Array.isArray(res?.items) ? res.items : []) as DailySummary[], nextCursor: (res?.nextCursor ?? null) as string | null };
+  },
+
+  // Serverseitiger Export (export.php): CSV wird direkt als Download gestreamt, PDF als Job erzeugt
+  getExportCsvUrl: (filters: { from?: string; to?: string; location?: string; userId?: number } = {}) => {
+    const params = new URLSearchParams({ format: 'csv' });
+    if (filters.from) params.set('from', filters.from);
+    if (filters.to) params.set('to', filters.to);
+    if (filters.location) params.set('location', filters.location);
+    if (filters.userId) params.set('userId', String(filters.userId));
+    return `${API.BASE_URL}/export.php?${params}`;
+  },
+
+  queueExportPdf: async (filters: { from?: string; to?: string; location?: string; userId?: number } = {}) => {
+    const csrf = await getCsrfToken();
+    const res = await fetchApi('/export.php', {
+      method: 'POST',
+      headers: { 'X-CSRF-Token': csrf },
+      body: JSON.stringify({ format: 'pdf', ...filters, csrf_token: csrf })
+    });
+    return { jobId: String(res?.jobId ?? ''), status: String(res?.status ?? 'queued') };
+  },
+
+  getExportJob: async (jobId: string) => {
+    const res = await fetchApi(`/export.php?job=${encodeURIComponent(jobId)}`, { method: 'GET' });
+    return { status: String(res?.status ?? 'failed') as 'queued' | 'running' | 'done' | 'failed', error: (res?.error ?? null) as string | null };
+  },
+
+  getExportPdfUrl: (jobId: string) => `${API.BASE_URL}/export.php?job=${encodeURIComponent(jobId)}&download=1`,
+
+    // Einzelnes Nachladen mit ETag-Revalidierung (304 liefert die zuletzt geladenen Daten)
+    getGlobalSettings: async (): Promise<GlobalSettings> => {
+        return fetchApi('/settings.php', { method: 'GET' });
+    },
+
+    getMasterData: async (): Promise<Record<number, MasterData>> => {
+        return fetchApi('/masterdata.php', { method: 'GET' });
+    },
+
+    getUsers: async (): Promise<User[]> => {
+        return fetchApi('/users.php', { method: 'GET' });
+    },
+
     updateGlobalSettings: async (settings: GlobalSettings) => {
         return fetchApi('/settings.php', {
             method: 'PUT',
@@ -28,11 +28,18 @@ interface DatabaseConnectionInterface {
 }
 
 class DatabaseConnection implements DatabaseConnectionInterface {
+    // "MySQL server has gone away" / "Lost connection to MySQL server during query"
+    const CONNECTION_LOST_ERRORS = [2006, 2013];
+    const SQL_MODE = 'STRICT_TRANS_TABLES,NO_ZERO_DATE,NO_ZERO_IN_DATE,ERROR_FOR_DIVISION_BY_ZERO';
+    // Prepared statements kept per connection (least recently used is closed first)
+    const STATEMENT_CACHE_SIZE = 32;
+
     private static $instance = null; // self|null
     private $connection = null;      // mysqli|null
     private $logger;                 // StructuredLogger
     private $config = [];
     private $inTransaction = false;
+    private $statements = [];        // SQL => mysqli_stmt, least recently used first
     
     private function __construct() {
         $this->logger = new StructuredLogger();
@@ -60,7 +67,12 @@ class DatabaseConnection implements DatabaseConnectionInterface {
                 'password' => Config::get('db.password', ''),
                 'database' => Config::get('db.name', ''),
                 'charset' => Config::get('db.charset', 'utf8mb4'),
-                'timeout' => Config::get('db.timeout', 30)
+                'timeout' => Config::get('db.timeout', 30),
+                // DB_PERSISTENT=true: persistente Verbindungen (p:-Host), von PHP-FPM-Workern wiederverwendet
+                'persistent' => filter_var(
+                    Config::get('db.persistent', getenv('DB_PERSISTENT') ?: ($_ENV['DB_PERSISTENT'] ?? false)),
+                    FILTER_VALIDATE_BOOLEAN
+                )
             ];
         } catch (Exception $e) {
             $this->logger->critical('Database configuration loading failed', [
@@ -99,15 +111,45 @@ class DatabaseConnection implements DatabaseConnectionInterface {
     }
     
     /**
-     * Get secure database connection with connection pooling
+     * Get secure database connection (opened once per request, persistent if configured)
+     *
+     * No ping() per access: a dead connection is only detected by a failing query
+     * and handled by reconnectIfGone().
      */
     public function getConnection() {
-        if ($this->connection === null || !$this->connection->ping()) {
+        if ($this->connection === null) {
             $this->establishConnection();
         }
         
         return $this->connection;
     }
+
+    /**
+     * True if $conn is this instance's open connection (never connects, no ping)
+     */
+    public function ownsConnection($conn) {
+        return $this->connection !== null && $conn === $this->connection;
+    }
+
+    /**
+     * Reopen the connection after it was lost (errno 2006/2013).
+     * Returns false for other errors and inside a transaction (its work is gone anyway).
+     */
+    public function reconnectIfGone($errno) {
+        if ($this->connection === null || $this->inTransaction || !in_array((int)$errno, self::CONNECTION_LOST_ERRORS, true)) {
+            return false;
+        }
+        $this->logger->warning('Database connection lost, reconnecting', ['errno' => (int)$errno]);
+        $this->clearStatementCache();
+        try {
+            $this->connection->close();
+        } catch (Throwable $e) {
+            // Verbindung ist bereits weg
+        }
+        $this->connection = null;
+        $this->establishConnection();
+        return true;
+    }
     
     /**
      * Establish secure database connection
@@ -119,25 +161,35 @@ class DatabaseConnection implements DatabaseConnectionInterface {
                 throw new RuntimeException('MySQLi extension not available');
             }
             
-            $this->connection = new mysqli(
-                $this->config['host'],
+            $host = $this->config['host'];
+            if ($this->config['persistent'] && strpos($host, 'p:') !== 0) {
+                $host = 'p:' . $host;
+            }
+
+            // Timeout und Zeichensatz vor dem Verbinden setzen: der Zeichensatz wird im
+            // Handshake ausgehandelt statt mit einem eigenen SET NAMES-Round-Trip
+            $connection = mysqli_init();
+            $connection->options(MYSQLI_OPT_CONNECT_TIMEOUT, (int)$this->config['timeout']);
+            $connection->options(MYSQLI_SET_CHARSET_NAME, $this->config['charset']);
+            if (!@$connection->real_connect(
+                $host,
                 $this->config['username'],
                 $this->config['password'],
                 $this->config['database']
-            );
-            
-            if ($this->connection->connect_error) {
+            )) {
                 throw new RuntimeException(
-                    'Database connection failed: ' . $this->connection->connect_error
+                    'Database connection failed: ' . ($connection->connect_error ?: mysqli_connect_error())
                 );
             }
+            $this->connection = $connection;
             
             // Set secure connection options
             $this->configureConnection();
             
             $this->logger->info('Database connection established', [
                 'host' => $this->config['host'],
-                'database' => $this->config['database']
+                'database' => $this->config['database'],
+                'persistent' => $this->config['persistent']
             ]);
             
         } catch (Exception $e) {
@@ -151,26 +203,34 @@ class DatabaseConnection implements DatabaseConnectionInterface {
     
     /**
      * Configure connection for security and performance
+     *
+     * Runs once per opened connection, not per getConnection() call. A reused
+     * persistent connection has been reset by mysqlnd (COM_CHANGE_USER: open
+     * transactions rolled back, session variables back to server defaults), so its
+     * session settings are applied again - in a single statement instead of one
+     * round trip per setting.
      */
     private function configureConnection() {
-        // Set charset for security (prevent charset confusion attacks)
-        if (!$this->connection->set_charset($this->config['charset'])) {
+        // Set charset for security (prevent charset confusion attacks) - normally already
+        // negotiated in the handshake (MYSQLI_SET_CHARSET_NAME), character_set_name() is local
+        if ($this->connection->character_set_name() !== $this->config['charset']
+            && !$this->connection->set_charset($this->config['charset'])) {
             $this->logger->warning('Failed to set database charset', [
                 'charset' => $this->config['charset'],
                 'error' => $this->connection->error
             ]);
         }
-        
-        // Set SQL mode for strict data validation
-        $this->connection->query("SET SESSION sql_mode = 'STRICT_TRANS_TABLES,NO_ZERO_DATE,NO_ZERO_IN_DATE,ERROR_FOR_DIVISION_BY_ZERO'");
-        
-        // Set connection timeout
-        $this->connection->options(MYSQLI_OPT_CONNECT_TIMEOUT, $this->config['timeout']);
 
+        // SQL mode for strict data validation + autocommit in one round trip.
         // ✅ CRITICAL FIX: ENABLE autocommit by default!
         // Only disable when explicitly using transactions via beginTransaction()
         // Without this, ALL queries require explicit commit() - causing massive bugs!
-        $this->connection->autocommit(true);
+        if (!$this->connection->query("SET SESSION sql_mode = '" . self::SQL_MODE . "', SESSION autocommit = 1")) {
+            $this->logger->warning('Failed to configure database session', [
+                'error' => $this->connection->error
+            ]);
+            $this->connection->autocommit(true);
+        }
     }
     
     /**
@@ -248,6 +308,7 @@ class DatabaseConnection implements DatabaseConnectionInterface {
                 $this->rollback();
             }
             
+            $this->clearStatementCache();
             $this->connection->close();
             $this->connection = null;
             $this->logger->debug('Database connection closed');
@@ -263,46 +324,129 @@ class DatabaseConnection implements DatabaseConnectionInterface {
     
     /**
      * Prepare and execute secure statement
+     *
+     * The statement belongs to the caller (close() it when done). executeQuery() and
+     * executeNonQuery() use cached statements instead.
      */
     public function prepareAndExecute($query, $types = '', $params = []) {
-        $connection = $this->getConnection();
-        
-        $stmt = $connection->prepare($query);
+        return $this->executeStatement($query, $types, $params, false);
+    }
+
+    /**
+     * Prepared statement for $query from the statement cache (keyed by SQL text, LRU).
+     * A repeated query skips the prepare round trip. The statement belongs to the
+     * cache: callers must not close() it and must consume its result before the
+     * same SQL is executed again.
+     */
+    public function prepareCached($query) {
+        if (isset($this->statements[$query])) {
+            $stmt = $this->statements[$query];
+            unset($this->statements[$query]);
+            return $this->statements[$query] = $stmt;
+        }
+
+        $stmt = $this->prepareWithReconnect($query);
         if (!$stmt) {
-            throw new RuntimeException('Statement preparation failed: ' . $connection->error);
+            return false;
         }
-        
-        if (!empty($types) && !empty($params)) {
-            if (strlen($types) !== count($params)) {
-                throw new InvalidArgumentException('Parameter count mismatch');
+        $this->statements[$query] = $stmt;
+        if (count($this->statements) > self::STATEMENT_CACHE_SIZE) {
+            reset($this->statements);
+            $oldest = key($this->statements);
+            $this->statements[$oldest]->close();
+            unset($this->statements[$oldest]);
+        }
+        return $stmt;
+    }
+
+    /**
+     * Close all cached statements (they belong to the current connection)
+     */
+    private function clearStatementCache() {
+        foreach ($this->statements as $stmt) {
+            try {
+                $stmt->close();
+            } catch (Throwable $e) {
+                // Verbindung ist bereits weg
             }
-            
-            if (!$stmt->bind_param($types, ...$params)) {
-                throw new RuntimeException('Parameter binding failed: ' . $stmt->error);
+        }
+        $this->statements = [];
+    }
+
+    /**
+     * Prepare (cached or not), bind and execute. If the server has gone away (e.g. a
+     * cached statement of an expired persistent connection), reconnect and run once more.
+     */
+    private function executeStatement($query, $types, $params, $cached) {
+        if (!empty($types) && !empty($params) && strlen($types) !== count($params)) {
+            throw new InvalidArgumentException('Parameter count mismatch');
+        }
+
+        for ($attempt = 0; ; $attempt++) {
+            $stmt = $cached ? $this->prepareCached($query) : $this->prepareWithReconnect($query);
+            if (!$stmt) {
+                throw new RuntimeException('Statement preparation failed: ' . $this->connection->error);
+            }
+
+            if (!empty($types) && !empty($params)) {
+                if (!$stmt->bind_param($types, ...$params)) {
+                    throw new RuntimeException('Parameter binding failed: ' . $stmt->error);
+                }
             }
+
+            try {
+                if ($stmt->execute()) {
+                    return $stmt;
+                }
+                $errno = $stmt->errno;
+                $error = $stmt->error;
+            } catch (mysqli_sql_exception $e) {
+                $errno = $e->getCode();
+                $error = $e->getMessage();
+            }
+            // Nur 2006 wiederholen: bei 2013 kann die Anweisung bereits ausgeführt worden sein
+            if ($attempt === 0 && $errno === 2006 && $this->reconnectIfGone($errno)) {
+                continue;
+            }
+            throw new RuntimeException('Query execution failed: ' . $error);
         }
-        
-        if (!$stmt->execute()) {
-            throw new RuntimeException('Query execution failed: ' . $stmt->error);
+    }
+
+    /**
+     * Prepare a statement; if the connection turns out to be lost, reconnect once and retry
+     */
+    private function prepareWithReconnect($query) {
+        $connection = $this->getConnection();
+        try {
+            $stmt = $connection->prepare($query);
+            $errno = $stmt ? 0 : $connection->errno;
+        } catch (mysqli_sql_exception $e) {
+            // mysqli_report(MYSQLI_REPORT_STRICT), Standard ab PHP 8.1
+            if (!in_array($e->getCode(), self::CONNECTION_LOST_ERRORS, true)) {
+                throw $e;
+            }
+            $stmt = false;
+            $errno = $e->getCode();
+        }
+        if (!$stmt && $this->reconnectIfGone($errno)) {
+            $stmt = $this->connection->prepare($query);
         }
-        
         return $stmt;
     }
-    
+
     /**
      * Execute query and return results safely
      */
     public function executeQuery($query, $types = '', $params = []) {
-        $stmt = $this->prepareAndExecute($query, $types, $params);
+        $stmt = $this->executeStatement($query, $types, $params, true);
         $result = $stmt->get_result();
         
         if ($result === false) {
-            $stmt->close();
             throw new RuntimeException('Failed to get query result');
         }
         
         $data = $result->fetch_all(MYSQLI_ASSOC);
-        $stmt->close();
+        $result->free();
         
         return $data;
     }
@@ -311,11 +455,9 @@ class DatabaseConnection implements DatabaseConnectionInterface {
      * Execute non-select query (INSERT, UPDATE, DELETE)
      */
     public function executeNonQuery($query, $types = '', $params = []) {
-        $stmt = $this->prepareAndExecute($query, $types, $params);
-        $affectedRows = $stmt->affected_rows;
-        $stmt->close();
+        $stmt = $this->executeStatement($query, $types, $params, true);
         
-        return $affectedRows;
+        return $stmt->affected_rows;
     }
     
     /**
@@ -379,5 +521,34 @@ function getDatabaseConnection() {
     return DatabaseConnection::getInstance()->getConnection();
 }
 
+/**
+ * All rows of a prepared query. On the shared connection the statement comes from
+ * the statement cache (DatabaseConnection::executeQuery), on any other mysqli it is
+ * prepared and closed as usual. Throws RuntimeException on errors.
+ */
+function db_fetch_all($conn, $query, $types = '', $params = []) {
+    $db = DatabaseConnection::getInstance();
+    if ($db->ownsConnection($conn)) {
+        return $db->executeQuery($query, $types, $params);
+    }
+
+    $stmt = $conn->prepare($query);
+    if (!$stmt) {
+        throw new RuntimeException('Statement preparation failed: ' . $conn->error);
+    }
+    if ($types !== '') {
+        $stmt->bind_param($types, ...$params);
+    }
+    if (!$stmt->execute()) {
+        $error = $stmt->error;
+        $stmt->close();
+        throw new RuntimeException('Query execution failed: ' . $error);
+    }
+    $result = $stmt->get_result();
+    $rows = $result ? $result->fetch_all(MYSQLI_ASSOC) : [];
+    $stmt->close();
+    return $rows;
+}
+
 // Legacy support - maintain existing $conn variable behavior
 $conn = getDatabaseConnection();
@@ -0,0 +1,23 @@
+<?php
+/**
+ * API Bootstrap - the shared include chain of the authenticated endpoints
+ *
+ * One entry instead of four require_once lines per endpoint. Together with
+ * preload.php the files below are already compiled and declared, so this costs
+ * a handful of cached lookups. Endpoint-specific modules (identity.php,
+ * http-cache.php, ...) and error-handler.php, which installs global handlers,
+ * stay explicit in the endpoint.
+ *
+ * Usage:
+ *   define('API_GUARD', true);
+ *   require_once __DIR__ . '/api-bootstrap.php';
+ */
+
+if (!defined('API_GUARD')) {
+    die('Direct access not permitted');
+}
+
+require_once __DIR__ . '/security-middleware.php';
+require_once __DIR__ . '/auth_helpers.php';
+require_once __DIR__ . '/csrf-middleware.php';
+require_once __DIR__ . '/DatabaseConnection.php';
@@ -0,0 +1,71 @@
+<?php
+/**
+ * Approval Status - SQL filters and counters for approval_requests.status
+ *
+ * Older installations stored free-form status values ('approved', 'open', '',
+ * NULL ...), so every list query had to wrap the column in TRIM(LOWER(...)) and
+ * could not use idx_status_requested_at. Migration 005 canonicalizes the column
+ * to ENUM('pending','genehmigt','abgelehnt') NOT NULL; from then on the filters
+ * below are plain equality / IN predicates on the indexed column.
+ * Without the migration the tolerant legacy expressions are used.
+ *
+ * Migration 005 also adds approval_status_counts, a per-status counter kept up
+ * to date by triggers, so dashboard totals do not scan approval_requests.
+ *
+ * Usage:
+ *   $sql = "SELECT ... FROM approval_requests ar WHERE " . approval_status_filter($conn, 'pending', 'ar.');
+ *   $counts = approval_status_counts($conn);   // ['pending' => 3, 'genehmigt' => 10, ...] or null
+ */
+
+if (!defined('API_GUARD')) {
+    die('Direct access not permitted');
+}
+
+require_once __DIR__ . '/schema-capabilities.php';
+
+const APPROVAL_STATUSES = ['pending', 'genehmigt', 'abgelehnt'];
+
+/**
+ * True once migration 005 has turned status into the canonical ENUM
+ */
+function approval_status_normalized(mysqli $conn): bool {
+    $type = schema_column($conn, 'approval_requests', 'status')['type'] ?? '';
+    return strpos($type, 'enum(') === 0 && strpos($type, "'pending'") !== false;
+}
+
+/**
+ * WHERE fragment for 'pending' (still open) or 'resolved' (history) requests.
+ * $alias is the table prefix incl. dot, e.g. 'ar.'.
+ */
+function approval_status_filter(mysqli $conn, string $which, string $alias = ''): string {
+    $c = $alias . 'status';
+    if (approval_status_normalized($conn)) {
+        return $which === 'pending' ? "$c = 'pending'" : "$c IN ('genehmigt','abgelehnt')";
+    }
+    if ($which === 'pending') {
+        // Ausstehend = alles nicht-final
+        return "($c IS NULL OR $c='' OR TRIM(LOWER($c)) IN ('pending','submitted','open','in_review','requested') OR
+                 TRIM(LOWER($c)) NOT IN ('genehmigt','abgelehnt','approved','rejected','completed','done'))";
+    }
+    return "($c IS NOT NULL AND LOWER($c) != 'pending')";
+}
+
+/**
+ * Request counts per status from the trigger-maintained counter table;
+ * null if the table does not exist (caller falls back to COUNT(*))
+ */
+function approval_status_counts(mysqli $conn): ?array {
+    if (!schema_has_column($conn, 'approval_status_counts', 'request_count')) {
+        return null;
+    }
+    $res = $conn->query("SELECT status, request_count FROM approval_status_counts");
+    if (!$res) {
+        return null;
+    }
+    $counts = array_fill_keys(APPROVAL_STATUSES, 0);
+    while ($r = $res->fetch_row()) {
+        $counts[$r[0]] = (int)$r[1];
+    }
+    $res->close();
+    return $counts;
+}
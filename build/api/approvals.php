@@ -4,6 +4,7 @@
  * - Nimmt Änderungsanträge entgegen: edit | delete | create (falls Schema dies erlaubt)
  * - Speichert Anträge in approval_requests (status=pending)
  * - Bringt Insert/Update in Einklang mit schema.sql (requested_at, UUID-IDs, entry_id)
+ * - GET: ?status=all | ?status=history (bearbeitete Anträge); optional seitenweise mit ?limit=&cursor=
  */
 define('API_GUARD', true);
 
@@ -12,11 +13,14 @@ define('API_GUARD', true);
 if (function_exists('ob_start')) { ob_start(); }
 
 require_once __DIR__ . '/error-handler.php';
-require_once __DIR__ . '/security-middleware.php';
-require_once __DIR__ . '/auth_helpers.php';
-require_once __DIR__ . '/csrf-middleware.php';
-require_once __DIR__ . '/DatabaseConnection.php';
+require_once __DIR__ . '/api-bootstrap.php';
 require_once __DIR__ . '/InputValidationService.php';
+require_once __DIR__ . '/schema-capabilities.php';
+require_once __DIR__ . '/keyset-pagination.php';
+require_once __DIR__ . '/approval-status.php';
+require_once __DIR__ . '/user-locations.php';
+require_once __DIR__ . '/daily-totals.php';
+require_once __DIR__ . '/identity.php';
 
 // Security / CORS
 initialize_api();
@@ -82,58 +86,35 @@ function generate_uuid_v4(): string {
 }
 
 // Prüfer für Schema-Fähigkeiten (ob CREATE erlaubt ist und ob entry_id NULL erlaubt)
+// Spalten-Metadaten kommen aus dem Schema-Cache (schema-capabilities.php), nicht per SHOW COLUMNS
 function approvals_supports_create(mysqli $conn): bool {
-    if ($res = $conn->query("SHOW COLUMNS FROM approval_requests LIKE 'type'")) {
-        if ($row = $res->fetch_assoc()) {
-            $type = strtolower($row['Type'] ?? '');
-            $res->close();
-            return strpos($type, "'create'") !== false; // enum enthält 'create'
-        }
-        $res->close();
-    }
-    return false;
+    $type = schema_column($conn, 'approval_requests', 'type')['type'] ?? '';
+    return strpos($type, "'create'") !== false; // enum enthält 'create'
 }
 
 function approvals_entry_id_nullable(mysqli $conn): bool {
-    if ($res = $conn->query("SHOW COLUMNS FROM approval_requests LIKE 'entry_id'")) {
-        if ($row = $res->fetch_assoc()) {
-            $nullable = strtolower($row['Null'] ?? '') === 'yes';
-            $res->close();
-            return $nullable;
-        }
-        $res->close();
-    }
-    return false;
+    return schema_column($conn, 'approval_requests', 'entry_id')['nullable'] ?? false;
 }
 
 function time_entries_has_status(mysqli $conn): bool {
-    if ($res = $conn->query("SHOW COLUMNS FROM time_entries LIKE 'status'")) {
-        $has = $res->num_rows > 0;
-        $res->close();
-        return $has;
-    }
-    return false;
+    return schema_has_column($conn, 'time_entries', 'status');
 }
 
 function approval_requests_id_is_varchar(mysqli $conn): bool {
-    if ($res = $conn->query("SHOW COLUMNS FROM approval_requests LIKE 'id'")) {
-        if ($row = $res->fetch_assoc()) {
-            $type = strtolower($row['Type'] ?? '');
-            $res->close();
-            return strpos($type, 'varchar') !== false;
-        }
-        $res->close();
+    $column = schema_column($conn, 'approval_requests', 'id');
+    if ($column === null) {
+        return true; // Default zu varchar, wie in schema.sql
     }
-    return true; // Default zu varchar, wie in schema.sql
+    return strpos($column['type'], 'varchar') !== false;
 }
 
 function approval_requests_has_requested_at(mysqli $conn): bool {
-    if ($res = $conn->query("SHOW COLUMNS FROM approval_requests LIKE 'requested_at'")) {
-        $has = $res->num_rows > 0;
-        $res->close();
-        return $has;
-    }
-    return false;
+    return schema_has_column($conn, 'approval_requests', 'requested_at');
+}
+
+// Standort-Filter über requested_by_user_id + user_locations statt Username-Join + JSON_OVERLAPS (Migration 006)
+function approvals_location_scope_indexed(mysqli $conn): bool {
+    return user_locations_available($conn) && schema_has_column($conn, 'approval_requests', 'requested_by_user_id');
 }
 
 try {
@@ -143,53 +124,24 @@ try {
     $requestedBy = $sessionUser['username'] ?? ($sessionUser['name'] ?? 'unknown');
     if (!empty($requestedBy)) { $requestedBy = trim($requestedBy); }
     $sessionRole = $sessionUser['role'] ?? null;
-    $userRole = $sessionRole ?: 'Mitarbeiter';
-    // Rolle aus DB nur dann auflösen, wenn die Session keine erhöhte Rolle trägt
-    try {
-        $dbRole = null;
-        if (!in_array($sessionRole, ['Admin','Bereichsleiter','Standortleiter'], true)) {
-            $oid = $sessionUser['oid'] ?? ($sessionUser['azure_oid'] ?? null);
-            if ($oid) {
-                if ($st = $conn->prepare("SELECT role FROM users WHERE azure_oid = ? LIMIT 1")) {
-                    $st->bind_param('s', $oid);
-                    if ($st->execute()) { $st->bind_result($r); if ($st->fetch()) { $dbRole = $r; } }
-                    $st->close();
-                }
-            }
-            if (!$dbRole && !empty($requestedBy)) {
-                if ($st = $conn->prepare("SELECT role FROM users WHERE username = ? LIMIT 1")) {
-                    $st->bind_param('s', $requestedBy);
-                    if ($st->execute()) { $st->bind_result($r); if ($st->fetch()) { $dbRole = $r; } }
-                    $st->close();
-                }
-            }
-            if (!empty($dbRole)) { $userRole = $dbRole; }
-        }
-        if (function_exists('alog')) { alog('role_resolved', ['sessionRole' => $sessionRole, 'dbRole' => ($dbRole ?? null), 'final' => $userRole, 'user' => $requestedBy]); }
-    } catch (Throwable $e) { if (function_exists('alog')) { alog('role_resolve_error', $e->getMessage()); } }
+    // Rolle + Standorte aus identity.php (Session-Cache, nach Rollenänderung neu aufgelöst)
+    $me = identity_resolve($conn, $sessionUser);
+    $userRole = $me['role'] ?? ($sessionRole ?: 'Mitarbeiter');
+    if (function_exists('alog')) { alog('role_resolved', ['sessionRole' => $sessionRole, 'dbRole' => ($me['role'] ?? null), 'final' => $userRole, 'user' => $requestedBy]); }
 
     $method = $_SERVER['REQUEST_METHOD'] ?? 'POST';
     $raw = file_get_contents('php://input');
     $data = json_decode($raw, true) ?: [];
 
     if ($method === 'GET') {
+        // Nur lesend: Session-Lock freigeben, parallele Requests derselben Session laufen weiter
+        release_session_lock();
         alog('GET_begin', ['user' => ($sessionUser['username'] ?? ($sessionUser['name'] ?? 'unknown')), 'role' => $userRole]);
         $showAll = false;
         $statusParam = strtolower((string)($_GET['status'] ?? ''));
         if ($statusParam === 'all' || isset($_GET['all'])) { $showAll = true; }
-
-        // Basisklausel
-        if ($showAll) {
-            $approval_query = "SELECT id, type, original_entry_data, new_data, reason_data, requested_by, status FROM approval_requests WHERE 1=1";
-        } else {
-            // Ausstehend = alles nicht-final
-            $approval_query = "SELECT id, type, original_entry_data, new_data, reason_data, requested_by, status
-                               FROM approval_requests
-                               WHERE (
-                                 status IS NULL OR status='' OR TRIM(LOWER(status)) IN ('pending','submitted','open','in_review','requested') OR
-                                 TRIM(LOWER(status)) NOT IN ('genehmigt','abgelehnt','approved','rejected','completed','done')
-                               )";
-        }
+        // Historie = bearbeitete Anträge (wie login.php 'history')
+        $showHistory = ($statusParam === 'history');
 
         // Robust: Sortierkriterium ermitteln
         $orderCol = 'id';
@@ -197,82 +149,117 @@ try {
         if (approval_requests_has_requested_at($conn)) {
             $orderCol = 'requested_at';
             $orderExpr = $orderCol . ' DESC';
-        } else if ($res = $conn->query("SHOW COLUMNS FROM approval_requests LIKE 'created_at'")) {
-            if ($res->num_rows > 0) { $orderCol = 'created_at'; $orderExpr = $orderCol . ' DESC'; }
-            $res->close();
-        } else {
-            // Versuche nach Datum aus JSON zu sortieren (new_data.date oder original.date)
+        } else if (schema_has_column($conn, 'approval_requests', 'created_at')) {
+            $orderCol = 'created_at';
+            $orderExpr = $orderCol . ' DESC';
+        } else if (empty(schema_capabilities($conn)['approval_requests'])) {
+            // Keine Metadaten verfügbar: nach Datum aus JSON sortieren (new_data.date oder original.date)
             $orderExpr = "COALESCE(JSON_UNQUOTE(JSON_EXTRACT(new_data, '$.date')), JSON_UNQUOTE(JSON_EXTRACT(original_entry_data, '$.date')), id) DESC";
+            $orderCol = null;
+        }
+
+        // Seitenweise Abfrage (nur wenn ?limit= oder ?cursor= gesetzt; sonst vollständige Liste wie bisher)
+        // Keyset über (requested_at, id) bzw. (id) - nutzt die Indizes aus 002/004 statt OFFSET
+        $paged = $orderCol !== null && (isset($_GET['limit']) || isset($_GET['cursor']));
+        $pageLimit = 0;
+        $pageKeyCols = [];
+        $pageWhere = ['', ''];
+        $pageParams = [];
+        $pageOrder = ['', ''];
+        if ($paged) {
+            $pageLimit = keyset_limit();
+            $pageKeyCols = $orderCol === 'id' ? ['id'] : [$orderCol, 'id'];
+            $cursor = keyset_cursor(count($pageKeyCols));
+            // [0] = ohne Alias, [1] = mit Alias ar. (JOIN-Abfrage der Leitungsrollen)
+            foreach (['', 'ar.'] as $i => $alias) {
+                $cols = array_map(function ($c) use ($alias) { return $alias . $c; }, $pageKeyCols);
+                [$where, $pageParams] = keyset_condition($cols, $cursor);
+                $pageWhere[$i] = " AND $where";
+                $pageOrder[$i] = implode(' DESC, ', $cols) . ' DESC LIMIT ' . ($pageLimit + 1);
+            }
+            $orderExpr = $pageOrder[0];
+        }
+        $pageTypes = str_repeat('s', count($pageParams));
+
+        // Zusatzspalten: Bearbeitungsinfos für die Historie, Sortierspalte für den Cursor
+        $extraColNames = $showHistory ? ['resolved_by', 'resolved_at'] : [];
+        if ($paged && $orderCol !== 'id') { $extraColNames[] = $orderCol; }
+        $extraCols = $extraColNames ? ', ' . implode(', ', $extraColNames) : '';
+        $extraColsAr = $extraColNames ? ', ar.' . implode(', ar.', $extraColNames) : '';
+
+        // Basisklausel (Status-Filter aus approval-status.php: nach Migration 005 indexierbar)
+        $approval_query = "SELECT id, type, original_entry_data, new_data, reason_data, requested_by, status$extraCols FROM approval_requests WHERE ";
+        if ($showHistory) {
+            $approval_query .= approval_status_filter($conn, 'resolved');
+        } else if ($showAll) {
+            $approval_query .= "1=1";
+        } else {
+            $approval_query .= approval_status_filter($conn, 'pending');
         }
 
         // Security Fix 2025-10-26: Use assigned locations from master_data for Bereichsleiter and Standortleiter
         $role = $userRole;
         if (in_array($role, ['Honorarkraft','Mitarbeiter'], true)) {
-            $q = $approval_query . " AND requested_by = ? ORDER BY $orderExpr";
+            $q = $approval_query . " AND requested_by = ?" . $pageWhere[0] . " ORDER BY $orderExpr";
             $stmt = $conn->prepare($q);
             $email = $requestedBy;
-            $stmt->bind_param('s', $email);
+            $stmt->bind_param('s' . $pageTypes, $email, ...$pageParams);
         } else if ($role === 'Bereichsleiter' || $role === 'Standortleiter') {
             // Get user's assigned locations from master_data
-            $userId = $sessionUser['id'] ?? null;
-            if (!$userId) {
-                // Fallback: try to get user_id from database
-                $oid = $sessionUser['oid'] ?? ($sessionUser['azure_oid'] ?? null);
-                if ($oid && ($ust = $conn->prepare("SELECT id FROM users WHERE azure_oid = ? LIMIT 1"))) {
-                    $ust->bind_param('s', $oid);
-                    if ($ust->execute()) {
-                        $ust->bind_result($uid);
-                        if ($ust->fetch()) { $userId = $uid; }
-                    }
-                    $ust->close();
-                }
-            }
-
-            $assignedLocations = [];
-            if ($userId) {
-                $assignedLocations = get_user_assigned_locations($conn, $userId);
-            }
+            $assignedLocations = $me['locations'] ?? [];
 
             if (empty($assignedLocations)) {
                 // Bereichsleiter/Standortleiter ohne zugeordnete Standorte sieht nur eigene Requests
-                $q = $approval_query . " AND requested_by = ? ORDER BY $orderExpr";
+                $q = $approval_query . " AND requested_by = ?" . $pageWhere[0] . " ORDER BY $orderExpr";
                 $stmt = $conn->prepare($q);
                 $email = $requestedBy;
-                $stmt->bind_param('s', $email);
+                $stmt->bind_param('s' . $pageTypes, $email, ...$pageParams);
+            } else if (approvals_location_scope_indexed($conn)) {
+                // Antragsteller über requested_by_user_id + user_locations (Migration 006): reine Index-Lookups, kein DISTINCT
+                [$scope, $scopeTypes, $scopeParams] = user_locations_scope($conn, 'requested_by_user_id', $assignedLocations);
+                $q = $approval_query . " AND $scope" . $pageWhere[0] . " ORDER BY $orderExpr";
+                $stmt = $conn->prepare($q);
+                $stmt->bind_param($scopeTypes . $pageTypes, ...$scopeParams, ...$pageParams);
             } else {
                 // Filter by users with assigned locations (check requested_by user's locations)
                 // Verwende direkte JOINs statt Subquery für bessere Performance
-                $q = "SELECT DISTINCT ar.id, ar.type, ar.original_entry_data, ar.new_data, ar.reason_data, ar.requested_by, ar.status
+                $q = "SELECT DISTINCT ar.id, ar.type, ar.original_entry_data, ar.new_data, ar.reason_data, ar.requested_by, ar.status$extraColsAr
                       FROM approval_requests ar
                       INNER JOIN users u ON ar.requested_by = u.username
                       INNER JOIN master_data md ON u.id = md.user_id
                       WHERE JSON_OVERLAPS(md.locations, CAST(? AS JSON))";
 
                 // Status-Filter hinzufügen
-                if ($showAll) {
+                if ($showHistory) {
+                    $q .= " AND " . approval_status_filter($conn, 'resolved', 'ar.');
+                } else if ($showAll) {
                     // Keine zusätzliche Status-Filterung
                 } else {
-                    $q .= " AND (
-                        ar.status IS NULL OR ar.status='' OR TRIM(LOWER(ar.status)) IN ('pending','submitted','open','in_review','requested') OR
-                        TRIM(LOWER(ar.status)) NOT IN ('genehmigt','abgelehnt','approved','rejected','completed','done')
-                    )";
+                    $q .= " AND " . approval_status_filter($conn, 'pending', 'ar.');
                 }
 
-                $q .= " ORDER BY $orderExpr";
+                $q .= $pageWhere[1] . " ORDER BY " . ($paged ? $pageOrder[1] : $orderExpr);
                 $stmt = $conn->prepare($q);
                 $locationsJson = json_encode($assignedLocations);
-                $stmt->bind_param('s', $locationsJson);
+                $stmt->bind_param('s' . $pageTypes, $locationsJson, ...$pageParams);
             }
         } else {
             // Admin sieht alle
-            $stmt = $conn->prepare($approval_query . " ORDER BY $orderExpr");
+            $stmt = $conn->prepare($approval_query . $pageWhere[0] . " ORDER BY $orderExpr");
+            if ($stmt && $pageTypes !== '') { $stmt->bind_param($pageTypes, ...$pageParams); }
         }
         if (!$stmt) { alog('GET_prepare_error'); send_response(500, ['message' => 'Database error (prepare)']); }
         if (!$stmt->execute()) { $e = $stmt->error; $stmt->close(); alog('GET_execute_error', $e); send_response(500, ['message' => 'Database error (execute)', 'error' => $e]); }
         $raw = $stmt->get_result()->fetch_all(MYSQLI_ASSOC);
         $stmt->close();
         alog('GET_count', ['count' => count($raw)]);
-        $items = array_map(function($req) use ($showAll) {
+        $nextCursor = null;
+        if ($paged) {
+            [$raw, $nextCursor] = keyset_page($raw, $pageLimit, function ($r) use ($pageKeyCols) {
+                return array_map(function ($c) use ($r) { return $r[$c]; }, $pageKeyCols);
+            });
+        }
+        $items = array_map(function($req) use ($showAll, $showHistory) {
             $entry_data_json = json_decode($req['original_entry_data'] ?? '[]', true) ?: [];
             return [
                 'id' => (string)$req['id'],
@@ -295,17 +282,30 @@ try {
                 'requestedBy' => $req['requested_by'],
                 // Zeige immer den echten Status; UI deaktiviert finale Einträge korrekt
                 'status' => ($req['status'] ?: 'pending')
-            ];
+            ] + ($showHistory ? [
+                'finalStatus' => $req['status'],
+                'resolvedAt' => $req['resolved_at'],
+                'resolvedBy' => $req['resolved_by'],
+            ] : []);
         }, $raw);
         // Für Admin/Leitung hilfreiche Meta-Infos zurückgeben
         $meta = [];
-        if (in_array($role, ['Admin','Bereichsleiter','Standortleiter'], true)) {
+        // Nur auf der ersten Seite - Folgeseiten sollen keine Vollzählung auslösen
+        if (in_array($role, ['Admin','Bereichsleiter','Standortleiter'], true) && empty($_GET['cursor'])) {
             $total = 0; $pend = 0;
-            if ($rs = $conn->query("SELECT COUNT(*) AS c FROM approval_requests")) { $r = $rs->fetch_assoc(); $total = (int)($r['c'] ?? 0); $rs->close(); }
-            if ($rs = $conn->query("SELECT COUNT(*) AS c FROM approval_requests WHERE (status IS NULL OR TRIM(LOWER(status))='pending' OR status='')")) { $r = $rs->fetch_assoc(); $pend = (int)($r['c'] ?? 0); $rs->close(); }
+            // Zählertabelle (Trigger, Migration 005) statt Vollscan
+            if (($counts = approval_status_counts($conn)) !== null) {
+                $total = array_sum($counts);
+                $pend = $counts['pending'];
+            } else {
+                if ($rs = $conn->query("SELECT COUNT(*) AS c FROM approval_requests")) { $r = $rs->fetch_assoc(); $total = (int)($r['c'] ?? 0); $rs->close(); }
+                if ($rs = $conn->query("SELECT COUNT(*) AS c FROM approval_requests WHERE (status IS NULL OR TRIM(LOWER(status))='pending' OR status='')")) { $r = $rs->fetch_assoc(); $pend = (int)($r['c'] ?? 0); $rs->close(); }
+            }
             $meta = ['total' => $total, 'pending' => $pend];
         }
-        send_response(200, ['items' => $items, 'count' => count($items), 'meta' => $meta]);
+        $payload = ['items' => $items, 'count' => count($items), 'meta' => $meta];
+        if ($paged) { $payload['nextCursor'] = $nextCursor; }
+        send_response(200, $payload);
     }
 
     if ($method === 'POST') {
@@ -440,23 +440,7 @@ try {
         // Security Fix 2025-10-26: Bereichsleiter/Standortleiter dürfen nur Anträge von Users ihrer zugeordneten Standorte verarbeiten
         if ($userRole === 'Bereichsleiter' || $userRole === 'Standortleiter') {
             // Get user's assigned locations
-            $userId = $sessionUser['id'] ?? null;
-            if (!$userId) {
-                $oid = $sessionUser['oid'] ?? ($sessionUser['azure_oid'] ?? null);
-                if ($oid && ($ust = $conn->prepare("SELECT id FROM users WHERE azure_oid = ? LIMIT 1"))) {
-                    $ust->bind_param('s', $oid);
-                    if ($ust->execute()) {
-                        $ust->bind_result($uid);
-                        if ($ust->fetch()) { $userId = $uid; }
-                    }
-                    $ust->close();
-                }
-            }
-
-            $assignedLocations = [];
-            if ($userId) {
-                $assignedLocations = get_user_assigned_locations($conn, $userId);
-            }
+            $assignedLocations = $me['locations'] ?? [];
 
             if (empty($assignedLocations)) {
                 // Bereichsleiter/Standortleiter ohne zugeordnete Standorte darf keine Anträge bearbeiten
@@ -464,18 +448,24 @@ try {
             }
 
             // Lade Antrag UND prüfe ob User zu den zugeordneten Standorten gehört
-            $stmt = $conn->prepare("
-                SELECT ar.id, ar.type, ar.original_entry_data, ar.new_data, ar.requested_by
-                FROM approval_requests ar
-                INNER JOIN users u ON ar.requested_by = u.username
-                INNER JOIN master_data md ON u.id = md.user_id
-                WHERE ar.id = ?
-                AND ar.status = 'pending'
-                AND JSON_OVERLAPS(md.locations, CAST(? AS JSON))
-                LIMIT 1
-            ");
-            $locationsJson = json_encode($assignedLocations);
-            $stmt->bind_param('ss', $requestId, $locationsJson);
+            if (approvals_location_scope_indexed($conn)) {
+                [$scope, $scopeTypes, $scopeParams] = user_locations_scope($conn, 'requested_by_user_id', $assignedLocations);
+                $stmt = $conn->prepare("SELECT id, type, original_entry_data, new_data, requested_by FROM approval_requests WHERE id = ? AND status = 'pending' AND $scope LIMIT 1");
+                $stmt->bind_param('s' . $scopeTypes, $requestId, ...$scopeParams);
+            } else {
+                $stmt = $conn->prepare("
+                    SELECT ar.id, ar.type, ar.original_entry_data, ar.new_data, ar.requested_by
+                    FROM approval_requests ar
+                    INNER JOIN users u ON ar.requested_by = u.username
+                    INNER JOIN master_data md ON u.id = md.user_id
+                    WHERE ar.id = ?
+                    AND ar.status = 'pending'
+                    AND JSON_OVERLAPS(md.locations, CAST(? AS JSON))
+                    LIMIT 1
+                ");
+                $locationsJson = json_encode($assignedLocations);
+                $stmt->bind_param('ss', $requestId, $locationsJson);
+            }
         } else {
             // Admin darf alle Anträge bearbeiten
             $stmt = $conn->prepare("SELECT id, type, original_entry_data, new_data, requested_by FROM approval_requests WHERE id = ? AND status = 'pending' LIMIT 1");
@@ -496,6 +486,7 @@ try {
 
         $conn->begin_transaction();
         try {
+            $touchedDay = null;
             if ($finalStatus === 'genehmigt') {
                 if ($type === 'create') {
                     // Neuen Eintrag anlegen (status-Spalte optional behandeln)
@@ -524,6 +515,7 @@ try {
                     }
                     if (!$ins->execute()) { throw new Exception('Insert time_entries failed'); }
                     $ins->close();
+                    $touchedDay = [$userId, $date];
                 } elseif ($type === 'edit') {
                     // Zeiten ändern
                     $id = (int)($orig['id'] ?? 0);
@@ -536,6 +528,7 @@ try {
                     }
 
                     $updBy = $sessionUser['username'] ?? ($sessionUser['name'] ?? 'system');
+                    $touchedDay = daily_totals_entry_day($conn, $id);
                     $sqlUp = "UPDATE time_entries SET start_time = ?, stop_time = ?, updated_by = ?, updated_at = NOW() WHERE id = ?";
                     $up = $conn->prepare($sqlUp);
                     $up->bind_param('sssi', $start, $stop, $updBy, $id);
@@ -544,11 +537,16 @@ try {
                 } elseif ($type === 'delete') {
                     // Eintrag löschen
                     $id = (int)($orig['id'] ?? 0);
+                    $touchedDay = daily_totals_entry_day($conn, $id);
                     $del = $conn->prepare("DELETE FROM time_entries WHERE id = ? LIMIT 1");
                     $del->bind_param('i', $id);
                     if (!$del->execute()) { throw new Exception('Delete time_entries failed'); }
                     $del->close();
                 }
+                // Tagessumme des betroffenen Tages neu berechnen (daily-totals.php)
+                if (!empty($touchedDay) && !daily_totals_refresh($conn, $touchedDay[0], $touchedDay[1])) {
+                    throw new Exception('Update daily_totals failed');
+                }
             }
             // Antrag finalisieren
             $resBy = $sessionUser['username'] ?? ($sessionUser['name'] ?? 'system');
@@ -35,7 +35,8 @@ session_set_cookie_params([
 ]);
 
 if (session_status() !== PHP_SESSION_ACTIVE) {
-    @session_start();
+    // Nur lesen: Lock sofort freigeben, blockiert parallele Requests derselben Session nicht
+    @session_start(['read_and_close' => true]);
 }
 
 // Check if user exists in session
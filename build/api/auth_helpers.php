@@ -21,6 +21,7 @@
  */
 
 require_once __DIR__ . '/constants.php';
+require_once __DIR__ . '/response-compression.php';
 // Backward-compatible defaults if constants.php does not define time constants
 if (!defined('SECONDS_PER_HOUR')) { define('SECONDS_PER_HOUR', 3600); }
 if (!defined('SECONDS_PER_DAY')) { define('SECONDS_PER_DAY', 86400); }
@@ -69,15 +70,23 @@ function initialize_api() {
         header("Access-Control-Allow-Headers: Content-Type, Access-Control-Allow-Headers, Authorization, X-Requested-With, X-CSRF-Token");
         exit(0);
     }
+
+    // Antworten ab RESPONSE_COMPRESSION_MIN_BYTES werden br/gzip-komprimiert (response-compression.php)
+    response_compression_start();
 }
 
 /**
  * Sendet eine JSON-Antwort mit dem entsprechenden HTTP-Statuscode und beendet das Skript.
  */
 function send_response($status_code, $data = null) {
-    // Clean any output buffer before sending response (prevents header corruption)
+    // Clean any output buffer before sending response (prevents header corruption);
+    // the compression buffer is only emptied, it encodes the JSON below at exit
     if (ob_get_level() > 0) {
-        ob_end_clean();
+        if (ob_get_level() === response_compression_level()) {
+            ob_clean();
+        } else {
+            ob_end_clean();
+        }
     }
 
     // Verhindere, dass nach dem Senden der Antwort noch etwas passiert.
@@ -98,8 +107,13 @@ function send_response($status_code, $data = null) {
 /**
  * Startet eine PHP-Session mit sicheren, modernen Cookie-Einstellungen.
  * Diese Funktion behebt das Cookie-Pfad-Problem.
+ *
+ * $readOnly (bzw. nach release_session_lock()) liest die Session nur und gibt den
+ * Datei-Lock sofort wieder frei (read_and_close): Änderungen an $_SESSION werden
+ * dann nicht gespeichert, parallele Requests derselben Session blockieren nicht.
  */
-function start_secure_session() {
+function start_secure_session(bool $readOnly = false) {
+    $readOnly = $readOnly || session_lock_released();
     // CRITICAL: Session name MUST be AZE_SESSION (consistent with login.php)
     // IMPORTANT: Can ONLY be set BEFORE session is active!
     $migrate = null;
@@ -133,7 +147,7 @@ function start_secure_session() {
         ]);
 
         // Start session (using AZE_SESSION name)
-        session_start();
+        session_start($readOnly ? ['read_and_close' => true] : []);
     }
 
     // Migriere relevante Daten aus vorheriger Session (falls vorhanden)
@@ -149,6 +163,33 @@ function start_secure_session() {
     $now = time();
     if (!isset($_SESSION['created_at'])) { $_SESSION['created_at'] = $now; }
     if (!isset($_SESSION['last_activity'])) { $_SESSION['last_activity'] = $now; }
+
+    if ($readOnly) {
+        release_session_lock();
+    }
+}
+
+/**
+ * Speichert die Session und gibt den Session-Lock frei, sobald ein Request nichts
+ * mehr in die Session schreibt (lesende Endpoints nach Session-/Identitätsprüfung).
+ * $_SESSION bleibt lesbar; spätere start_secure_session()-Aufrufe lesen nur noch.
+ */
+function release_session_lock(): void {
+    if (session_status() === PHP_SESSION_ACTIVE) {
+        session_write_close();
+    }
+    session_lock_released(true);
+}
+
+/**
+ * True, wenn release_session_lock() in diesem Request bereits aufgerufen wurde
+ */
+function session_lock_released(?bool $released = null): bool {
+    static $state = false;
+    if ($released !== null) {
+        $state = $released;
+    }
+    return $state;
 }
 
 /**
@@ -207,10 +248,13 @@ function checkSessionTimeout() {
  * Wenn nicht, wird eine 401-Antwort gesendet und das Skript beendet.
  * Wenn ja, werden die Benutzerdaten aus der Session zurückgegeben.
  *
+ * $readOnly gibt den Session-Lock direkt nach dem Lesen frei (lesende Endpoints, die
+ * nichts in die Session schreiben), siehe start_secure_session().
+ *
  * @return array Die Benutzerdaten aus der Session ('oid', 'name', 'username').
  */
-function verify_session_and_get_user() {
-    start_secure_session();
+function verify_session_and_get_user(bool $readOnly = false) {
+    start_secure_session($readOnly);
 
     // NOTE (2025-10-19): Session-Timeout-Check temporarily disabled for debugging
     // Will re-enable after fixing timer API
@@ -263,6 +307,16 @@ function get_user_assigned_locations($conn, $userId) {
     }
 
     $locations = [];
+    // Mehrfach pro Request abgefragt (Users, Zeiten, Anträge): Statement-Cache des gemeinsamen Handles nutzen
+    if (function_exists('db_fetch_all')) {
+        try {
+            $rows = db_fetch_all($conn, "SELECT locations FROM master_data WHERE user_id = ? LIMIT 1", 'i', [$userId]);
+        } catch (Throwable $e) {
+            return [];
+        }
+        $decoded = $rows ? json_decode($rows[0]['locations'] ?? '[]', true) : [];
+        return is_array($decoded) ? $decoded : [];
+    }
     $stmt = $conn->prepare("SELECT locations FROM master_data WHERE user_id = ? LIMIT 1");
     if ($stmt) {
         $stmt->bind_param('i', $userId);
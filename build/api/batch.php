@@ -0,0 +1,133 @@
+<?php
+/**
+ * Batch API - mehrere Lese-Anfragen in einem Request (SPA-Start / Aktualisieren)
+ *
+ * POST { requests: [{ id: 'users', resource: 'users', ifNoneMatch: 'W/"..."' }, ...] }
+ *   -> { responses: { users: { status: 200, etag: 'W/"..."', body: [...] }, ... } }
+ *
+ * Ressourcen: csrfToken, currentUser, settings, masterData, users, timeEntries,
+ * approvals (pending), history. Security-Bootstrap, Session, Benutzer/Rolle (identity.php) und
+ * DB-Verbindung werden einmal für alle Teilanfragen aufgebaut; die Daten kommen aus
+ * bootstrap-data.php (gleiche Rollenfilter wie login.php). settings, masterData und
+ * users tragen ein ETag (http-cache.php) und antworten mit status 304 ohne body,
+ * wenn ifNoneMatch aktuell ist. Fehler einer Teilanfrage betreffen nur deren Eintrag.
+ */
+define('API_GUARD', true);
+
+require_once __DIR__ . '/api-bootstrap.php';
+require_once __DIR__ . '/ip-location-index.php';
+require_once __DIR__ . '/http-cache.php';
+require_once __DIR__ . '/bootstrap-data.php';
+require_once __DIR__ . '/identity.php';
+
+const BATCH_MAX_REQUESTS = 16;
+// Tabellen, aus deren data_versions das ETag einer Ressource berechnet wird
+const BATCH_ETAG_TABLES = [
+    'settings' => ['global_settings'],
+    'masterData' => ['master_data'],
+    'users' => ['users', 'master_data'],
+];
+
+initialize_api();
+initSecurityMiddleware();
+
+if (($_SERVER['REQUEST_METHOD'] ?? '') !== 'POST') {
+    http_response_code(405);
+    header('Allow: POST');
+    header('Content-Type: application/json; charset=utf-8');
+    echo json_encode(['error' => 'Method not allowed']);
+    exit;
+}
+
+$input = json_decode(file_get_contents('php://input'), true);
+$requests = is_array($input['requests'] ?? null) ? array_values($input['requests']) : null;
+if (!$requests || count($requests) > BATCH_MAX_REQUESTS) {
+    send_response(400, ['error' => 'VALIDATION_ERROR', 'message' => 'requests: 1-' . BATCH_MAX_REQUESTS . ' Teilanfragen erwartet']);
+}
+
+$sessionUser = verify_session_and_get_user();
+$conn = DatabaseConnection::getInstance()->getConnection();
+// Identität vor dem Freigeben der Session auflösen, damit sie dort zwischengespeichert wird
+$me = identity_resolve($conn, $sessionUser);
+if (!$me) {
+    send_response(404, ['message' => 'User not found']);
+}
+// Nur lesende Teilanfragen: CSRF-Token ggf. anlegen, danach Session-Lock freigeben
+$csrfToken = null;
+foreach ($requests as $req) {
+    if (is_array($req) && ($req['resource'] ?? null) === 'csrfToken') {
+        $csrfToken = getCsrfToken(true);
+        break;
+    }
+}
+release_session_lock();
+
+// Anträge werden über den Benutzernamen aus der Session zugeordnet (wie login.php)
+$username = trim((string)($sessionUser['username'] ?? '')) ?: $me['username'];
+
+$responses = [];
+foreach ($requests as $i => $req) {
+    $resource = is_array($req) ? (string)($req['resource'] ?? '') : (string)$req;
+    $id = is_array($req) && isset($req['id']) ? (string)$req['id'] : ($resource !== '' ? $resource : (string)$i);
+
+    $etag = null;
+    try {
+        if (isset(BATCH_ETAG_TABLES[$resource])) {
+            $variant = $resource === 'users' ? $me['role'] . ':' . $me['id'] : '';
+            $etag = http_cache_etag($conn, BATCH_ETAG_TABLES[$resource], $variant);
+            $ifNoneMatch = is_array($req) ? (string)($req['ifNoneMatch'] ?? '') : '';
+            if ($etag !== null && $ifNoneMatch !== '' && http_cache_matches($etag, $ifNoneMatch)) {
+                $responses[$id] = ['status' => 304, 'etag' => $etag];
+                continue;
+            }
+        }
+
+        switch ($resource) {
+            case 'csrfToken':
+                $body = ['csrfToken' => $csrfToken];
+                break;
+            case 'currentUser':
+                $user = bootstrap_session_user($conn, $sessionUser);
+                if (!$user) {
+                    $responses[$id] = ['status' => 404, 'body' => ['message' => 'User not found']];
+                    continue 2;
+                }
+                $body = [
+                    'id' => $user['id'],
+                    'name' => $user['name'],
+                    'role' => $user['role'],
+                    'azureOid' => $user['azureOid'],
+                    'location' => ip_location_detect($_SERVER['REMOTE_ADDR'] ?? ''),
+                    'needsOnboarding' => $user['needsOnboarding'],
+                ];
+                break;
+            case 'settings':
+                $body = bootstrap_global_settings($conn);
+                break;
+            case 'masterData':
+                $body = bootstrap_master_data($conn) ?: new stdClass();
+                break;
+            case 'users':
+                $body = bootstrap_users($conn, $me['id'], $me['role']);
+                break;
+            case 'timeEntries':
+                $body = bootstrap_time_entries($conn, $me['id'], $me['role']);
+                break;
+            case 'approvals':
+                $body = bootstrap_approvals($conn, $me['id'], $me['role'], $username, 'pending');
+                break;
+            case 'history':
+                $body = bootstrap_approvals($conn, $me['id'], $me['role'], $username, 'resolved');
+                break;
+            default:
+                $responses[$id] = ['status' => 404, 'body' => ['message' => "Unbekannte Ressource: $resource"]];
+                continue 2;
+        }
+        $responses[$id] = ['status' => 200, 'body' => $body] + ($etag !== null ? ['etag' => $etag] : []);
+    } catch (Throwable $e) {
+        error_log("batch_{$resource}_failed: " . $e->getMessage());
+        $responses[$id] = ['status' => 500, 'body' => ['message' => 'Database error']];
+    }
+}
+
+send_response(200, ['responses' => (object)$responses]);
@@ -0,0 +1,217 @@
+<?php
+/**
+ * Bootstrap Data - role-filtered read models for the SPA's initial state
+ *
+ * One loader per part of the state login.php returns (users, masterData,
+ * globalSettings, timeEntries, approvalRequests, history). login.php, batch.php
+ * and the GET handlers of users.php / masterdata.php share them, so the role
+ * filters exist once: Admin sees everything, Bereichsleiter/Standortleiter their
+ * assigned locations (user_locations, migration 006), everyone else only their
+ * own data. Loaders throw RuntimeException on database errors; the caller decides
+ * whether a failed part becomes an empty list (login.php) or an error entry (batch.php).
+ *
+ * Usage:
+ *   $me = bootstrap_session_user($conn, $sessionUser);
+ *   $users = bootstrap_users($conn, $me['id'], $me['role']);
+ *   $pending = bootstrap_approvals($conn, $me['id'], $me['role'], $me['username'], 'pending');
+ */
+
+if (!defined('API_GUARD')) {
+    die('Direct access not permitted');
+}
+
+require_once __DIR__ . '/DatabaseConnection.php';
+require_once __DIR__ . '/schema-capabilities.php';
+require_once __DIR__ . '/approval-status.php';
+require_once __DIR__ . '/user-locations.php';
+
+const BOOTSTRAP_LEADER_ROLES = ['Bereichsleiter', 'Standortleiter'];
+const BOOTSTRAP_SETTINGS_DEFAULTS = [
+    'overtimeThreshold' => 8.0,
+    'changeReasons' => ['Vergessen einzustempeln', 'Vergessen auszustempeln', 'Dienstgang', 'Arzttermin', 'Technische Störung', 'Sonstige'],
+    'locations' => ['Zentrale Berlin', 'Standort Hamburg', 'Standort Köln'],
+];
+
+/**
+ * The session's user from the database: id, username, name, role, azureOid,
+ * needsOnboarding. Null if the user does not exist (yet - login.php creates it).
+ */
+function bootstrap_session_user(mysqli $conn, array $sessionUser): ?array {
+    $oid = $sessionUser['oid'] ?? ($sessionUser['azure_oid'] ?? null);
+    $hasOnboarding = schema_has_column($conn, 'users', 'onboarding_completed');
+    $sql = "SELECT id, username, display_name, role, azure_oid" . ($hasOnboarding ? ", onboarding_completed" : "") . " FROM users WHERE ";
+    if (!empty($oid)) {
+        $rows = db_fetch_all($conn, $sql . "azure_oid = ? LIMIT 1", 's', [(string)$oid]);
+    } elseif (!empty($sessionUser['id'])) {
+        $rows = db_fetch_all($conn, $sql . "id = ? LIMIT 1", 'i', [(int)$sessionUser['id']]);
+    } else {
+        return null;
+    }
+    if (!$rows) {
+        return null;
+    }
+    $row = $rows[0];
+    return [
+        'id' => (int)$row['id'],
+        'username' => trim((string)($row['username'] ?? '')),
+        'name' => $row['display_name'] ?: ($sessionUser['name'] ?? ''),
+        'role' => $row['role'] ?: 'Mitarbeiter',
+        'azureOid' => $row['azure_oid'],
+        'needsOnboarding' => $hasOnboarding ? !((int)($row['onboarding_completed'] ?? 0)) : false,
+    ];
+}
+
+/**
+ * Assigned locations of a Bereichsleiter/Standortleiter, null for all other roles
+ */
+function bootstrap_leader_locations(mysqli $conn, int $userId, string $role): ?array {
+    if (!in_array($role, BOOTSTRAP_LEADER_ROLES, true)) {
+        return null;
+    }
+    return $userId > 0 ? get_user_assigned_locations($conn, $userId) : [];
+}
+
+/**
+ * Users visible to the caller: Admin all, leaders themselves plus the users of their
+ * locations, everyone else only themselves
+ */
+function bootstrap_users(mysqli $conn, int $userId, string $role): array {
+    $sql = "SELECT id, display_name AS name, role, azure_oid AS azureOid FROM users";
+    if ($role === 'Admin') {
+        return db_fetch_all($conn, $sql);
+    }
+    $sql .= " WHERE id = ?";
+    $types = 'i';
+    $params = [$userId];
+    if ($locations = bootstrap_leader_locations($conn, $userId, $role)) {
+        [$scope, $scopeTypes, $scopeParams] = user_locations_scope($conn, 'id', $locations);
+        $sql .= " OR $scope";
+        $types .= $scopeTypes;
+        $params = array_merge($params, $scopeParams);
+    }
+    return db_fetch_all($conn, $sql, $types, $params);
+}
+
+/**
+ * Master data of all users as map user_id => MasterData
+ */
+function bootstrap_master_data(mysqli $conn): array {
+    $md = [];
+    $rows = db_fetch_all($conn, "SELECT user_id, weekly_hours, workdays, can_work_from_home, flexible_workdays, daily_hours, locations FROM master_data");
+    foreach ($rows as $row) {
+        $md[(int)$row['user_id']] = [
+            'weeklyHours' => (float)$row['weekly_hours'],
+            'workdays' => json_decode($row['workdays'], true) ?: [],
+            'canWorkFromHome' => (bool)$row['can_work_from_home'],
+            'flexibleWorkdays' => (bool)($row['flexible_workdays'] ?? 0),
+            'dailyHours' => json_decode($row['daily_hours'] ?? 'null', true) ?: null,
+            'locations' => json_decode($row['locations'] ?? '[]', true) ?: [],
+        ];
+    }
+    return $md;
+}
+
+/**
+ * Global settings (row id 1), defaults for missing values or a missing row
+ */
+function bootstrap_global_settings(mysqli $conn): array {
+    $rows = db_fetch_all($conn, "SELECT overtime_threshold, change_reasons, locations FROM global_settings WHERE id = 1 LIMIT 1");
+    if (!$rows) {
+        return BOOTSTRAP_SETTINGS_DEFAULTS;
+    }
+    return [
+        'overtimeThreshold' => (float)$rows[0]['overtime_threshold'],
+        'changeReasons' => json_decode((string)$rows[0]['change_reasons'], true) ?: BOOTSTRAP_SETTINGS_DEFAULTS['changeReasons'],
+        'locations' => json_decode((string)$rows[0]['locations'], true) ?: BOOTSTRAP_SETTINGS_DEFAULTS['locations'],
+    ];
+}
+
+/**
+ * Time entries visible to the caller, newest first
+ */
+function bootstrap_time_entries(mysqli $conn, int $userId, string $role): array {
+    $sql = "SELECT te.id, te.user_id AS userId, te.username, te.date, te.start_time AS startTime, te.stop_time AS stopTime, te.location, te.role, te.created_at AS createdAt, te.updated_by AS updatedBy, te.updated_at AS updatedAt
+            FROM time_entries te";
+    $order = " ORDER BY te.date DESC, te.start_time DESC";
+    if ($role === 'Admin') {
+        return db_fetch_all($conn, $sql . $order);
+    }
+    $locations = bootstrap_leader_locations($conn, $userId, $role);
+    if ($locations === null) {
+        return db_fetch_all($conn, $sql . " WHERE te.user_id = ?" . $order, 'i', [$userId]);
+    }
+    if (!$locations) {
+        // Bereichsleiter/Standortleiter ohne zugeordnete Standorte sieht keine Einträge
+        return [];
+    }
+    [$scope, $types, $params] = user_locations_scope($conn, 'te.user_id', $locations);
+    return db_fetch_all($conn, "$sql WHERE $scope" . $order, $types, $params);
+}
+
+/**
+ * Approval requests visible to the caller in the frontend's ApprovalRequest shape.
+ * $state 'pending' lists open requests, 'resolved' the history (with finalStatus,
+ * resolvedAt, resolvedBy). Employees and leaders without locations see their own.
+ */
+function bootstrap_approvals(mysqli $conn, int $userId, string $role, string $username, string $state): array {
+    $resolved = $state === 'resolved';
+    $cols = ['id', 'type', 'original_entry_data', 'new_data', 'reason_data', 'requested_by', 'status'];
+    foreach (['resolved_by', 'resolved_at'] as $col) {
+        if ($resolved && schema_has_column($conn, 'approval_requests', $col)) { $cols[] = $col; }
+    }
+    $orderCol = $resolved ? 'resolved_at' : 'requested_at';
+    $orderCol = schema_has_column($conn, 'approval_requests', $orderCol) ? $orderCol : 'id';
+
+    $select = "SELECT " . implode(', ', $cols) . " FROM approval_requests WHERE " . approval_status_filter($conn, $state);
+    $order = " ORDER BY $orderCol DESC";
+    $locations = bootstrap_leader_locations($conn, $userId, $role);
+    if ($role === 'Admin') {
+        $rows = db_fetch_all($conn, $select . $order);
+    } elseif (!$locations) {
+        $rows = db_fetch_all($conn, $select . " AND requested_by = ?" . $order, 's', [$username]);
+    } elseif (user_locations_available($conn) && schema_has_column($conn, 'approval_requests', 'requested_by_user_id')) {
+        // Indexierter Standort-Filter (Migration 006)
+        [$scope, $types, $params] = user_locations_scope($conn, 'requested_by_user_id', $locations);
+        $rows = db_fetch_all($conn, "$select AND $scope" . $order, $types, $params);
+    } else {
+        // Antragsteller über users/master_data (vor Migration 006)
+        $sql = "SELECT DISTINCT ar." . implode(', ar.', $cols) . "
+                FROM approval_requests ar
+                INNER JOIN users u ON ar.requested_by = u.username
+                INNER JOIN master_data md ON u.id = md.user_id
+                WHERE " . approval_status_filter($conn, $state, 'ar.') . "
+                AND JSON_OVERLAPS(md.locations, CAST(? AS JSON))
+                ORDER BY ar.$orderCol DESC";
+        $rows = db_fetch_all($conn, $sql, 's', [json_encode($locations)]);
+    }
+
+    return array_map(function ($req) use ($resolved) {
+        $orig = json_decode($req['original_entry_data'] ?? '[]', true) ?: [];
+        return [
+            'id' => $req['id'],
+            'type' => $req['type'],
+            'entry' => [
+                'id' => (int)($orig['id'] ?? 0),
+                'userId' => (int)($orig['user_id'] ?? 0),
+                'username' => $orig['username'] ?? '',
+                'date' => $orig['date'] ?? '',
+                'startTime' => $orig['start_time'] ?? '',
+                'stopTime' => $orig['stop_time'] ?? '',
+                'location' => $orig['location'] ?? '',
+                'role' => $orig['role'] ?? 'Mitarbeiter',
+                'createdAt' => $orig['created_at'] ?? '',
+                'updatedBy' => $orig['updated_by'] ?? '',
+                'updatedAt' => $orig['updated_at'] ?? '',
+            ],
+            'newData' => json_decode($req['new_data'] ?? 'null', true),
+            'reasonData' => json_decode($req['reason_data'] ?? 'null', true),
+            'requestedBy' => $req['requested_by'],
+        ] + ($resolved ? [
+            'finalStatus' => $req['status'],
+            'resolvedAt' => $req['resolved_at'] ?? null,
+            'resolvedBy' => $req['resolved_by'] ?? null,
+        ] : [
+            'status' => 'pending',
+        ]);
+    }, $rows);
+}
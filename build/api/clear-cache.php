@@ -1,9 +1,14 @@
 <?php
 /**
  * Cache-Clearing Script
- * Löscht OPcache und gibt Status zurück
+ * Invalidiert geänderte Skripte im OPcache (opcache-sync.php) und gibt Status zurück.
+ * ?full=1 erzwingt opcache_reset() (nur nötig, wenn der Cache inkonsistent ist).
  */
 
+define('API_GUARD', true);
+require_once __DIR__ . '/schema-capabilities.php';
+require_once __DIR__ . '/opcache-sync.php';
+
 header('Content-Type: application/json');
 
 $result = [
@@ -11,6 +16,7 @@ $result = [
     'opcache' => [
         'enabled' => function_exists('opcache_get_status'),
         'cleared' => false,
+        'mode' => 'selective',
     ],
     'file_cache' => [
         'index_html_exists' => file_exists(__DIR__ . '/../dist/index.html'),
@@ -20,11 +26,20 @@ $result = [
     ]
 ];
 
-// Clear OPcache if available
-if (function_exists('opcache_reset')) {
+// Only changed files by default; a full reset makes every script recompile at once
+if (!empty($_GET['full']) && function_exists('opcache_reset')) {
+    $result['opcache']['mode'] = 'full';
     $result['opcache']['cleared'] = opcache_reset();
+} else {
+    $sync = opcache_sync_changed(dirname(__DIR__));
+    $result['opcache']['cleared'] = $sync['available'];
+    $result['opcache']['sync'] = $sync;
 }
 
+// Clear cached schema metadata (schema-capabilities.php)
+schema_capabilities_invalidate();
+$result['schema_capabilities_cleared'] = true;
+
 // Clear stat cache
 clearstatcache(true);
 $result['stat_cache_cleared'] = true;
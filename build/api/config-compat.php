@@ -21,10 +21,13 @@ if (!class_exists('Config')) {
                     'name' => getenv('DB_NAME') ?: ($_ENV['DB_NAME'] ?? (defined('DB_NAME') ? DB_NAME : '')),
                     'charset' => getenv('DB_CHARSET') ?: 'utf8mb4',
                     'timeout' => (int)(getenv('DB_TIMEOUT') ?: 30),
+                    'persistent' => filter_var(getenv('DB_PERSISTENT') ?: ($_ENV['DB_PERSISTENT'] ?? false), FILTER_VALIDATE_BOOLEAN),
                 ],
                 'app' => [
                     'env' => getenv('APP_ENV') ?: ($_ENV['APP_ENV'] ?? 'production'),
                     'debug' => (bool)(getenv('APP_DEBUG') ?: ($_ENV['APP_DEBUG'] ?? false)),
+                    'trace_sample_rate' => (float)(getenv('TRACE_SAMPLE_RATE') ?: ($_ENV['TRACE_SAMPLE_RATE'] ?? 0)),
+                    'response_compression' => strtolower((string)(getenv('RESPONSE_COMPRESSION') ?: ($_ENV['RESPONSE_COMPRESSION'] ?? 'on'))) !== 'off',
                 ],
             ];
             self::$loaded = true;
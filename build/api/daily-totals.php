@@ -0,0 +1,114 @@
+<?php
+/**
+ * Daily Totals - per user and day aggregates of time_entries (migration 007)
+ *
+ * daily_totals holds what src/utils/aggregate.ts used to compute in the browser
+ * from every raw segment: worked seconds, pause seconds, first start, last stop
+ * and the number of segments. Every write to time_entries refreshes the affected
+ * day by re-aggregating that day's segments (an index range on user_id, date).
+ * Without the migration all calls are no-ops.
+ *
+ * Usage:
+ *   $day = daily_totals_entry_day($conn, $entryId);           // before UPDATE/DELETE
+ *   ... write time_entries ...
+ *   if ($day && !daily_totals_refresh($conn, $day[0], $day[1])) { throw ... }
+ */
+
+if (!defined('API_GUARD')) {
+    die('Direct access not permitted');
+}
+
+require_once __DIR__ . '/schema-capabilities.php';
+require_once __DIR__ . '/user-locations.php';
+
+function daily_totals_available(mysqli $conn): bool {
+    return schema_has_column($conn, 'daily_totals', 'total_seconds');
+}
+
+/**
+ * Whose totals the caller may read (summary and export use the same rule):
+ * ['all' => true] for Admin, ['locations' => [...]] for Bereichsleiter/Standortleiter
+ * (no assigned location: nobody), ['userId' => id] for everyone else.
+ */
+function daily_totals_scope(string $role, int $userId, array $assignedLocations): array {
+    if ($role === 'Admin') {
+        return ['all' => true];
+    }
+    if ($role === 'Bereichsleiter' || $role === 'Standortleiter') {
+        return ['locations' => array_values($assignedLocations)];
+    }
+    return ['userId' => $userId];
+}
+
+/**
+ * WHERE fragment on daily_totals dt for a daily_totals_scope(): [sql, types, params], null for all
+ */
+function daily_totals_scope_sql(mysqli $conn, array $scope): ?array {
+    if (isset($scope['userId'])) {
+        return ['dt.user_id = ?', 'i', [(int)$scope['userId']]];
+    }
+    if (isset($scope['locations'])) {
+        return $scope['locations'] ? user_locations_scope($conn, 'dt.user_id', $scope['locations']) : ['1=0', '', []];
+    }
+    return null;
+}
+
+/**
+ * [user_id, date] of an entry (null if it does not exist)
+ */
+function daily_totals_entry_day(mysqli $conn, int $entryId): ?array {
+    $day = null;
+    if ($st = $conn->prepare("SELECT user_id, date FROM time_entries WHERE id = ? LIMIT 1")) {
+        $st->bind_param('i', $entryId);
+        if ($st->execute()) {
+            $st->bind_result($uid, $date);
+            if ($st->fetch()) { $day = [(int)$uid, (string)$date]; }
+        }
+        $st->close();
+    }
+    return $day;
+}
+
+/**
+ * Re-aggregate one user's day (same rules as aggregate.ts: stop < start crosses
+ * midnight, running segments count 0, pauses are positive gaps between segments).
+ * Days without segments are removed. Returns false on a database error.
+ */
+function daily_totals_refresh(mysqli $conn, int $userId, string $date): bool {
+    if (!daily_totals_available($conn)) {
+        return true;
+    }
+    $sql = "INSERT INTO daily_totals (user_id, date, total_seconds, pause_seconds, first_start, last_stop, segment_count)
+            SELECT ?, ?, COALESCE(SUM(seg.dur), 0), COALESCE(SUM(seg.gap), 0), MIN(seg.start_time),
+                   MAX(IF(seg.rn_desc = 1, seg.stop_time, NULL)), COUNT(*)
+            FROM (
+              SELECT start_time, stop_time,
+                     IF(stop_time IS NULL, 0, MOD(TIME_TO_SEC(stop_time) - TIME_TO_SEC(start_time) + 86400, 86400)) AS dur,
+                     IF(stop_time IS NULL, 0, GREATEST(0, TIME_TO_SEC(LEAD(start_time) OVER (ORDER BY start_time, id))
+                         - TIME_TO_SEC(stop_time) - IF(stop_time < start_time, 86400, 0))) AS gap,
+                     ROW_NUMBER() OVER (ORDER BY start_time DESC, id DESC) AS rn_desc
+              FROM time_entries
+              WHERE user_id = ? AND date = ?
+            ) seg
+            ON DUPLICATE KEY UPDATE total_seconds = VALUES(total_seconds), pause_seconds = VALUES(pause_seconds),
+                first_start = VALUES(first_start), last_stop = VALUES(last_stop), segment_count = VALUES(segment_count)";
+    $st = $conn->prepare($sql);
+    if (!$st) {
+        return false;
+    }
+    $st->bind_param('isis', $userId, $date, $userId, $date);
+    $ok = $st->execute();
+    $st->close();
+    if (!$ok) {
+        return false;
+    }
+
+    $st = $conn->prepare("DELETE FROM daily_totals WHERE user_id = ? AND date = ? AND segment_count = 0");
+    if (!$st) {
+        return false;
+    }
+    $st->bind_param('is', $userId, $date);
+    $ok = $st->execute();
+    $st->close();
+    return $ok;
+}
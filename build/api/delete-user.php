@@ -12,10 +12,8 @@
 
 define('API_GUARD', true);
 require_once __DIR__ . '/error-handler.php';
-require_once __DIR__ . '/security-middleware.php';
-require_once __DIR__ . '/auth_helpers.php';
-require_once __DIR__ . '/csrf-middleware.php';
-require_once __DIR__ . '/DatabaseConnection.php';
+require_once __DIR__ . '/api-bootstrap.php';
+require_once __DIR__ . '/identity.php';
 
 initialize_api();
 initSecurityMiddleware();
@@ -39,8 +37,11 @@ if (!$csrfOk) {
 try {
     // Session und User prüfen
     $sessionUser = verify_session_and_get_user();
-    $currentUserId = $sessionUser['id'] ?? null;
-    $userRole = $sessionUser['role'] ?? '';
+    $conn = DatabaseConnection::getInstance()->getConnection();
+    // Rolle aus der DB (identity.php), nicht aus dem Login-Snapshot der Session
+    $me = identity_resolve($conn, $sessionUser);
+    $currentUserId = $me['id'] ?? null;
+    $userRole = $me['role'] ?? '';
 
     if (!$currentUserId) {
         http_response_code(401);
@@ -72,7 +73,6 @@ try {
         exit;
     }
 
-    $conn = DatabaseConnection::getInstance()->getConnection();
 
     // Prüfe ob User existiert
     $stmt = $conn->prepare("SELECT id, username, display_name, role FROM users WHERE id = ? LIMIT 1");
@@ -128,6 +128,7 @@ try {
 
         // Commit Transaktion
         $conn->commit();
+        identity_invalidate();
 
         echo json_encode([
             'success' => true,
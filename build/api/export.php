@@ -0,0 +1,114 @@
+<?php
+/**
+ * Export API - Arbeitszeiten als CSV (Stream) oder PDF (Job)
+ *
+ * GET  ?format=csv&from=&to=&location=&userId=   streamt die Tagessummen als CSV
+ * POST {format: 'pdf', from, to, location, userId} legt einen PDF-Job an (202, jobId)
+ * GET  ?job=<id>                                   Job-Status (queued | running | done | failed)
+ * GET  ?job=<id>&download=1                        fertiges PDF herunterladen
+ *
+ * Rollen wie time-entries.php?action=summary: Admin alle, Bereichsleiter/Standortleiter
+ * ihre zugeordneten Standorte, alle anderen nur sich selbst.
+ */
+define('API_GUARD', true);
+
+require_once __DIR__ . '/api-bootstrap.php';
+require_once __DIR__ . '/time-export.php';
+require_once __DIR__ . '/identity.php';
+
+initialize_api();
+initSecurityMiddleware();
+
+$method = $_SERVER['REQUEST_METHOD'] ?? 'GET';
+if (!in_array($method, ['GET', 'POST'], true)) {
+    http_response_code(405);
+    header('Allow: GET, POST');
+    header('Content-Type: application/json; charset=utf-8');
+    echo json_encode(['error' => 'Method not allowed']);
+    exit;
+}
+
+$sessionUser = verify_session_and_get_user();
+// Lange Exporte sollen andere Requests derselben Session nicht blockieren
+release_session_lock();
+
+if ($method === 'POST' && !validateCsrfToken()) {
+    $host = $_SERVER['HTTP_HOST'] ?? '';
+    $refHost = parse_url($_SERVER['HTTP_REFERER'] ?? '', PHP_URL_HOST);
+    if (!(($refHost === $host) || empty($refHost))) {
+        send_response(403, ['error' => 'CSRF_TOKEN_INVALID', 'message' => 'Invalid or missing CSRF token.']);
+    }
+}
+
+$conn = DatabaseConnection::getInstance()->getConnection();
+if (!daily_totals_available($conn)) {
+    send_response(501, ['error' => 'NOT_AVAILABLE', 'message' => 'daily_totals fehlt (migrations/007_daily_totals.sql).']);
+}
+
+// Id und Rolle aus identity.php (Session-Cache, Rollenänderungen greifen sofort)
+$me = identity_resolve($conn, $sessionUser);
+if (!$me) {
+    send_response(404, ['message' => 'User not found']);
+}
+$userId = $me['id'];
+$role = $me['role'];
+
+// PDF-Job: Status / Download
+if ($method === 'GET' && isset($_GET['job'])) {
+    $job = time_export_job_load((string)$_GET['job']);
+    if (!$job || (int)$job['owner'] !== $userId) {
+        send_response(404, ['message' => 'Export nicht gefunden']);
+    }
+    if (empty($_GET['download'])) {
+        send_response(200, ['jobId' => $job['id'], 'status' => $job['status'], 'error' => $job['error'] ?? null]);
+    }
+    $file = time_export_job_file($job['id'], 'pdf');
+    if ($job['status'] !== 'done' || !is_file($file)) {
+        send_response(409, ['message' => 'Export noch nicht fertig', 'status' => $job['status']]);
+    }
+    while (ob_get_level() > 0) { ob_end_clean(); }
+    header('Content-Type: application/pdf');
+    header('Content-Disposition: attachment; filename="arbeitszeiten_export_' . date('Y-m-d') . '.pdf"');
+    header('Content-Length: ' . filesize($file));
+    header('Cache-Control: no-store');
+    readfile($file);
+    exit;
+}
+
+$input = $method === 'POST' ? (json_decode(file_get_contents('php://input'), true) ?: []) : $_GET;
+$format = strtolower((string)($input['format'] ?? 'csv'));
+$filter = time_export_filter($input);
+$scope = time_export_scope($conn, $userId, $role, $filter);
+
+if ($format === 'csv' && $method === 'GET') {
+    @set_time_limit(0);
+    try {
+        time_export_stream_csv(time_export_rows($conn, $filter, $scope), 'arbeitszeiten_export_' . date('Y-m-d') . '.csv');
+    } catch (Throwable $e) {
+        // Header sind ggf. schon gesendet - nur noch protokollieren
+        error_log('export_csv_failed: ' . $e->getMessage());
+    }
+    exit;
+}
+
+if ($format === 'pdf' && $method === 'POST') {
+    try {
+        $job = time_export_job_create($userId, $filter, $scope);
+    } catch (Throwable $e) {
+        send_response(500, ['message' => 'Export konnte nicht angelegt werden']);
+    }
+    // Antwort sofort senden und den Job danach im selben Prozess rendern (PHP-FPM);
+    // ohne fastcgi_finish_request übernimmt scripts/export-worker.php (Cron)
+    while (ob_get_level() > 0) { ob_end_clean(); }
+    http_response_code(202);
+    header('Content-Type: application/json; charset=utf-8');
+    echo json_encode(['jobId' => $job['id'], 'status' => $job['status']]);
+    if (function_exists('fastcgi_finish_request')) {
+        fastcgi_finish_request();
+        @set_time_limit(0);
+        time_export_job_run($conn, $job['id']);
+    }
+    exit;
+}
+
+send_response(400, ['message' => 'Unbekanntes Format (GET format=csv, POST format=pdf)']);
@@ -0,0 +1,103 @@
+<?php
+/**
+ * HTTP Cache - ETag / If-None-Match for read endpoints (migration 008)
+ *
+ * data_versions holds one counter per table, bumped by triggers on every write.
+ * The ETag of a response is derived from the counters of the tables it is built
+ * from (plus a variant for role-filtered responses), so a revalidation costs one
+ * primary-key lookup instead of loading and serializing the data. If the client
+ * already has the current version the request ends with 304 Not Modified.
+ * Without the migration no ETag is sent and responses are built as before.
+ *
+ * Usage:
+ *   http_cache_conditional($conn, ['global_settings']);                 // exits with 304
+ *   http_cache_conditional($conn, ['users', 'master_data'], "$role:$userId");
+ *   echo json_encode($data);
+ */
+
+if (!defined('API_GUARD')) {
+    die('Direct access not permitted');
+}
+
+require_once __DIR__ . '/schema-capabilities.php';
+
+/**
+ * Current versions of the given tables (name => version), null if data_versions is missing.
+ * Tables without a row count as version 0.
+ */
+function data_versions(mysqli $conn, array $names): ?array {
+    if (!$names || !schema_has_column($conn, 'data_versions', 'version')) {
+        return null;
+    }
+    $versions = array_fill_keys($names, 0);
+    $placeholders = implode(',', array_fill(0, count($names), '?'));
+    $st = $conn->prepare("SELECT name, version FROM data_versions WHERE name IN ($placeholders)");
+    if (!$st) {
+        return null;
+    }
+    $st->bind_param(str_repeat('s', count($names)), ...$names);
+    if (!$st->execute()) {
+        $st->close();
+        return null;
+    }
+    $st->bind_result($name, $version);
+    while ($st->fetch()) {
+        $versions[$name] = (int)$version;
+    }
+    $st->close();
+    return $versions;
+}
+
+/**
+ * Weak ETag for the current versions of $tables, null if versions are unavailable.
+ */
+function http_cache_etag(mysqli $conn, array $tables, string $variant = ''): ?string {
+    $versions = data_versions($conn, $tables);
+    if ($versions === null) {
+        return null;
+    }
+    ksort($versions);
+    return 'W/"' . md5(json_encode($versions) . '|' . $variant) . '"';
+}
+
+/**
+ * True if If-None-Match ($ifNoneMatch, default: the request header) contains $etag (weak comparison).
+ */
+function http_cache_matches(string $etag, ?string $ifNoneMatch = null): bool {
+    $header = trim((string)($ifNoneMatch ?? ($_SERVER['HTTP_IF_NONE_MATCH'] ?? '')));
+    if ($header === '') {
+        return false;
+    }
+    if ($header === '*') {
+        return true;
+    }
+    $opaque = preg_replace('/^W\//', '', $etag);
+    foreach (explode(',', $header) as $candidate) {
+        if (preg_replace('/^W\//', '', trim($candidate)) === $opaque) {
+            return true;
+        }
+    }
+    return false;
+}
+
+/**
+ * Send ETag and revalidation headers; answer 304 and exit if the client is current.
+ * Responses stay private (per session) and must be revalidated on every use.
+ */
+function http_cache_conditional(mysqli $conn, array $tables, string $variant = ''): void {
+    $etag = http_cache_etag($conn, $tables, $variant);
+    if ($etag === null) {
+        return;
+    }
+    header_remove('Pragma');
+    header_remove('Expires');
+    header('Cache-Control: private, no-cache');
+    header('ETag: ' . $etag);
+    header('Vary: Cookie', false);
+    if (http_cache_matches($etag)) {
+        while (ob_get_level() > 0) { ob_end_clean(); }
+        http_response_code(304);
+        header_remove('Content-Type');
+        exit;
+    }
+}
@@ -0,0 +1,151 @@
+<?php
+/**
+ * Identity - who is calling: user id, role and assigned locations
+ *
+ * Replaces the per-endpoint role lookups (SELECT role FROM users WHERE azure_oid = ?,
+ * fallback username, separate id lookups). The resolved identity is kept
+ *   1. per request (static)
+ *   2. in the session, for IDENTITY_TTL seconds and only while its version stamp
+ *      matches the global one
+ * so the hot path needs no query. Writers that change roles or location
+ * assignments (users.php, masterdata.php, delete-user.php) call identity_invalidate(),
+ * which bumps the global stamp (APCu, otherwise cache/identity.version) and makes
+ * every session re-resolve on its next request.
+ *
+ * Usage:
+ *   $me = identity_resolve($conn, $sessionUser);   // null if the user does not exist
+ *   $role = identity_role($conn, $sessionUser);    // 'Mitarbeiter' if unknown
+ *   ... UPDATE users SET role = ... ; identity_invalidate();
+ */
+
+if (!defined('API_GUARD')) {
+    die('Direct access not permitted');
+}
+
+require_once __DIR__ . '/DatabaseConnection.php';
+
+const IDENTITY_TTL = 60;
+const IDENTITY_LEADER_ROLES = ['Bereichsleiter', 'Standortleiter'];
+
+function identity_version_key(): string {
+    return 'aze_identity_version_' . md5(__DIR__);
+}
+
+function identity_version_file(): string {
+    return __DIR__ . '/../cache/identity.version';
+}
+
+function identity_apcu_enabled(): bool {
+    return function_exists('apcu_fetch') && filter_var(ini_get('apc.enabled'), FILTER_VALIDATE_BOOLEAN);
+}
+
+/**
+ * Current global version stamp ('0' until the first invalidation)
+ */
+function identity_version(): string {
+    if (identity_apcu_enabled()) {
+        $hit = false;
+        $stamp = apcu_fetch(identity_version_key(), $hit);
+        return $hit ? (string)$stamp : '0';
+    }
+    $stamp = @file_get_contents(identity_version_file());
+    return $stamp === false ? '0' : trim($stamp);
+}
+
+function &identity_memo(): ?array {
+    static $identity = null;
+    return $identity;
+}
+
+/**
+ * Identity of the session's user: ['id' => int, 'role' => string, 'username' => string,
+ * 'locations' => string[]] (locations only for Bereichsleiter/Standortleiter).
+ * Null if the user is not in the database.
+ */
+function identity_resolve(mysqli $conn, array $sessionUser): ?array {
+    $memo = &identity_memo();
+    if ($memo !== null) {
+        return $memo;
+    }
+
+    $oid = (string)($sessionUser['oid'] ?? ($sessionUser['azure_oid'] ?? ''));
+    $version = identity_version();
+    $cached = $_SESSION['identity'] ?? null;
+    if (is_array($cached) && ($cached['oid'] ?? null) === $oid && ($cached['version'] ?? null) === $version
+        && (int)($cached['expires'] ?? 0) > time()) {
+        return $memo = $cached['user'];
+    }
+
+    $user = identity_load($conn, $sessionUser);
+    if ($user === null) {
+        return null;
+    }
+    if (session_status() === PHP_SESSION_ACTIVE) {
+        $_SESSION['identity'] = ['oid' => $oid, 'version' => $version, 'expires' => time() + IDENTITY_TTL, 'user' => $user];
+    }
+    return $memo = $user;
+}
+
+/**
+ * Role of the session's user ('Mitarbeiter' if the user cannot be resolved)
+ */
+function identity_role(mysqli $conn, array $sessionUser): string {
+    $me = identity_resolve($conn, $sessionUser);
+    return $me['role'] ?? 'Mitarbeiter';
+}
+
+/**
+ * Read the identity from the database: by Azure OID, then username, then session id
+ */
+function identity_load(mysqli $conn, array $sessionUser): ?array {
+    $oid = $sessionUser['oid'] ?? ($sessionUser['azure_oid'] ?? null);
+    $username = $sessionUser['username'] ?? null;
+    $lookups = [];
+    if (!empty($oid)) { $lookups[] = ['azure_oid', 's', (string)$oid]; }
+    if (!empty($username)) { $lookups[] = ['username', 's', (string)$username]; }
+    if (!empty($sessionUser['id'])) { $lookups[] = ['id', 'i', (int)$sessionUser['id']]; }
+
+    foreach ($lookups as [$column, $type, $value]) {
+        try {
+            $rows = db_fetch_all($conn, "SELECT id, role, username FROM users WHERE $column = ? LIMIT 1", $type, [$value]);
+        } catch (Throwable $e) {
+            error_log('identity_lookup_failed: ' . $e->getMessage());
+            return null;
+        }
+        if ($rows) {
+            $id = (int)$rows[0]['id'];
+            $role = $rows[0]['role'] ?: 'Mitarbeiter';
+            return [
+                'id' => $id,
+                'role' => $role,
+                'username' => trim((string)($rows[0]['username'] ?? '')),
+                'locations' => in_array($role, IDENTITY_LEADER_ROLES, true) ? get_user_assigned_locations($conn, $id) : [],
+            ];
+        }
+    }
+    return null;
+}
+
+/**
+ * Roles or location assignments changed: every session re-resolves on its next request
+ */
+function identity_invalidate(): void {
+    $memo = &identity_memo();
+    $memo = null;
+    unset($_SESSION['identity']);
+
+    $stamp = bin2hex(random_bytes(8));
+    if (identity_apcu_enabled()) {
+        apcu_store(identity_version_key(), $stamp);
+        return;
+    }
+    $file = identity_version_file();
+    $dir = dirname($file);
+    if (!is_dir($dir) && !@mkdir($dir, 0755, true)) {
+        return;
+    }
+    $tmp = $file . '.' . getmypid() . '.tmp';
+    if (@file_put_contents($tmp, $stamp, LOCK_EX) === false || !@rename($tmp, $file)) {
+        @unlink($tmp);
+    }
+}
@@ -0,0 +1,186 @@
+<?php
+/**
+ * IP Location Index - prefix trie lookup for IP based location detection
+ *
+ * The admin-maintained map cache/ip-location-map.json ({ entries: [{ prefix, location }] })
+ * is compiled into a binary trie (IPv4 and IPv6) and stored as generated PHP file
+ * in build/cache/, so OPcache keeps it in shared memory. A lookup walks at most
+ * 32 (IPv4) / 128 (IPv6) nodes, independent of the number of configured networks.
+ * Overlapping networks resolve like the former linear scan: the entry listed first
+ * wins, not the most specific one.
+ *
+ * Supported prefixes:
+ *   10.49.1.          legacy octet prefix (= 10.49.1.0/24)
+ *   10.49.1.5         single host (= /32)
+ *   10.49.0.0/16      IPv4 CIDR
+ *   2001:db8:10::/48  IPv6 CIDR
+ * IPv4-mapped IPv6 client addresses (::ffff:10.49.1.5) are matched as IPv4.
+ *
+ * Usage:
+ *   $location = ip_location_detect($_SERVER['REMOTE_ADDR'] ?? '');   // 'Home Office' if unknown
+ */
+
+if (!defined('API_GUARD')) {
+    die('Direct access not permitted');
+}
+
+const IP_LOCATION_DEFAULT = 'Home Office';
+const IP_LOCATION_V4_MAPPED = "\0\0\0\0\0\0\0\0\0\0\xff\xff";
+// Bump when the node layout changes, so cached indexes are recompiled
+const IP_LOCATION_INDEX_FORMAT = 2;
+
+function ip_location_map_file(): string {
+    return __DIR__ . '/../cache/ip-location-map.json';
+}
+
+/**
+ * Parse a prefix into [packed network address, prefix length] (null if invalid)
+ */
+function ip_location_parse_prefix(string $prefix): ?array {
+    $prefix = trim($prefix);
+    if (strpos($prefix, '/') !== false) {
+        [$addr, $len] = explode('/', $prefix, 2);
+        $bin = @inet_pton(trim($addr));
+        if ($bin === false || !ctype_digit($len) || (int)$len > strlen($bin) * 8) {
+            return null;
+        }
+        $bits = (int)$len;
+    } elseif (preg_match('/^\d{1,3}(?:\.\d{1,3}){1,3}\.?$/', $prefix)) {
+        $octets = explode('.', rtrim($prefix, '.'));
+        foreach ($octets as $o) {
+            if ((int)$o > 255) { return null; }
+        }
+        $bits = count($octets) * 8;
+        $bin = inet_pton(implode('.', array_pad($octets, 4, '0')));
+    } else {
+        return null;
+    }
+    if (strlen($bin) === 16 && $bits >= 96 && strncmp($bin, IP_LOCATION_V4_MAPPED, 12) === 0) {
+        $bin = substr($bin, 12);
+        $bits -= 96;
+    }
+    return [$bin, $bits];
+}
+
+/**
+ * Compile [{prefix, location}, ...] into tries keyed by address length (4 / 16 bytes).
+ * Nodes are [child0, child1, location, position in $entries]; for duplicate prefixes
+ * the first entry is kept.
+ */
+function ip_location_index_compile(array $entries): array {
+    $index = [4 => [[null, null, null, null]], 16 => [[null, null, null, null]]];
+    foreach (array_values($entries) as $position => $entry) {
+        $parsed = ip_location_parse_prefix((string)($entry['prefix'] ?? ''));
+        $location = trim((string)($entry['location'] ?? ''));
+        if ($parsed === null || $location === '') {
+            continue;
+        }
+        [$bin, $bits] = $parsed;
+        $nodes = &$index[strlen($bin)];
+        $n = 0;
+        for ($i = 0; $i < $bits; $i++) {
+            $bit = (ord($bin[$i >> 3]) >> (7 - ($i & 7))) & 1;
+            if ($nodes[$n][$bit] === null) {
+                $nodes[$n][$bit] = count($nodes);
+                $nodes[] = [null, null, null, null];
+            }
+            $n = $nodes[$n][$bit];
+        }
+        if ($nodes[$n][2] === null) {
+            $nodes[$n][2] = $location;
+            $nodes[$n][3] = $position;
+        }
+        unset($nodes);
+    }
+    return $index;
+}
+
+/**
+ * Location of the first listed network containing $ip; null if there is none
+ */
+function ip_location_lookup(array $index, string $ip): ?string {
+    $bin = @inet_pton(trim($ip));
+    if ($bin === false) {
+        return null;
+    }
+    if (strlen($bin) === 16 && strncmp($bin, IP_LOCATION_V4_MAPPED, 12) === 0) {
+        $bin = substr($bin, 12);
+    }
+    $nodes = $index[strlen($bin)] ?? null;
+    if (!$nodes) {
+        return null;
+    }
+    $found = $nodes[0][2];
+    $position = $nodes[0][3];
+    $n = 0;
+    $bits = strlen($bin) * 8;
+    for ($i = 0; $i < $bits; $i++) {
+        $n = $nodes[$n][(ord($bin[$i >> 3]) >> (7 - ($i & 7))) & 1];
+        if ($n === null) {
+            break;
+        }
+        if ($nodes[$n][2] !== null && ($position === null || $nodes[$n][3] < $position)) {
+            $found = $nodes[$n][2];
+            $position = $nodes[$n][3];
+        }
+    }
+    return $found;
+}
+
+function ip_location_map_entries(): array {
+    $file = ip_location_map_file();
+    if (!is_readable($file)) {
+        return [];
+    }
+    $map = json_decode((string)@file_get_contents($file), true);
+    return (isset($map['entries']) && is_array($map['entries'])) ? $map['entries'] : [];
+}
+
+/**
+ * Compiled index for the admin map followed by $fallback entries (lower priority).
+ * Rebuilt when the map file changes; cached per process and as PHP file in build/cache/.
+ */
+function ip_location_index(array $fallback = []): array {
+    static $loaded = [];
+    $stat = @stat(ip_location_map_file());
+    $version = IP_LOCATION_INDEX_FORMAT . ':' . ($stat ? ($stat['mtime'] . '-' . $stat['size']) : 'none');
+    $key = md5(serialize($fallback));
+    if (isset($loaded[$key]) && $loaded[$key]['version'] === $version) {
+        return $loaded[$key]['index'];
+    }
+
+    $file = __DIR__ . "/../cache/ip-location-index.$key.php";
+    $entry = is_file($file) ? @include $file : null;
+    if (!is_array($entry) || ($entry['version'] ?? null) !== $version) {
+        $entry = [
+            'version' => $version,
+            'index' => ip_location_index_compile(array_merge(ip_location_map_entries(), $fallback)),
+        ];
+        $tmp = $file . '.' . getmypid() . '.tmp';
+        $code = "<?php\n// Generated by ip-location-index.php - do not edit\nreturn " . var_export($entry, true) . ";\n";
+        if (is_dir(dirname($file)) && @file_put_contents($tmp, $code, LOCK_EX) !== false && @rename($tmp, $file)) {
+            if (function_exists('opcache_invalidate')) { @opcache_invalidate($file, true); }
+        } else {
+            @unlink($tmp);
+        }
+    }
+    $loaded[$key] = $entry;
+    return $entry['index'];
+}
+
+/**
+ * Drop compiled indexes (call after writing the map)
+ */
+function ip_location_index_invalidate(): void {
+    foreach (glob(__DIR__ . '/../cache/ip-location-index.*.php') ?: [] as $file) {
+        @unlink($file);
+        if (function_exists('opcache_invalidate')) { @opcache_invalidate($file, true); }
+    }
+}
+
+function ip_location_detect(string $ip, string $default = IP_LOCATION_DEFAULT, array $fallback = []): string {
+    if ($ip === '') {
+        return $default;
+    }
+    return ip_location_lookup(ip_location_index($fallback), $ip) ?? $default;
+}
@@ -1,10 +1,8 @@
 <?php
 define('API_GUARD', true);
 require_once __DIR__ . '/error-handler.php';
-require_once __DIR__ . '/security-middleware.php';
-require_once __DIR__ . '/auth_helpers.php';
-require_once __DIR__ . '/csrf-middleware.php';
-require_once __DIR__ . '/DatabaseConnection.php';
+require_once __DIR__ . '/api-bootstrap.php';
+require_once __DIR__ . '/ip-location-index.php';
 
 initialize_api();
 initSecurityMiddleware();
@@ -71,8 +69,8 @@ if ($method === 'PUT') {
     $prefix = trim((string)($e['prefix'] ?? ''));
     $loc = trim((string)($e['location'] ?? ''));
     if ($prefix === '' || $loc === '') continue;
-    // allow patterns like 10.49.1. or 192.168.0.
-    if (!preg_match('/^\d{1,3}(?:\.\d{1,3}){1,3}\.?$/', $prefix)) continue;
+    // allow patterns like 10.49.1. or 192.168.0. and CIDR (10.49.0.0/16, 2001:db8::/32)
+    if (ip_location_parse_prefix($prefix) === null) continue;
     $san[] = ['prefix'=>$prefix, 'location'=>$loc];
   }
   $save = ['entries'=>$san];
@@ -81,6 +79,7 @@ if ($method === 'PUT') {
     echo json_encode(['message'=>'Speichern fehlgeschlagen']);
     exit;
   }
+  ip_location_index_invalidate();
   // Persistiere: Mische alle Locations in global_settings.locations ein (alphabetisch, einzigartig)
   try {
     $conn = DatabaseConnection::getInstance()->getConnection();
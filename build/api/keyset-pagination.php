@@ -0,0 +1,98 @@
+<?php
+/**
+ * Keyset (cursor) pagination helpers
+ *
+ * Lists are ordered by a unique key, e.g. (date, start_time, id) DESC. Instead of
+ * OFFSET the client passes back an opaque cursor holding the key of the last row,
+ * so every page is an index range scan of `limit` rows - page 1000 costs the same
+ * as page 1.
+ *
+ * Usage:
+ *   $limit  = keyset_limit();                              // ?limit=, default 50, max 500
+ *   $cursor = keyset_cursor(3);                            // ?cursor=, null on first page
+ *   [$where, $params] = keyset_condition(['date', 'start_time', 'id'], $cursor);
+ *   $sql .= " AND $where ORDER BY date DESC, start_time DESC, id DESC LIMIT " . ($limit + 1);
+ *   ...
+ *   [$rows, $next] = keyset_page($rows, $limit, fn($r) => [$r['date'], $r['startTime'], $r['id']]);
+ */
+
+if (!defined('API_GUARD')) {
+    die('Direct access not permitted');
+}
+
+const KEYSET_DEFAULT_LIMIT = 50;
+const KEYSET_MAX_LIMIT = 500;
+
+function keyset_limit(int $default = KEYSET_DEFAULT_LIMIT): int {
+    $limit = isset($_GET['limit']) ? (int)$_GET['limit'] : $default;
+    return max(1, min(KEYSET_MAX_LIMIT, $limit));
+}
+
+function keyset_encode(array $key): string {
+    return rtrim(strtr(base64_encode(json_encode(array_values($key))), '+/', '-_'), '=');
+}
+
+/**
+ * Decode a cursor into exactly $parts scalar values; null if absent or malformed
+ */
+function keyset_decode(string $cursor, int $parts): ?array {
+    $json = base64_decode(strtr($cursor, '-_', '+/'), true);
+    $key = $json !== false ? json_decode($json, true) : null;
+    if (!is_array($key) || count($key) !== $parts) {
+        return null;
+    }
+    foreach ($key as $value) {
+        if (!is_string($value) && !is_int($value)) { return null; }
+    }
+    return array_values($key);
+}
+
+/**
+ * Cursor from the request (?cursor=); answers 400 for a malformed one
+ */
+function keyset_cursor(int $parts): ?array {
+    $raw = (string)($_GET['cursor'] ?? '');
+    if ($raw === '') {
+        return null;
+    }
+    $key = keyset_decode($raw, $parts);
+    if ($key === null) {
+        send_response(400, ['error' => 'INVALID_CURSOR', 'message' => 'Ungültiger Cursor.']);
+    }
+    return $key;
+}
+
+/**
+ * WHERE fragment selecting rows after $key for a DESC ordering on $columns.
+ * The leading "c1 <= ?" keeps it an index range scan.
+ * Returns [sql, params] (params are bound as strings); [ '1=1', [] ] without cursor.
+ */
+function keyset_condition(array $columns, ?array $key): array {
+    if ($key === null) {
+        return ['1=1', []];
+    }
+    $sql = '';
+    $params = [];
+    for ($i = count($columns) - 1; $i >= 0; $i--) {
+        $col = $columns[$i];
+        if ($sql === '') {
+            $sql = "$col < ?";
+            $params = [(string)$key[$i]];
+        } else {
+            $sql = "($col < ? OR ($col = ? AND $sql))";
+            $params = array_merge([(string)$key[$i], (string)$key[$i]], $params);
+        }
+    }
+    return ["({$columns[0]} <= ? AND $sql)", array_merge([(string)$key[0]], $params)];
+}
+
+/**
+ * Trim the limit+1 fetched rows to $limit and build the next cursor (null on the last page)
+ */
+function keyset_page(array $rows, int $limit, callable $keyOf): array {
+    if (count($rows) <= $limit) {
+        return [$rows, null];
+    }
+    $rows = array_slice($rows, 0, $limit);
+    return [$rows, keyset_encode($keyOf($rows[$limit - 1]))];
+}
@@ -18,6 +18,8 @@ require_once __DIR__ . '/security-middleware.php';
 require_once __DIR__ . '/structured-logger.php';
 require_once __DIR__ . '/auth_helpers.php';
 require_once __DIR__ . '/DatabaseConnection.php';
+require_once __DIR__ . '/ip-location-index.php';
+require_once __DIR__ . '/bootstrap-data.php';
 
 // Einheitlicher Security-Bootstrap (CORS, Security Headers, OPTIONS)
 initialize_api();
@@ -232,30 +234,9 @@ try {
         }
     }
 
-    // IP-basierte Standorterkennung
-    $detectedLocation = 'Home Office'; // Default
+    // IP-basierte Standorterkennung (kompilierter Index aus cache/ip-location-map.json, Default: Home Office)
     $clientIP = $_SERVER['REMOTE_ADDR'] ?? '';
-
-    if ($clientIP) {
-        // Load IP-location mapping from cache
-        $ipMapFile = __DIR__ . '/../cache/ip-location-map.json';
-        if (file_exists($ipMapFile) && is_readable($ipMapFile)) {
-            $ipMapData = json_decode(@file_get_contents($ipMapFile), true);
-            if (isset($ipMapData['entries']) && is_array($ipMapData['entries'])) {
-                // Check each IP prefix mapping
-                foreach ($ipMapData['entries'] as $entry) {
-                    $prefix = trim($entry['prefix'] ?? '');
-                    $location = trim($entry['location'] ?? '');
-
-                    if ($prefix && $location && strpos($clientIP, $prefix) === 0) {
-                        // Match found!
-                        $detectedLocation = $location;
-                        break;
-                    }
-                }
-            }
-        }
-    }
+    $detectedLocation = ip_location_detect($clientIP);
 
     $response = [
         'currentUser' => [
@@ -273,304 +254,29 @@ try {
         'approvalRequests' => [],
         'history' => [],
         // Default-Werte; werden unten aus DB überschrieben, falls vorhanden
-        'globalSettings' => [
-            'overtimeThreshold' => 8.0,
-            'changeReasons' => ['Vergessen einzustempeln','Vergessen auszustempeln','Dienstgang','Arzttermin','Technische Störung','Sonstige'],
-            'locations' => ['Zentrale Berlin','Standort Hamburg','Standort Köln']
-        ]
+        'globalSettings' => BOOTSTRAP_SETTINGS_DEFAULTS
     ];
 
-    // Benutzerliste (Security Fix 2025-10-26: Location-based filtering)
-    try {
-        // Admin sieht alle Users
-        // Bereichsleiter und Standortleiter sehen nur Users ihrer zugeordneten Standorte
-        // Mitarbeiter/Honorarkraft sehen nur sich selbst
+    // Teildaten (bootstrap-data.php, Security Fix 2025-10-26: Location-based filtering)
+    // Fehler einer Teilliste führen nicht zu 500, sondern zu leeren Daten
+    $current_user_id = (int)$current_user_id;
+    try { $response['users'] = bootstrap_users($db, $current_user_id, $user_role); }
+    catch (Throwable $e) { logError('load_users_failed', ['msg' => $e->getMessage()]); }
 
-        if ($user_role === 'Admin') {
-            // Alle Users
-            $sql = "SELECT id, display_name AS name, role, azure_oid AS azureOid FROM users";
-            $s = $db->prepare($sql);
-            $s->execute();
-        } else if ($user_role === 'Bereichsleiter' || $user_role === 'Standortleiter') {
-            // Nur Users die einen der zugeordneten Standorte haben
-            $assignedLocations = get_user_assigned_locations($db, $current_user_id);
+    try { $response['masterData'] = bootstrap_master_data($db) ?: new stdClass(); }
+    catch (Throwable $e) { logError('load_masterdata_failed', ['msg' => $e->getMessage()]); }
 
-            if (empty($assignedLocations)) {
-                // Bereichsleiter/Standortleiter ohne zugeordnete Standorte sieht nur sich selbst
-                $sql = "SELECT id, display_name AS name, role, azure_oid AS azureOid FROM users WHERE id = ?";
-                $s = $db->prepare($sql);
-                $s->bind_param('i', $current_user_id);
-                $s->execute();
-            } else {
-                // Users mit zugeordneten Standorten + sich selbst
-                $sql = "SELECT DISTINCT u.id, u.display_name AS name, u.role, u.azure_oid AS azureOid
-                        FROM users u
-                        LEFT JOIN master_data md ON u.id = md.user_id
-                        WHERE u.id = ? OR JSON_OVERLAPS(md.locations, CAST(? AS JSON))";
-                $s = $db->prepare($sql);
-                $locationsJson = json_encode($assignedLocations);
-                $s->bind_param('is', $current_user_id, $locationsJson);
-                $s->execute();
-            }
-        } else {
-            // Mitarbeiter/Honorarkraft sehen nur sich selbst
-            $sql = "SELECT id, display_name AS name, role, azure_oid AS azureOid FROM users WHERE id = ?";
-            $s = $db->prepare($sql);
-            $s->bind_param('i', $current_user_id);
-            $s->execute();
-        }
+    try { $response['globalSettings'] = bootstrap_global_settings($db); }
+    catch (Throwable $e) { logError('load_global_settings_failed', ['msg' => $e->getMessage()]); }
 
-        if ($s) {
-            $r = $s->get_result();
-            $response['users'] = $r ? $r->fetch_all(MYSQLI_ASSOC) : [];
-            $s->close();
-        } else {
-            throw new Exception($db->error);
-        }
-    } catch (Throwable $e) { logError('load_users_failed', ['msg' => $e->getMessage()]); }
-
-    // Masterdaten
-    try {
-        $sql = "SELECT user_id, weekly_hours, workdays, can_work_from_home, flexible_workdays, daily_hours, locations FROM master_data";
-        $s = $db->prepare($sql);
-        if ($s && $s->execute()) {
-            $r = $s->get_result();
-            $md = [];
-            while ($row = $r->fetch_assoc()) {
-                $md[(int)$row['user_id']] = [
-                    'weeklyHours' => (float)$row['weekly_hours'],
-                    'workdays' => json_decode($row['workdays'], true) ?: [],
-                    'canWorkFromHome' => (bool)$row['can_work_from_home'],
-                    'flexibleWorkdays' => (bool)($row['flexible_workdays'] ?? 0),
-                    'dailyHours' => json_decode($row['daily_hours'] ?? 'null', true) ?: null,
-                    'locations' => json_decode($row['locations'] ?? '[]', true) ?: [],
-                ];
-            }
-            $response['masterData'] = $md;
-            $s->close();
-        } else {
-            throw new Exception($db->error ?: ($s ? $s->error : 'prepare failed'));
-        }
-    } catch (Throwable $e) { logError('load_masterdata_failed', ['msg' => $e->getMessage()]); }
-
-    // Globale Einstellungen (falls in DB vorhanden)
-    try {
-        $sql = "SELECT overtime_threshold, change_reasons, locations FROM global_settings WHERE id = 1";
-        $s = $db->prepare($sql);
-        if ($s && $s->execute()) {
-            $s->bind_result($thr, $reasons, $locations);
-            if ($s->fetch()) {
-                $response['globalSettings'] = [
-                    'overtimeThreshold' => (float)$thr,
-                    'changeReasons' => json_decode((string)$reasons, true) ?: $response['globalSettings']['changeReasons'],
-                    'locations' => json_decode((string)$locations, true) ?: $response['globalSettings']['locations']
-                ];
-            }
-            $s->close();
-        } else {
-            throw new Exception($db->error ?: ($s ? $s->error : 'prepare failed'));
-        }
-    } catch (Throwable $e) { logError('load_global_settings_failed', ['msg' => $e->getMessage()]); }
-
-    // Zeiteinträge (Security Fix 2025-10-26: Location-based filtering)
-    try {
-        // Admin sieht alle Einträge
-        // Bereichsleiter und Standortleiter sehen nur Einträge von Users ihrer zugeordneten Standorte
-        // Mitarbeiter/Honorarkraft sehen nur eigene Einträge
+    try { $response['timeEntries'] = bootstrap_time_entries($db, $current_user_id, $user_role); }
+    catch (Throwable $e) { logError('load_time_entries_failed', ['msg' => $e->getMessage()]); }
 
-        if ($user_role === 'Admin') {
-            // Alle Einträge
-            $sql = "SELECT id, user_id AS userId, username, date, start_time AS startTime, stop_time AS stopTime, location, role, created_at AS createdAt, updated_by AS updatedBy, updated_at AS updatedAt FROM time_entries ORDER BY date DESC, start_time DESC";
-            $s = $db->prepare($sql);
-            $s->execute();
-        } else if ($user_role === 'Bereichsleiter' || $user_role === 'Standortleiter') {
-            // Nur Einträge von Users die einen der zugeordneten Standorte haben
-            $assignedLocations = get_user_assigned_locations($db, $current_user_id);
+    try { $response['approvalRequests'] = bootstrap_approvals($db, $current_user_id, $user_role, $username, 'pending'); }
+    catch (Throwable $e) { logError('load_approvals_failed', ['msg' => $e->getMessage()]); }
 
-            if (empty($assignedLocations)) {
-                // Bereichsleiter/Standortleiter ohne zugeordnete Standorte sieht keine Einträge
-                $response['timeEntries'] = [];
-            } else {
-                // Baue SQL mit IN-Clause für zugeordnete Standorte
-                $placeholders = implode(',', array_fill(0, count($assignedLocations), '?'));
-                $sql = "SELECT DISTINCT te.id, te.user_id AS userId, te.username, te.date, te.start_time AS startTime, te.stop_time AS stopTime, te.location, te.role, te.created_at AS createdAt, te.updated_by AS updatedBy, te.updated_at AS updatedAt
-                        FROM time_entries te
-                        INNER JOIN master_data md ON te.user_id = md.user_id
-                        WHERE JSON_OVERLAPS(md.locations, CAST(? AS JSON))
-                        ORDER BY te.date DESC, te.start_time DESC";
-                $s = $db->prepare($sql);
-                $locationsJson = json_encode($assignedLocations);
-                $s->bind_param('s', $locationsJson);
-                $s->execute();
-            }
-        } else {
-            // Mitarbeiter/Honorarkraft sehen nur eigene Einträge
-            $sql = "SELECT id, user_id AS userId, username, date, start_time AS startTime, stop_time AS stopTime, location, role, created_at AS createdAt, updated_by AS updatedBy, updated_at AS updatedAt FROM time_entries WHERE user_id = ? ORDER BY date DESC, start_time DESC";
-            $s = $db->prepare($sql);
-            $s->bind_param('i', $current_user_id);
-            $s->execute();
-        }
-
-        if (isset($s)) {
-            $r = $s->get_result();
-            $response['timeEntries'] = $r ? $r->fetch_all(MYSQLI_ASSOC) : [];
-            $s->close();
-        }
-    } catch (Throwable $e) { logError('load_time_entries_failed', ['msg' => $e->getMessage()]); }
-
-    // Pending Genehmigungen (rollenbasiert), robustes ORDER BY ohne created_at
-    try {
-        // Spalten in approval_requests ermitteln
-        $cols = [];
-        if ($res = $db->query("SHOW COLUMNS FROM approval_requests")) {
-            while ($rr = $res->fetch_assoc()) { $cols[strtolower($rr['Field'])] = true; }
-            $res->close();
-        }
-        $hasRequestedAt = !empty($cols['requested_at']);
-        $orderBy = $hasRequestedAt ? 'ORDER BY requested_at DESC' : 'ORDER BY id DESC';
-
-        // Security Fix 2025-10-26: Use assigned locations instead of IP-detected location
-        $role = $user_role;
-        if ($role === 'Honorarkraft' || $role === 'Mitarbeiter') {
-            $sql = "SELECT id, type, original_entry_data, new_data, reason_data, requested_by, status FROM approval_requests WHERE (status IS NULL OR LOWER(status)='pending') AND requested_by = ? $orderBy";
-            $s = $db->prepare($sql);
-            $s->bind_param('s', $username);
-            $s->execute();
-        } else if ($role === 'Bereichsleiter' || $role === 'Standortleiter') {
-            // Use assigned locations from master_data instead of IP-detected location
-            $assignedLocations = get_user_assigned_locations($db, $current_user_id);
-
-            if (empty($assignedLocations)) {
-                // Bereichsleiter/Standortleiter ohne zugeordnete Standorte sieht nur eigene Requests
-                $sql = "SELECT id, type, original_entry_data, new_data, reason_data, requested_by, status FROM approval_requests WHERE (status IS NULL OR LOWER(status)='pending') AND requested_by = ? $orderBy";
-                $s = $db->prepare($sql);
-                $s->bind_param('s', $username);
-                $s->execute();
-            } else {
-                // Filter by users with assigned locations (check requested_by user's locations)
-                $sql = "SELECT DISTINCT ar.id, ar.type, ar.original_entry_data, ar.new_data, ar.reason_data, ar.requested_by, ar.status
-                        FROM approval_requests ar
-                        INNER JOIN users u ON ar.requested_by = u.username
-                        INNER JOIN master_data md ON u.id = md.user_id
-                        WHERE (ar.status IS NULL OR LOWER(ar.status)='pending')
-                        AND JSON_OVERLAPS(md.locations, CAST(? AS JSON))
-                        $orderBy";
-                $s = $db->prepare($sql);
-                $locationsJson = json_encode($assignedLocations);
-                $s->bind_param('s', $locationsJson);
-                $s->execute();
-            }
-        } else {
-            // Admin sieht alle
-            $sql = "SELECT id, type, original_entry_data, new_data, reason_data, requested_by, status FROM approval_requests WHERE (status IS NULL OR LOWER(status)='pending') $orderBy";
-            $s = $db->prepare($sql);
-            $s->execute();
-        }
-        $r = $s->get_result();
-        $rows = $r ? $r->fetch_all(MYSQLI_ASSOC) : [];
-        $s->close();
-        $response['approvalRequests'] = array_map(function($req){
-            $orig = json_decode($req['original_entry_data'] ?? '[]', true) ?: [];
-            return [
-                'id' => $req['id'],
-                'type' => $req['type'],
-                'entry' => [
-                    'id' => (int)($orig['id'] ?? 0),
-                    'userId' => (int)($orig['user_id'] ?? 0),
-                    'username' => $orig['username'] ?? '',
-                    'date' => $orig['date'] ?? '',
-                    'startTime' => $orig['start_time'] ?? '',
-                    'stopTime' => $orig['stop_time'] ?? '',
-                    'location' => $orig['location'] ?? '',
-                    'role' => $orig['role'] ?? 'Mitarbeiter',
-                    'createdAt' => $orig['created_at'] ?? '',
-                    'updatedBy' => $orig['updated_by'] ?? '',
-                    'updatedAt' => $orig['updated_at'] ?? '',
-                ],
-                'newData' => json_decode($req['new_data'] ?? 'null', true),
-                'reasonData' => json_decode($req['reason_data'] ?? 'null', true),
-                'requestedBy' => $req['requested_by'],
-                'status' => 'pending',
-            ];
-        }, $rows);
-    } catch (Throwable $e) { logError('load_approvals_failed', ['msg' => $e->getMessage()]); }
-
-    // Historie – robustes ORDER BY ohne created_at
-    try {
-        $cols2 = [];
-        if ($res2 = $db->query("SHOW COLUMNS FROM approval_requests")) {
-            while ($rr2 = $res2->fetch_assoc()) { $cols2[strtolower($rr2['Field'])] = true; }
-            $res2->close();
-        }
-        $hasResolvedAt = !empty($cols2['resolved_at']);
-        $orderByHist = $hasResolvedAt ? 'ORDER BY resolved_at DESC' : 'ORDER BY id DESC';
-
-        // Security Fix 2025-10-26: Use assigned locations instead of IP-detected location
-        if ($user_role === 'Honorarkraft' || $user_role === 'Mitarbeiter') {
-            $sql = "SELECT * FROM approval_requests WHERE status IS NOT NULL AND LOWER(status) != 'pending' AND requested_by = ? $orderByHist";
-            $s = $db->prepare($sql);
-            $s->bind_param('s', $username);
-            $s->execute();
-        } else if ($user_role === 'Bereichsleiter' || $user_role === 'Standortleiter') {
-            // Use assigned locations from master_data instead of IP-detected location
-            $assignedLocations = get_user_assigned_locations($db, $current_user_id);
-
-            if (empty($assignedLocations)) {
-                // Bereichsleiter/Standortleiter ohne zugeordnete Standorte sieht nur eigene History
-                $sql = "SELECT * FROM approval_requests WHERE status IS NOT NULL AND LOWER(status) != 'pending' AND requested_by = ? $orderByHist";
-                $s = $db->prepare($sql);
-                $s->bind_param('s', $username);
-                $s->execute();
-            } else {
-                // Filter by users with assigned locations (check requested_by user's locations)
-                $sql = "SELECT DISTINCT ar.*
-                        FROM approval_requests ar
-                        INNER JOIN users u ON ar.requested_by = u.username
-                        INNER JOIN master_data md ON u.id = md.user_id
-                        WHERE status IS NOT NULL AND LOWER(status) != 'pending'
-                        AND JSON_OVERLAPS(md.locations, CAST(? AS JSON))
-                        $orderByHist";
-                $s = $db->prepare($sql);
-                $locationsJson = json_encode($assignedLocations);
-                $s->bind_param('s', $locationsJson);
-                $s->execute();
-            }
-        } else {
-            // Admin sieht alle
-            $sql = "SELECT * FROM approval_requests WHERE status IS NOT NULL AND LOWER(status) != 'pending' $orderByHist";
-            $s = $db->prepare($sql);
-            $s->execute();
-        }
-        $r = $s->get_result();
-        $hist = $r ? $r->fetch_all(MYSQLI_ASSOC) : [];
-        $s->close();
-        $response['history'] = array_map(function($row){
-            $orig = json_decode($row['original_entry_data'] ?? '[]', true) ?: [];
-            return [
-                'id' => $row['id'],
-                'type' => $row['type'],
-                'entry' => [
-                    'id' => (int)($orig['id'] ?? 0),
-                    'userId' => (int)($orig['user_id'] ?? 0),
-                    'username' => $orig['username'] ?? '',
-                    'date' => $orig['date'] ?? '',
-                    'startTime' => $orig['start_time'] ?? '',
-                    'stopTime' => $orig['stop_time'] ?? '',
-                    'location' => $orig['location'] ?? '',
-                    'role' => $orig['role'] ?? 'Mitarbeiter',
-                    'createdAt' => $orig['created_at'] ?? '',
-                    'updatedBy' => $orig['updated_by'] ?? '',
-                    'updatedAt' => $orig['updated_at'] ?? '',
-                ],
-                'newData' => json_decode($row['new_data'] ?? 'null', true),
-                'reasonData' => json_decode($row['reason_data'] ?? 'null', true),
-                'requestedBy' => $row['requested_by'],
-                'finalStatus' => $row['status'],
-                'resolvedAt' => $row['resolved_at'],
-                'resolvedBy' => $row['resolved_by'],
-            ];
-        }, $hist);
-    } catch (Throwable $e) { logError('load_history_failed', ['msg' => $e->getMessage()]); }
+    try { $response['history'] = bootstrap_approvals($db, $current_user_id, $user_role, $username, 'resolved'); }
+    catch (Throwable $e) { logError('load_history_failed', ['msg' => $e->getMessage()]); }
 
     echo json_encode($response);
     exit();
@@ -47,6 +47,8 @@ $sessionUser = $_SESSION['user'];
 try {
   $rootConfig = __DIR__ . '/../config.php';
   require_once $rootConfig;
+  if (!defined('API_GUARD')) { define('API_GUARD', true); }
+  require_once __DIR__ . '/ip-location-index.php';
   $db_host = Config::get('db.host');
   $db_name = Config::get('db.name');
   $db_user = Config::get('db.username') ?: (Config::get('db.user'));
@@ -149,27 +151,10 @@ $mysqli->set_charset('utf8mb4');
     '10.49.115.' => 'BER BAD',
     '10.49.163.' => 'HAM SPA 2. OG',
   ];
-  // Optional: Overrides aus cache/ip-location-map.json (vom Admin pflegbar)
-  $overrideFile = __DIR__ . '/../cache/ip-location-map.json';
-  if (is_readable($overrideFile)) {
-    $ovr = json_decode(@file_get_contents($overrideFile), true);
-    if (isset($ovr['entries']) && is_array($ovr['entries'])) {
-      // Admin-Overrides sollen Vorrang haben: vorn einfügen
-      $ovrMap = [];
-      foreach ($ovr['entries'] as $e) {
-        $p = (string)($e['prefix'] ?? ''); $l = (string)($e['location'] ?? '');
-        if ($p !== '' && $l !== '') { $ovrMap[$p] = $l; }
-      }
-      $ipMap = array_merge($ovrMap, $ipMap);
-    }
-  }
-
-  $detectedLocation = '';
-  foreach ($ipMap as $prefix => $locName) {
-    if ($clientIp && strpos($clientIp, $prefix) === 0) { $detectedLocation = $locName; break; }
-  }
-  // Default: Home Office, wenn keine Zuordnung gefunden wurde
-  if ($detectedLocation === '') { $detectedLocation = 'Home Office'; }
+  // Overrides aus cache/ip-location-map.json (vom Admin pflegbar) haben Vorrang vor dem Default-Hardcode
+  $fallbackEntries = [];
+  foreach ($ipMap as $prefix => $locName) { $fallbackEntries[] = ['prefix' => $prefix, 'location' => $locName]; }
+  $detectedLocation = ip_location_detect((string)$clientIp, 'Home Office', $fallbackEntries);
   // in Session für serverseitige Filter (z. B. Standortleiter) bereitstellen
   $_SESSION['user']['location'] = $detectedLocation;
 
@@ -1,28 +1,44 @@
 <?php
 /**
  * Master Data API
- * Supports: PUT to create/update per-user master data
+ * Supports: GET for all master data (map userId => MasterData, ETag / 304),
+ *           PUT to create/update per-user master data
  */
 define('API_GUARD', true);
 
-require_once __DIR__ . '/security-middleware.php';
-require_once __DIR__ . '/auth_helpers.php';
-require_once __DIR__ . '/csrf-middleware.php';
-require_once __DIR__ . '/DatabaseConnection.php';
+require_once __DIR__ . '/api-bootstrap.php';
 require_once __DIR__ . '/InputValidationService.php';
+require_once __DIR__ . '/user-locations.php';
+require_once __DIR__ . '/http-cache.php';
+require_once __DIR__ . '/bootstrap-data.php';
+require_once __DIR__ . '/identity.php';
 
 initialize_api();
 initSecurityMiddleware();
 
-// Only allow PUT
-if (($_SERVER['REQUEST_METHOD'] ?? '') !== 'PUT') {
+$method = $_SERVER['REQUEST_METHOD'] ?? '';
+if (!in_array($method, ['GET', 'PUT'], true)) {
   http_response_code(405);
-  header('Allow: PUT');
+  header('Allow: GET, PUT');
   header('Content-Type: application/json; charset=utf-8');
   echo json_encode(['error'=>'Method not allowed']);
   exit;
 }
 
+// GET: same shape as masterData in login.php
+if ($method === 'GET') {
+  verify_session_and_get_user(true);
+  $conn = DatabaseConnection::getInstance()->getConnection();
+  http_cache_conditional($conn, ['master_data']);
+
+  try {
+    $md = bootstrap_master_data($conn);
+  } catch (Throwable $e) {
+    send_response(500, ['message' => 'DATABASE_ERROR']);
+  }
+  send_response(200, $md ?: new stdClass());
+}
+
 // Require CSRF for PUT; relax only for same-origin + valid session (consistent with other endpoints)
 $csrfOk = function_exists('validateCsrfToken') ? validateCsrfToken() : true;
 if (!$csrfOk) {
@@ -40,29 +56,9 @@ if (!$csrfOk) {
 $db = DatabaseConnection::getInstance();
 $conn = $db->getConnection();
 
-// Verify session and resolve current user + role
+// Verify session and resolve current user + role (identity.php, session-cached)
 $sessionUser = verify_session_and_get_user();
-
-function resolveRole(mysqli $conn, array $sessionUser): string {
-  $role = '';
-  $oid = $sessionUser['azure_oid'] ?? ($sessionUser['oid'] ?? null);
-  $username = $sessionUser['username'] ?? null;
-  if (!empty($oid)) {
-    if ($st = $conn->prepare("SELECT role FROM users WHERE azure_oid = ? LIMIT 1")) {
-      $st->bind_param('s', $oid);
-      if ($st->execute()) { $st->bind_result($r); if ($st->fetch()) { $role = (string)$r; } }
-      $st->close();
-    }
-  }
-  if (!$role && $username) {
-    if ($st = $conn->prepare("SELECT role FROM users WHERE username = ? LIMIT 1")) {
-      $st->bind_param('s', $username);
-      if ($st->execute()) { $st->bind_result($r); if ($st->fetch()) { $role = (string)$r; } }
-      $st->close();
-    }
-  }
-  return $role ?: 'Mitarbeiter';
-}
+$me = identity_resolve($conn, $sessionUser);
 
 // Parse JSON body
 $raw = file_get_contents('php://input');
@@ -81,8 +77,8 @@ $flexible = isset($data['flexibleWorkdays']) ? (bool)$data['flexibleWorkdays'] :
 $dailyHours = isset($data['dailyHours']) && is_array($data['dailyHours']) ? $data['dailyHours'] : [];
 
 // RBAC: users can update their own master data; Admin/Bereichsleiter/Standortleiter may update any
-$role = resolveRole($conn, $sessionUser);
-$allowed = ($sessionUser['id'] ?? null) == $userId || in_array($role, ['Admin','Bereichsleiter','Standortleiter'], true);
+$role = $me['role'] ?? 'Mitarbeiter';
+$allowed = ($me['id'] ?? ($sessionUser['id'] ?? null)) == $userId || in_array($role, ['Admin','Bereichsleiter','Standortleiter'], true);
 if (!$allowed) { send_response(403, ['message' => 'Keine Berechtigung']); }
 
 // CRITICAL: Only Admin may assign locations (Security Fix: User requirement 2025-10-26)
@@ -188,6 +184,9 @@ try {
     $st->close();
   }
 
+  // Indexierte Kopie der Standorte (user_locations, Migration 006) mitschreiben
+  if ($hasLocations) { user_locations_sync($conn, $userId, $locations); }
+
   // Check if user was created via onboarding and finalize onboarding after Standortleiter completes master data
   // This removes the user from the pending list by clearing pending_since
   $onboardingCheck = $conn->prepare("SELECT pending_since, created_via_onboarding FROM users WHERE id = ? LIMIT 1");
@@ -213,6 +212,8 @@ try {
   }
 
   $conn->commit();
+  // Standortzuordnung geändert: zwischengespeicherte Identitäten (Leiter-Standorte) verwerfen
+  if ($canAssignLocations && $hasLocations) { identity_invalidate(); }
   send_response(200, ['success' => true]);
 } catch (Throwable $e) {
   $conn->rollback();
@@ -8,6 +8,7 @@
 
 define('API_GUARD', true);
 require_once __DIR__ . '/DatabaseConnection.php';
+require_once __DIR__ . '/schema-capabilities.php';
 
 // Set JSON response header
 header('Content-Type: application/json; charset=utf-8');
@@ -44,6 +45,7 @@ try {
 
     // Commit transaction
     $conn->commit();
+    schema_capabilities_invalidate();
 
     // Verify column was added
     $verified = false;
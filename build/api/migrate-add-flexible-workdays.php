@@ -6,6 +6,7 @@
  */
 define('API_GUARD', true);
 require_once __DIR__ . '/DatabaseConnection.php';
+require_once __DIR__ . '/schema-capabilities.php';
 
 header('Content-Type: application/json; charset=utf-8');
 
@@ -37,6 +38,7 @@ try {
 
     // Commit the change
     $conn->commit();
+    schema_capabilities_invalidate();
 
     // Verify column was added
     $verified = false;
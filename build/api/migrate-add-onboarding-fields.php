@@ -11,6 +11,7 @@
 
 define('API_GUARD', true);
 require_once __DIR__ . '/DatabaseConnection.php';
+require_once __DIR__ . '/schema-capabilities.php';
 
 // Don't use error-handler.php for migrations - it interferes with output
 header('Content-Type: text/plain; charset=utf-8');
@@ -65,6 +66,10 @@ try {
         echo "- Spalte 'pending_since' existiert bereits\n";
     }
 
+    if ($changes) {
+        schema_capabilities_invalidate();
+    }
+
     // Setze für existierende User: onboarding_completed = 1
     $conn->query("UPDATE users SET onboarding_completed = 1 WHERE onboarding_completed = 0");
     echo "✓ Bestehende User als 'onboarding_completed' markiert\n";
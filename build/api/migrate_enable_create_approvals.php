@@ -4,6 +4,7 @@ define('API_GUARD', true);
 @header('Content-Type: application/json; charset=utf-8');
 
 require_once __DIR__ . '/DatabaseConnection.php';
+require_once __DIR__ . '/schema-capabilities.php';
 
 $db = DatabaseConnection::getInstance();
 $conn = $db->getConnection();
@@ -53,6 +54,10 @@ try {
     $result['changed'] = true;
   }
 
+  if ($result['changed']) {
+    schema_capabilities_invalidate();
+  }
+
   // Verify
   $verify = false;
   if ($res = $conn->query("SHOW COLUMNS FROM approval_requests LIKE 'type'")) {
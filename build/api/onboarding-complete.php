@@ -8,10 +8,7 @@
 
 define('API_GUARD', true);
 require_once __DIR__ . '/error-handler.php';
-require_once __DIR__ . '/security-middleware.php';
-require_once __DIR__ . '/auth_helpers.php';
-require_once __DIR__ . '/csrf-middleware.php';
-require_once __DIR__ . '/DatabaseConnection.php';
+require_once __DIR__ . '/api-bootstrap.php';
 
 initialize_api();
 initSecurityMiddleware();
@@ -1,10 +1,17 @@
 <?php
+define('API_GUARD', true);
+require_once __DIR__ . '/opcache-sync.php';
+
 header('Content-Type: application/json; charset=utf-8');
 $out = [ 'endpoint' => 'opcache-reset', 'file' => __FILE__, 'dir' => __DIR__, 'php' => PHP_VERSION ];
 if (function_exists('opcache_get_status')) {
   $out['opcache_status_before'] = @opcache_get_status(false);
 }
-if (function_exists('opcache_reset')) {
+if (empty($_GET['full'])) {
+  // Default: invalidate only changed scripts (no recompile storm after deploys)
+  $out['opcache_sync'] = opcache_sync_changed(dirname(__DIR__));
+  $out['opcache_reset'] = $out['opcache_sync']['available'] ? 'selective' : 'unavailable';
+} elseif (function_exists('opcache_reset')) {
   $ok = @opcache_reset();
   $out['opcache_reset'] = $ok ? 'ok' : 'failed';
 } else {
@@ -15,4 +22,3 @@ if (function_exists('opcache_get_status')) {
 }
 echo json_encode($out, JSON_PRETTY_PRINT | JSON_UNESCAPED_SLASHES);
 ?>
-
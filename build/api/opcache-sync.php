@@ -0,0 +1,61 @@
+<?php
+/**
+ * OPcache Sync - invalidate only the scripts a deploy actually changed
+ *
+ * opcache_reset() throws away every compiled script, so the first requests after
+ * a deploy recompile the whole API at once (latency spike). This walks the cached
+ * scripts and invalidates those whose file is gone or whose mtime differs from the
+ * cached timestamp (with opcache.validate_timestamps=0 there is none; then every
+ * file modified since the cache started counts as changed). Preloaded scripts (preload.php) cannot be invalidated; changed
+ * ones are reported so the deploy can restart PHP-FPM.
+ *
+ * Usage:
+ *   $report = opcache_sync_changed(dirname(__DIR__));   // limit to the app root
+ *   if ($report['restart_required']) { ... }
+ */
+
+if (!defined('API_GUARD')) {
+    die('Direct access not permitted');
+}
+
+/**
+ * Invalidate changed/removed cached scripts below $root (all scripts if null)
+ */
+function opcache_sync_changed(?string $root = null): array {
+    $report = ['available' => false, 'checked' => 0, 'invalidated' => [], 'preloaded_changed' => [], 'restart_required' => false];
+    if (!function_exists('opcache_get_status') || !function_exists('opcache_invalidate')) {
+        return $report;
+    }
+    $status = @opcache_get_status(true);
+    if (!is_array($status) || empty($status['opcache_enabled'])) {
+        return $report;
+    }
+    $report['available'] = true;
+
+    $prefix = $root !== null ? rtrim((string)(realpath($root) ?: $root), '/') . '/' : null;
+    $preloaded = array_flip($status['preload_statistics']['scripts'] ?? []);
+    $stats = $status['opcache_statistics'] ?? [];
+    $cacheStart = max((int)($stats['start_time'] ?? 0), (int)($stats['last_restart_time'] ?? 0));
+    clearstatcache();
+
+    foreach ($status['scripts'] ?? [] as $path => $script) {
+        $path = $script['full_path'] ?? $path;
+        if ($prefix !== null && strncmp($path, $prefix, strlen($prefix)) !== 0) {
+            continue;
+        }
+        $report['checked']++;
+        $mtime = @filemtime($path);
+        if ($mtime !== false && (isset($script['timestamp']) ? (int)$script['timestamp'] === $mtime : $mtime <= $cacheStart)) {
+            continue;
+        }
+        if (isset($preloaded[$path])) {
+            $report['preloaded_changed'][] = $path;
+            continue;
+        }
+        if (opcache_invalidate($path, true)) {
+            $report['invalidated'][] = $path;
+        }
+    }
+    $report['restart_required'] = $report['preloaded_changed'] !== [];
+    return $report;
+}
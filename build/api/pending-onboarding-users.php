@@ -27,7 +27,7 @@ if ($_SERVER['REQUEST_METHOD'] !== 'GET') {
 
 try {
     // Session und User prüfen
-    $sessionUser = verify_session_and_get_user();
+    $sessionUser = verify_session_and_get_user(true);
     $userId = $sessionUser['id'] ?? null;
     $userRole = $sessionUser['role'] ?? '';
 
@@ -0,0 +1,65 @@
+<?php
+/**
+ * OPcache Preload - compiles the shared API core once at FPM start
+ *
+ * Every endpoint includes the same chain (security-middleware, auth_helpers,
+ * csrf-middleware, DatabaseConnection, ...). With preloading, their classes and
+ * functions live in shared memory and the require_once calls no longer resolve,
+ * stat or declare anything per request. Files are only compiled, never executed:
+ * top-level code (API_GUARD checks, set_error_handler, define) still runs when an
+ * endpoint includes the file.
+ *
+ * Not preloaded, because they declare the same names as other files and a
+ * preloaded declaration would turn the other include into "Cannot redeclare":
+ *   rate-limiting.php  (checkRateLimit, also in security-headers.php)
+ *   validation.php     (InputValidator, ValidationException, also in InputValidationService.php)
+ *   AuthenticationService.php, security-headers.php (legacy duplicates)
+ *
+ * Preloaded files change only with an FPM restart; opcache-sync.php reports them
+ * after a deploy instead of invalidating them.
+ *
+ * Usage (php.ini / FPM pool):
+ *   opcache.preload=/path/to/api/preload.php
+ *   opcache.preload_user=www-data
+ */
+
+if (isset($_SERVER['REQUEST_METHOD']) || !function_exists('opcache_compile_file')) {
+    http_response_code(404);
+    exit;
+}
+
+const PRELOAD_FILES = [
+    'constants.php',
+    'config-compat.php',
+    'structured-logger.php',
+    'error-handler.php',
+    'security-middleware.php',
+    'auth_helpers.php',
+    'csrf-middleware.php',
+    'DatabaseConnection.php',
+    'InputValidationService.php',
+    'schema-capabilities.php',
+    'approval-status.php',
+    'user-locations.php',
+    'http-cache.php',
+    'bootstrap-data.php',
+    'identity.php',
+    'request-trace.php',
+    'response-compression.php',
+    'keyset-pagination.php',
+    'daily-totals.php',
+    'ip-location-index.php',
+    'api-bootstrap.php',
+];
+
+foreach (PRELOAD_FILES as $file) {
+    $path = __DIR__ . '/' . $file;
+    if (!is_file($path)) {
+        continue;
+    }
+    try {
+        opcache_compile_file($path);
+    } catch (Throwable $e) {
+        error_log('preload_failed: ' . $file . ': ' . $e->getMessage());
+    }
+}
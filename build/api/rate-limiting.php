@@ -7,9 +7,10 @@
  * - Per-IP rate limiting
  * - Per-endpoint rate limiting  
  * - Configurable via environment variables
- * - File-based storage for production compatibility
+ * - Pluggable storage (RATE_LIMIT_BACKEND): APCu, SQLite (WAL) or files, auto-detected
  * - Proper HTTP 429 responses
- * - Sliding window algorithm
+ * - Sliding window counter algorithm: two counters per key, O(1) per check
+ *   regardless of the allowed request count
  * 
  * Usage: require_once 'rate-limiting.php'; then call checkRateLimit($endpoint)
  */
@@ -20,8 +21,145 @@ if (!defined('API_GUARD')) {
     die('Direct access forbidden');
 }
 
+/**
+ * Storage for sliding window counters: one counter per key and fixed window
+ */
+interface RateLimitStore {
+    /**
+     * Counters of window $index - 1 and $index
+     *
+     * @return int[] [previous, current]
+     */
+    public function counts($key, $index);
+
+    /**
+     * Atomically add $delta to the counter of window $index
+     *
+     * @return int[] [previous, current] after the change
+     */
+    public function add($key, $index, $delta, $ttl);
+}
+
+/**
+ * APCu: shared memory, atomic increments (preferred)
+ */
+class ApcuRateLimitStore implements RateLimitStore {
+    public static function available() {
+        return function_exists('apcu_inc') && filter_var(ini_get('apc.enabled'), FILTER_VALIDATE_BOOLEAN);
+    }
+
+    public function counts($key, $index) {
+        return [(int)apcu_fetch($key . ':' . ($index - 1)), (int)apcu_fetch($key . ':' . $index)];
+    }
+
+    public function add($key, $index, $delta, $ttl) {
+        $ok = false;
+        $current = $delta >= 0
+            ? apcu_inc($key . ':' . $index, $delta, $ok, $ttl)
+            : apcu_dec($key . ':' . $index, -$delta, $ok, $ttl);
+        return [(int)apcu_fetch($key . ':' . ($index - 1)), $ok ? (int)$current : 0];
+    }
+}
+
+/**
+ * SQLite in WAL mode: one database file instead of one file per IP and endpoint
+ */
+class SqliteRateLimitStore implements RateLimitStore {
+    private $db;
+
+    public static function available() {
+        return class_exists('PDO') && in_array('sqlite', PDO::getAvailableDrivers(), true);
+    }
+
+    public function __construct($file) {
+        $this->db = new PDO('sqlite:' . $file, null, null, [PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION, PDO::ATTR_TIMEOUT => 2]);
+        $this->db->exec('PRAGMA journal_mode = WAL');
+        $this->db->exec('PRAGMA synchronous = NORMAL');
+        $this->db->exec('CREATE TABLE IF NOT EXISTS counters (k TEXT NOT NULL, w INTEGER NOT NULL, n INTEGER NOT NULL, expires INTEGER NOT NULL, PRIMARY KEY (k, w))');
+    }
+
+    public function counts($key, $index) {
+        $st = $this->db->prepare('SELECT w, n FROM counters WHERE k = ? AND w IN (?, ?)');
+        $st->execute([$key, $index - 1, $index]);
+        $counts = [$index - 1 => 0, $index => 0];
+        foreach ($st->fetchAll(PDO::FETCH_NUM) as [$w, $n]) {
+            $counts[(int)$w] = (int)$n;
+        }
+        return [$counts[$index - 1], $counts[$index]];
+    }
+
+    public function add($key, $index, $delta, $ttl) {
+        $now = time();
+        // Erhöhen und Lesen atomar (wie apcu_inc): BEGIN IMMEDIATE nimmt die Schreibsperre sofort
+        $this->db->exec('BEGIN IMMEDIATE');
+        try {
+            $this->db->prepare('INSERT INTO counters (k, w, n, expires) VALUES (?, ?, MAX(?, 0), ?) ON CONFLICT (k, w) DO UPDATE SET n = MAX(n + ?, 0)')
+                ->execute([$key, $index, $delta, $now + $ttl, $delta]);
+            $counts = $this->counts($key, $index);
+            $this->db->exec('COMMIT');
+        } catch (Throwable $e) {
+            $this->db->exec('ROLLBACK');
+            throw $e;
+        }
+        // Abgelaufene Zähler gelegentlich entfernen (hält die Datei klein)
+        if (mt_rand(1, 100) === 1) {
+            $this->db->prepare('DELETE FROM counters WHERE expires < ?')->execute([$now]);
+        }
+        return $counts;
+    }
+}
+
+/**
+ * Files: fallback without APCu/SQLite, two counters per IP and endpoint under flock
+ */
+class FileRateLimitStore implements RateLimitStore {
+    private $cacheDir;
+
+    public function __construct($cacheDir) {
+        $this->cacheDir = $cacheDir;
+    }
+
+    public function counts($key, $index) {
+        $content = @file_get_contents($this->cacheDir . $key . '.json');
+        return $this->shift(is_string($content) ? json_decode($content, true) : null, $index);
+    }
+
+    public function add($key, $index, $delta, $ttl) {
+        $fp = @fopen($this->cacheDir . $key . '.json', 'c+');
+        if (!$fp) {
+            error_log('Rate limit cache file not writable: ' . $key);
+            return [0, 0];
+        }
+        flock($fp, LOCK_EX);
+        [$previous, $current] = $this->shift(json_decode((string)stream_get_contents($fp), true), $index);
+        $current = max(0, $current + $delta);
+        ftruncate($fp, 0);
+        rewind($fp);
+        fwrite($fp, json_encode(['w' => $index, 'prev' => $previous, 'cur' => $current]));
+        fflush($fp);
+        flock($fp, LOCK_UN);
+        fclose($fp);
+        return [$previous, $current];
+    }
+
+    /**
+     * Counters of the stored window moved to window $index
+     */
+    private function shift($data, $index) {
+        if (!is_array($data) || !isset($data['w'])) {
+            return [0, 0];
+        }
+        $w = (int)$data['w'];
+        if ($w === $index) {
+            return [(int)$data['prev'], (int)$data['cur']];
+        }
+        return $w === $index - 1 ? [(int)$data['cur'], 0] : [0, 0];
+    }
+}
+
 class RateLimiter {
     private $cacheDir;
+    private $store;
     private $enabled;
     private $defaultMaxRequests;
     private $defaultWindow;
@@ -49,8 +187,32 @@ class RateLimiter {
         $this->defaultMaxRequests = $this->getEnvInt('RATE_LIMIT_MAX_REQUESTS', 100);
         $this->defaultWindow = $this->getEnvInt('RATE_LIMIT_WINDOW', 60);
         
-        // Ensure cache directory exists
+        if ($this->enabled) {
+            $this->store = $this->createStore($this->getEnv('RATE_LIMIT_BACKEND', 'auto'));
+        }
+    }
+    
+    /**
+     * Select the counter storage: apcu, sqlite or file ('auto' = first available)
+     * 
+     * @param string $backend Configured backend
+     * @return RateLimitStore
+     */
+    private function createStore($backend) {
+        if (($backend === 'auto' || $backend === 'apcu') && ApcuRateLimitStore::available()) {
+            return new ApcuRateLimitStore();
+        }
+        
+        // SQLite and files need the cache directory
         $this->ensureCacheDirectory();
+        if (($backend === 'auto' || $backend === 'sqlite') && SqliteRateLimitStore::available()) {
+            try {
+                return new SqliteRateLimitStore($this->cacheDir . 'rate-limit.sqlite');
+            } catch (Exception $e) {
+                error_log('Rate limit SQLite store unavailable: ' . $e->getMessage());
+            }
+        }
+        return new FileRateLimitStore($this->cacheDir);
     }
     
     /**
@@ -95,23 +257,20 @@ class RateLimiter {
         // Get endpoint-specific limits
         $limits = $this->getEndpointLimits($endpoint);
         $key = $this->getCacheKey($clientIP, $endpoint);
-        $data = $this->readCacheFile($key);
+        $index = intdiv($currentTime, $limits['window']);
         
-        if (!$data) {
-            return [
-                'limit' => $limits['requests'],
-                'remaining' => $limits['requests'],
-                'reset' => $currentTime + $limits['window']
-            ];
+        try {
+            [$previous, $current] = $this->store->counts($key, $index);
+        } catch (Exception $e) {
+            error_log('Rate limit store read failed: ' . $e->getMessage());
+            $previous = $current = 0;
         }
-        
-        // Clean old entries
-        $data = $this->cleanOldEntries($data, $currentTime, $limits['window']);
+        $used = $this->slidingCount($previous, $current, $currentTime, $limits['window']);
         
         return [
             'limit' => $limits['requests'],
-            'remaining' => max(0, $limits['requests'] - count($data)),
-            'reset' => $currentTime + $limits['window']
+            'remaining' => max(0, $limits['requests'] - (int)ceil($used)),
+            'reset' => ($index + 1) * $limits['window']
         ];
     }
     
@@ -127,7 +286,7 @@ class RateLimiter {
         header('X-RateLimit-Limit: ' . $info['limit']);
         header('X-RateLimit-Remaining: ' . $info['remaining']);
         header('X-RateLimit-Reset: ' . $info['reset']);
-        header('Retry-After: ' . ($info['reset'] - time()));
+        header('Retry-After: ' . max(1, $info['reset'] - time()));
         
         // Send 429 response
         http_response_code(429);
@@ -136,7 +295,7 @@ class RateLimiter {
         echo json_encode([
             'error' => 'Rate limit exceeded',
             'message' => 'Too many requests. Please try again later.',
-            'retry_after' => $info['reset'] - time(),
+            'retry_after' => max(1, $info['reset'] - time()),
             'limit' => $info['limit'],
             'remaining' => $info['remaining'],
             'reset' => $info['reset']
@@ -156,30 +315,38 @@ class RateLimiter {
     private function checkLimit($ip, $endpoint, $currentTime) {
         $limits = $this->getEndpointLimits($endpoint);
         $key = $this->getCacheKey($ip, $endpoint);
+        $index = intdiv($currentTime, $limits['window']);
+        $ttl = 2 * $limits['window'];
         
-        // Read existing data
-        $data = $this->readCacheFile($key);
-        if (!$data) {
-            $data = [];
-        }
-        
-        // Clean old entries (sliding window)
-        $data = $this->cleanOldEntries($data, $currentTime, $limits['window']);
-        
-        // Check if limit is exceeded
-        if (count($data) >= $limits['requests']) {
-            return false;
+        try {
+            // Count first (atomic), then check; a rejected request gives its slot back
+            [$previous, $current] = $this->store->add($key, $index, 1, $ttl);
+            if ($this->slidingCount($previous, $current - 1, $currentTime, $limits['window']) >= $limits['requests']) {
+                $this->store->add($key, $index, -1, $ttl);
+                return false;
+            }
+        } catch (Exception $e) {
+            // Storage problems must not block requests
+            error_log('Rate limit store failed: ' . $e->getMessage());
         }
         
-        // Add current request
-        $data[] = $currentTime;
-        
-        // Save updated data
-        $this->writeCacheFile($key, $data);
-        
         return true;
     }
     
+    /**
+     * Requests in the sliding window: current window plus the overlapping share of the previous one
+     * 
+     * @param int $previous Count of the previous fixed window
+     * @param int $current Count of the current fixed window
+     * @param int $currentTime Current timestamp
+     * @param int $window Time window in seconds
+     * @return float Estimated request count
+     */
+    private function slidingCount($previous, $current, $currentTime, $window) {
+        $elapsed = ($currentTime % $window) / $window;
+        return $previous * (1 - $elapsed) + $current;
+    }
+    
     /**
      * Get endpoint-specific limits or default
      * 
@@ -200,20 +367,6 @@ class RateLimiter {
         ];
     }
     
-    /**
-     * Clean old entries from data array
-     * 
-     * @param array $data Request timestamps
-     * @param int $currentTime Current timestamp
-     * @param int $window Time window in seconds
-     * @return array Cleaned data
-     */
-    private function cleanOldEntries($data, $currentTime, $window) {
-        return array_filter($data, function($timestamp) use ($currentTime, $window) {
-            return ($currentTime - $timestamp) < $window;
-        });
-    }
-    
     /**
      * Get client IP address
      * 
@@ -248,42 +401,6 @@ class RateLimiter {
         return 'rate_limit_' . hash('sha256', $ip . '_' . $endpoint);
     }
     
-    /**
-     * Read data from cache file
-     * 
-     * @param string $key Cache key
-     * @return array|null Cached data or null
-     */
-    private function readCacheFile($key) {
-        $filePath = $this->cacheDir . $key . '.json';
-        
-        if (!file_exists($filePath)) {
-            return null;
-        }
-        
-        $content = file_get_contents($filePath);
-        if ($content === false) {
-            return null;
-        }
-        
-        $data = json_decode($content, true);
-        return is_array($data) ? $data : null;
-    }
-    
-    /**
-     * Write data to cache file
-     * 
-     * @param string $key Cache key
-     * @param array $data Data to cache
-     * @return bool Success status
-     */
-    private function writeCacheFile($key, $data) {
-        $filePath = $this->cacheDir . $key . '.json';
-        $content = json_encode($data);
-        
-        return file_put_contents($filePath, $content, LOCK_EX) !== false;
-    }
-    
     /**
      * Ensure cache directory exists
      */
@@ -304,6 +421,21 @@ class RateLimiter {
         }
     }
     
+    /**
+     * Get environment variable as string
+     * 
+     * @param string $key Environment variable name
+     * @param string $default Default value
+     * @return string
+     */
+    private function getEnv($key, $default = '') {
+        $value = $_ENV[$key] ?? getenv($key);
+        if ($value === false || $value === null || $value === '') {
+            return $default;
+        }
+        return strtolower(trim((string)$value));
+    }
+    
     /**
      * Get environment variable as boolean
      * 
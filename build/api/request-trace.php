@@ -0,0 +1,108 @@
+<?php
+/**
+ * Request Trace - in-memory spans, flushed once per request via StructuredLogger
+ *
+ * Replaces the per-step debug appends (test.html, debug-time-entries.log). Events and
+ * spans are collected in memory and written as one 'request_trace' entry at shutdown.
+ * Off by default: TRACE_SAMPLE_RATE (0..1, Config app.trace_sample_rate) decides once
+ * per request whether it is traced. Untraced requests pay one static check per call.
+ *
+ * Usage:
+ *   trace_event('start_user_resolved', $userId);
+ *   $span = trace_begin('insert');  ...  trace_end($span, ['id' => $newId]);
+ */
+
+if (!defined('API_GUARD')) {
+    die('Direct access not permitted');
+}
+
+require_once __DIR__ . '/structured-logger.php';
+
+const TRACE_MAX_EVENTS = 200;
+
+/**
+ * True if this request is sampled (decided on first call)
+ */
+function trace_enabled(): bool {
+    static $enabled = null;
+    if ($enabled === null) {
+        $rate = getenv('TRACE_SAMPLE_RATE') ?: ($_ENV['TRACE_SAMPLE_RATE'] ?? 0);
+        if (class_exists('Config')) {
+            $rate = Config::get('app.trace_sample_rate', $rate);
+        }
+        $rate = (float)$rate;
+        $enabled = $rate > 0 && ($rate >= 1 || mt_rand() / mt_getrandmax() < $rate);
+        if ($enabled) {
+            register_shutdown_function('trace_flush');
+        }
+    }
+    return $enabled;
+}
+
+function &trace_buffer(): array {
+    static $buffer = ['events' => [], 'dropped' => 0];
+    return $buffer;
+}
+
+/**
+ * Record a point event (offset in ms since request start)
+ */
+function trace_event(string $label, $data = null): void {
+    if (!trace_enabled()) {
+        return;
+    }
+    $buffer = &trace_buffer();
+    if (count($buffer['events']) >= TRACE_MAX_EVENTS) {
+        $buffer['dropped']++;
+        return;
+    }
+    $event = ['name' => $label, 'at_ms' => trace_offset_ms()];
+    if ($data !== null) {
+        $event['data'] = $data;
+    }
+    $buffer['events'][] = $event;
+}
+
+/**
+ * Start a span; returns a handle for trace_end() (null when not traced)
+ */
+function trace_begin(string $name): ?array {
+    return trace_enabled() ? ['name' => $name, 'start' => hrtime(true)] : null;
+}
+
+/**
+ * Finish a span started with trace_begin()
+ */
+function trace_end(?array $span, $data = null): void {
+    if ($span === null) {
+        return;
+    }
+    $duration = round((hrtime(true) - $span['start']) / 1e6, 3);
+    trace_event($span['name'], ['duration_ms' => $duration] + ($data !== null ? ['data' => $data] : []));
+}
+
+function trace_offset_ms(): float {
+    $start = $_SERVER['REQUEST_TIME_FLOAT'] ?? microtime(true);
+    return round((microtime(true) - $start) * 1000, 3);
+}
+
+/**
+ * Shutdown: write the collected events as one log entry (including a fatal error, if any)
+ */
+function trace_flush(): void {
+    $buffer = &trace_buffer();
+    $err = error_get_last();
+    if ($err && in_array($err['type'], [E_ERROR, E_PARSE, E_CORE_ERROR, E_COMPILE_ERROR], true)) {
+        trace_event('fatal', $err);
+    }
+    if (!$buffer['events'] || !isset($GLOBALS['logger'])) {
+        return;
+    }
+    $GLOBALS['logger']->debug('request_trace', [
+        'duration_ms' => trace_offset_ms(),
+        'status' => http_response_code() ?: null,
+        'events' => $buffer['events'],
+        'dropped' => $buffer['dropped'],
+    ]);
+    $buffer['events'] = [];
+}
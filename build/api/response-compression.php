@@ -0,0 +1,174 @@
+<?php
+/**
+ * Response Compression - negotiated Brotli/gzip for JSON and text responses
+ *
+ * initialize_api() starts one output buffer; when the script ends the complete body
+ * is compressed once, if it is at least RESPONSE_COMPRESSION_MIN_BYTES long, has a
+ * JSON/text Content-Type and the client accepts br (ext-brotli) or gzip. This covers
+ * send_response() as well as the endpoints that echo json_encode() directly.
+ * Untouched: streamed output (ob_flush, e.g. the CSV export), responses that already
+ * carry Content-Encoding or Content-Length, and hosts with zlib.output_compression.
+ * ETags from http-cache.php are weak, so they stay valid for every encoding.
+ * RESPONSE_COMPRESSION=off (Config app.response_compression) disables it.
+ *
+ * Usage:
+ *   response_compression_start();                       // done by initialize_api()
+ *   $gz = response_encode($json, 'gzip');               // e.g. scripts/compression-benchmark.php
+ */
+
+const RESPONSE_COMPRESSION_MIN_BYTES = 1024;
+const RESPONSE_COMPRESSION_GZIP_LEVEL = 5;
+const RESPONSE_COMPRESSION_BROTLI_QUALITY = 4;
+
+function &response_compression_state(): array {
+    static $state = ['level' => 0, 'streaming' => false];
+    return $state;
+}
+
+/**
+ * Output buffer level of the compression buffer (0 if not active)
+ */
+function response_compression_level(): int {
+    return response_compression_state()['level'];
+}
+
+function response_compression_enabled(): bool {
+    // Same parsing as config-compat.php; the env value is the default for configs without the key
+    $enabled = strtolower((string)(getenv('RESPONSE_COMPRESSION') ?: ($_ENV['RESPONSE_COMPRESSION'] ?? 'on'))) !== 'off';
+    if (class_exists('Config')) {
+        $value = Config::get('app.response_compression', $enabled);
+        $enabled = is_string($value) ? strtolower($value) !== 'off' : (bool)$value;
+    }
+    if (!$enabled) {
+        return false;
+    }
+    return function_exists('gzencode') && !filter_var(ini_get('zlib.output_compression'), FILTER_VALIDATE_BOOLEAN);
+}
+
+/**
+ * Start the compression buffer (idempotent). Skipped if output already went out or
+ * an outer buffer holds content - compressed bytes behind it would be corrupt.
+ */
+function response_compression_start(): void {
+    $state = &response_compression_state();
+    if ($state['level'] > 0 || headers_sent() || PHP_SAPI === 'cli' || !response_compression_enabled()) {
+        return;
+    }
+    foreach (ob_get_status(true) as $buffer) {
+        if (($buffer['buffer_used'] ?? 0) > 0) {
+            return;
+        }
+    }
+    if (ob_start('response_compression_handler')) {
+        $state['level'] = ob_get_level();
+        $state['streaming'] = false;
+    }
+}
+
+/**
+ * ob_start() callback: compresses the complete body at the end of the request
+ */
+function response_compression_handler(string $buffer, int $phase): string {
+    $state = &response_compression_state();
+    if ($phase & PHP_OUTPUT_HANDLER_FINAL) {
+        $state['level'] = 0;
+    }
+    if ($phase & PHP_OUTPUT_HANDLER_CLEAN) {
+        return '';
+    }
+    if (!($phase & PHP_OUTPUT_HANDLER_FINAL)) {
+        // Flushed mid-request: the body is streamed, pass it through from here on
+        $state['streaming'] = true;
+        return $buffer;
+    }
+    return $state['streaming'] ? $buffer : response_compress($buffer);
+}
+
+/**
+ * Compress $body for the current response and set the headers; $body unchanged if not applicable
+ */
+function response_compress(string $body): string {
+    if (strlen($body) < RESPONSE_COMPRESSION_MIN_BYTES || headers_sent() || !response_compressible()) {
+        return $body;
+    }
+    $encoding = response_compression_negotiate();
+    $encoded = $encoding !== null ? response_encode($body, $encoding) : null;
+    if ($encoded === null) {
+        return $body;
+    }
+    header('Content-Encoding: ' . $encoding);
+    header('Vary: Accept-Encoding', false);
+    return $encoded;
+}
+
+/**
+ * Headers allow compression: JSON/text, no Content-Encoding/-Length yet, not 204/304
+ */
+function response_compressible(): bool {
+    if (in_array(http_response_code(), [204, 304], true)) {
+        return false;
+    }
+    $type = 'text/html';
+    foreach (headers_list() as $header) {
+        [$name, $value] = array_map('trim', explode(':', $header, 2) + [1 => '']);
+        $name = strtolower($name);
+        if ($name === 'content-encoding' || $name === 'content-length') {
+            return false;
+        }
+        if ($name === 'content-type') {
+            $type = strtolower($value);
+        }
+    }
+    return str_starts_with($type, 'application/json') || str_starts_with($type, 'text/');
+}
+
+/**
+ * Best supported encoding from Accept-Encoding ('br', 'gzip' or null); br wins ties
+ */
+function response_compression_negotiate(?string $acceptEncoding = null): ?string {
+    $acceptEncoding ??= $_SERVER['HTTP_ACCEPT_ENCODING'] ?? '';
+    $supported = function_exists('brotli_compress') ? ['br', 'gzip'] : ['gzip'];
+    $q = [];
+    foreach (explode(',', strtolower($acceptEncoding)) as $part) {
+        $params = array_map('trim', explode(';', $part));
+        $coding = array_shift($params);
+        if ($coding === '') {
+            continue;
+        }
+        $weight = 1.0;
+        foreach ($params as $param) {
+            if (str_starts_with($param, 'q=')) {
+                $weight = (float)substr($param, 2);
+            }
+        }
+        $q[$coding === 'x-gzip' ? 'gzip' : $coding] = $weight;
+    }
+
+    $best = null;
+    $bestQ = 0.0;
+    foreach ($supported as $coding) {
+        $weight = $q[$coding] ?? ($q['*'] ?? 0.0);
+        if ($weight > $bestQ) {
+            $best = $coding;
+            $bestQ = $weight;
+        }
+    }
+    return $best;
+}
+
+/**
+ * Encode $body as 'br' or 'gzip' (null if the encoder is unavailable or fails)
+ */
+function response_encode(string $body, string $encoding, ?int $level = null): ?string {
+    if ($encoding === 'br') {
+        if (!function_exists('brotli_compress')) {
+            return null;
+        }
+        $encoded = brotli_compress($body, $level ?? RESPONSE_COMPRESSION_BROTLI_QUALITY, BROTLI_TEXT);
+    } elseif ($encoding === 'gzip') {
+        $encoded = gzencode($body, $level ?? RESPONSE_COMPRESSION_GZIP_LEVEL);
+    } else {
+        return null;
+    }
+    return $encoded === false ? null : $encoded;
+}
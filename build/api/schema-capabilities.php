@@ -0,0 +1,156 @@
+<?php
+/**
+ * Schema Capabilities - cached column metadata for time_entries / approval_requests
+ *
+ * time-entries and approvals adapt their SQL to the live schema (stop_time vs
+ * end_time, optional status column, 'create' approvals, nullable entry_id ...).
+ * Instead of SHOW COLUMNS on every request, the columns of all relevant tables
+ * are read with ONE information_schema query and cached:
+ *   1. per process (static)
+ *   2. in APCu, if available
+ *   3. otherwise as generated PHP file in build/cache/ (served from OPcache)
+ *
+ * Migrations that ALTER these tables must call schema_capabilities_invalidate().
+ * As a safety net for manual schema changes the cache expires after one hour.
+ *
+ * Usage:
+ *   if (schema_has_column($conn, 'time_entries', 'status')) { ... }
+ *   $type = schema_column($conn, 'approval_requests', 'type')['type'] ?? '';
+ */
+
+if (!defined('API_GUARD')) {
+    die('Direct access not permitted');
+}
+
+const SCHEMA_CAPABILITIES_TABLES = [
+    'time_entries', 'approval_requests', 'approval_status_counts', 'daily_totals', 'data_versions', 'master_data',
+    'user_locations', 'users',
+];
+const SCHEMA_CAPABILITIES_TTL = 3600;
+
+function schema_capabilities_cache_key(): string {
+    return 'aze_schema_caps_' . md5(__DIR__);
+}
+
+function schema_capabilities_cache_file(): string {
+    return __DIR__ . '/../cache/schema-capabilities.cache.php';
+}
+
+/**
+ * Columns per table: ['time_entries' => ['stop_time' => ['type' => 'time', 'nullable' => true], ...], ...]
+ * Keys (table and column names) are lower case.
+ */
+function schema_capabilities(mysqli $conn): array {
+    $caps = &schema_capabilities_memo();
+    if ($caps !== null) {
+        return $caps;
+    }
+
+    $cached = schema_capabilities_load();
+    if ($cached !== null) {
+        return $caps = $cached;
+    }
+
+    $tables = [];
+    foreach (SCHEMA_CAPABILITIES_TABLES as $table) {
+        $tables[$table] = [];
+    }
+    $in = "'" . implode("','", SCHEMA_CAPABILITIES_TABLES) . "'";
+    $sql = "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ($in)";
+    if (!($res = $conn->query($sql))) {
+        // Do not cache a failed lookup - the next request retries
+        return $tables;
+    }
+    while ($r = $res->fetch_row()) {
+        $tables[strtolower($r[0])][strtolower($r[1])] = [
+            'type' => strtolower((string)$r[2]),
+            'nullable' => strtoupper((string)$r[3]) === 'YES',
+        ];
+    }
+    $res->close();
+
+    schema_capabilities_store($tables);
+    return $caps = $tables;
+}
+
+function &schema_capabilities_memo(): ?array {
+    static $caps = null;
+    return $caps;
+}
+
+function schema_column(mysqli $conn, string $table, string $column): ?array {
+    return schema_capabilities($conn)[strtolower($table)][strtolower($column)] ?? null;
+}
+
+function schema_has_column(mysqli $conn, string $table, string $column): bool {
+    return schema_column($conn, $table, $column) !== null;
+}
+
+/**
+ * First of the candidate columns that exists in $table (null if none)
+ */
+function schema_resolve_column(mysqli $conn, string $table, array $candidates): ?string {
+    foreach ($candidates as $c) {
+        if (schema_has_column($conn, $table, $c)) { return $c; }
+    }
+    return null;
+}
+
+function schema_capabilities_load(): ?array {
+    $entry = null;
+    if (function_exists('apcu_fetch') && filter_var(ini_get('apc.enabled'), FILTER_VALIDATE_BOOLEAN)) {
+        $hit = false;
+        $entry = apcu_fetch(schema_capabilities_cache_key(), $hit);
+        if (!$hit) { $entry = null; }
+    } else {
+        $file = schema_capabilities_cache_file();
+        if (is_file($file)) {
+            $entry = @include $file;
+        }
+    }
+    if (!is_array($entry) || !isset($entry['generated_at'], $entry['tables'])) {
+        return null;
+    }
+    if (time() - (int)$entry['generated_at'] > SCHEMA_CAPABILITIES_TTL) {
+        return null;
+    }
+    return $entry['tables'];
+}
+
+function schema_capabilities_store(array $tables): void {
+    $entry = ['generated_at' => time(), 'tables' => $tables];
+    if (function_exists('apcu_store') && filter_var(ini_get('apc.enabled'), FILTER_VALIDATE_BOOLEAN)) {
+        apcu_store(schema_capabilities_cache_key(), $entry, SCHEMA_CAPABILITIES_TTL);
+        return;
+    }
+    $file = schema_capabilities_cache_file();
+    $dir = dirname($file);
+    if (!is_dir($dir) && !@mkdir($dir, 0755, true)) {
+        return;
+    }
+    // Write to a temp file and rename, so concurrent requests never include a partial file
+    $tmp = $file . '.' . getmypid() . '.tmp';
+    $code = "<?php\n// Generated by schema-capabilities.php - do not edit\nreturn " . var_export($entry, true) . ";\n";
+    if (@file_put_contents($tmp, $code, LOCK_EX) !== false && @rename($tmp, $file)) {
+        if (function_exists('opcache_invalidate')) { @opcache_invalidate($file, true); }
+    } else {
+        @unlink($tmp);
+    }
+}
+
+/**
+ * Drop the cached schema (call after ALTER TABLE)
+ */
+function schema_capabilities_invalidate(): void {
+    $caps = &schema_capabilities_memo();
+    $caps = null;
+    if (function_exists('apcu_delete')) {
+        @apcu_delete(schema_capabilities_cache_key());
+    }
+    $file = schema_capabilities_cache_file();
+    if (is_file($file)) {
+        @unlink($file);
+        if (function_exists('opcache_invalidate')) { @opcache_invalidate($file, true); }
+    }
+}
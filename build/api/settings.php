@@ -1,7 +1,7 @@
 <?php
 /**
  * Settings API
- * GET:    Liefert globale Einstellungen
+ * GET:    Liefert globale Einstellungen (ETag / 304, siehe http-cache.php)
  * PUT:    Aktualisiert globale Einstellungen (Admin only)
  *
  * Response-Shape entspricht dem Frontend-Typ `GlobalSettings`:
@@ -10,10 +10,10 @@
 
 define('API_GUARD', true);
 
-require_once __DIR__ . '/security-middleware.php';
-require_once __DIR__ . '/auth_helpers.php';
-require_once __DIR__ . '/csrf-middleware.php';
-require_once __DIR__ . '/DatabaseConnection.php';
+require_once __DIR__ . '/api-bootstrap.php';
+require_once __DIR__ . '/http-cache.php';
+require_once __DIR__ . '/bootstrap-data.php';
+require_once __DIR__ . '/identity.php';
 
 initialize_api();
 initSecurityMiddleware();
@@ -33,52 +33,15 @@ $db = DatabaseConnection::getInstance();
 $conn = $db->getConnection();
 
 function gs_fetch(mysqli $conn): array {
-  $defaults = [
-    'overtimeThreshold' => 8.0,
-    'changeReasons' => [
-      'Vergessen einzustempeln','Vergessen auszustempeln','Dienstgang','Arzttermin','Technische Störung','Sonstige'
-    ],
-    'locations' => ['Zentrale Berlin','Standort Hamburg','Standort Köln']
-  ];
-  if ($st = $conn->prepare("SELECT overtime_threshold, change_reasons, locations FROM global_settings WHERE id = 1 LIMIT 1")) {
-    if ($st->execute()) {
-      $st->bind_result($thr, $reasons, $locations);
-      if ($st->fetch()) {
-        $st->close();
-        return [
-          'overtimeThreshold' => (float)$thr,
-          'changeReasons' => json_decode((string)$reasons, true) ?: $defaults['changeReasons'],
-          'locations' => json_decode((string)$locations, true) ?: $defaults['locations']
-        ];
-      }
-    }
-    $st->close();
-  }
-  return $defaults;
-}
-
-function gs_resolve_role(mysqli $conn, array $sessionUser): string {
-  $role = '';
-  $oid = $sessionUser['azure_oid'] ?? ($sessionUser['oid'] ?? null);
-  $username = $sessionUser['username'] ?? null;
-  if (!empty($oid)) {
-    if ($st = $conn->prepare("SELECT role FROM users WHERE azure_oid = ? LIMIT 1")) {
-      $st->bind_param('s', $oid);
-      if ($st->execute()) { $st->bind_result($r); if ($st->fetch()) { $role = (string)$r; } }
-      $st->close();
-    }
-  }
-  if (!$role && $username) {
-    if ($st = $conn->prepare("SELECT role FROM users WHERE username = ? LIMIT 1")) {
-      $st->bind_param('s', $username);
-      if ($st->execute()) { $st->bind_result($r); if ($st->fetch()) { $role = (string)$r; } }
-      $st->close();
-    }
+  try {
+    return bootstrap_global_settings($conn);
+  } catch (Throwable $e) {
+    return BOOTSTRAP_SETTINGS_DEFAULTS;
   }
-  return $role ?: 'Mitarbeiter';
 }
 
 if ($method === 'GET') {
+  http_cache_conditional($conn, ['global_settings']);
   echo json_encode(gs_fetch($conn), JSON_UNESCAPED_UNICODE);
   exit;
 }
@@ -97,7 +60,7 @@ if (!$csrfOk) {
 }
 
 $sessionUser = verify_session_and_get_user();
-$role = gs_resolve_role($conn, $sessionUser);
+$role = identity_role($conn, $sessionUser);
 if ($role !== 'Admin') {
   http_response_code(403);
   echo json_encode(['message' => 'Nur Administratoren dürfen globale Einstellungen ändern.']);
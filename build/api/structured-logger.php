@@ -3,7 +3,13 @@
  * Structured Logger for AZE_Gemini
  * 
  * Provides structured logging with automatic log rotation
- * and optional database logging for audit trails
+ * and optional database logging for audit trails.
+ *
+ * Entries are buffered per request and written at shutdown (or when the buffer
+ * is full): one file append, one multi-row INSERT for ERROR-and-above entries.
+ * The rotation check uses a cached file size instead of a stat per entry.
+ * During error bursts the database entries are capped per request and sampled
+ * across requests (APCu counter per minute); dropped entries are counted in the log file.
  */
 
 class StructuredLogger {
@@ -11,6 +17,16 @@ class StructuredLogger {
     private $maxFileSize = 10485760; // 10MB
     private $maxFiles = 10;
     private $requestId;
+    private $buffer = [];          // encoded JSON lines for the log file
+    private $dbBuffer = [];        // entries for audit_logs
+    private $dropped = 0;          // audit entries dropped by back-pressure
+    private $flushRegistered = false;
+    private static $fileSizes = []; // filename => bytes (stat once, then counted)
+
+    const MAX_BUFFER = 500;          // flush early beyond this many entries
+    const MAX_DB_ENTRIES = 20;       // audit_logs rows per request
+    const DB_BURST_LIMIT = 100;      // audit_logs rows per minute (all requests) before sampling
+    const DB_BURST_SAMPLE = 10;      // during a burst keep 1 of N rows
     
     public function __construct($logDir = null) {
         $this->logDir = $logDir ?? __DIR__ . '/../logs';
@@ -40,13 +56,66 @@ class StructuredLogger {
     public function log($level, $message, array $context = []) {
         $logEntry = $this->createLogEntry($level, $message, $context);
         
-        // Write to file
-        $this->writeToFile($logEntry);
+        // Buffer for the file
+        $this->buffer[] = json_encode($logEntry);
         
         // Optionally write to database for critical logs
         if (in_array($level, [self::EMERGENCY, self::ALERT, self::CRITICAL, self::ERROR])) {
-            $this->writeToDatabase($logEntry);
+            if ($this->admitDatabaseEntry()) {
+                $this->dbBuffer[] = $logEntry;
+            } else {
+                $this->dropped++;
+            }
+        }
+        
+        if (!$this->flushRegistered) {
+            register_shutdown_function([$this, 'flush']);
+            $this->flushRegistered = true;
+        }
+        if (count($this->buffer) >= self::MAX_BUFFER) {
+            $this->flush();
+        }
+    }
+    
+    /**
+     * Write buffered entries: one file append, one INSERT for audit entries
+     */
+    public function flush() {
+        // Entries logged after this point (later shutdown functions) register a new flush
+        $this->flushRegistered = false;
+        
+        if ($this->dropped > 0) {
+            $this->buffer[] = json_encode($this->createLogEntry(self::WARNING, 'audit_log_entries_dropped', ['count' => $this->dropped]));
+            $this->dropped = 0;
+        }
+        if ($this->buffer) {
+            $lines = $this->buffer;
+            $this->buffer = [];
+            $this->writeToFile($lines);
+        }
+        if ($this->dbBuffer) {
+            $entries = $this->dbBuffer;
+            $this->dbBuffer = [];
+            $this->writeToDatabase($entries);
+        }
+    }
+    
+    /**
+     * Back-pressure for audit_logs: per-request cap, sampling when the error rate spikes
+     */
+    private function admitDatabaseEntry() {
+        if (count($this->dbBuffer) >= self::MAX_DB_ENTRIES) {
+            return false;
         }
+        if (!function_exists('apcu_inc') || !filter_var(ini_get('apc.enabled'), FILTER_VALIDATE_BOOLEAN)) {
+            return true;
+        }
+        $ok = false;
+        $count = apcu_inc('aze_log_errors_' . intdiv(time(), 60), 1, $ok, 120);
+        if (!$ok || $count <= self::DB_BURST_LIMIT) {
+            return true;
+        }
+        return $count % self::DB_BURST_SAMPLE === 0;
     }
     
     /**
@@ -126,25 +195,30 @@ class StructuredLogger {
     }
     
     /**
-     * Write log entry to file with rotation
+     * Append encoded entries to the log file with rotation
      */
-    private function writeToFile(array $logEntry) {
+    private function writeToFile(array $lines) {
         $filename = $this->getLogFilename();
+        $data = implode(PHP_EOL, $lines) . PHP_EOL;
         
-        // Check if rotation is needed
-        if (file_exists($filename) && filesize($filename) > $this->maxFileSize) {
+        // Check if rotation is needed (size is read once, then counted)
+        if (!isset(self::$fileSizes[$filename])) {
+            self::$fileSizes[$filename] = file_exists($filename) ? (int)filesize($filename) : 0;
+        }
+        if (self::$fileSizes[$filename] > $this->maxFileSize) {
             $this->rotateLogFiles();
+            self::$fileSizes[$filename] = 0;
         }
         
-        // Write log entry as JSON
-        $line = json_encode($logEntry) . PHP_EOL;
-        file_put_contents($filename, $line, FILE_APPEND | LOCK_EX);
+        if (file_put_contents($filename, $data, FILE_APPEND | LOCK_EX) !== false) {
+            self::$fileSizes[$filename] += strlen($data);
+        }
     }
     
     /**
-     * Write critical logs to database
+     * Write critical logs to database (one multi-row INSERT)
      */
-    private function writeToDatabase(array $logEntry) {
+    private function writeToDatabase(array $entries) {
         // Only write to DB if we have a connection
         if (!isset($GLOBALS['mysqli']) || !$GLOBALS['mysqli']) {
             return;
@@ -153,28 +227,32 @@ class StructuredLogger {
         try {
             $mysqli = $GLOBALS['mysqli'];
             
-            $stmt = $mysqli->prepare("
-                INSERT INTO audit_logs (
-                    timestamp, level, message, context, request_id, 
-                    user_id, ip_address, user_agent, uri
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ");
-            
-            if ($stmt) {
-                $context = json_encode($logEntry['context']);
-                $stmt->bind_param(
-                    'sssssssss',
+            $rows = [];
+            $params = [];
+            foreach ($entries as $logEntry) {
+                $rows[] = '(?, ?, ?, ?, ?, ?, ?, ?, ?)';
+                array_push(
+                    $params,
                     $logEntry['@timestamp'],
                     $logEntry['level'],
                     $logEntry['message'],
-                    $context,
+                    json_encode($logEntry['context']),
                     $logEntry['request']['id'],
                     $logEntry['user']['id'],
                     $logEntry['request']['ip'],
                     $logEntry['request']['user_agent'],
                     $logEntry['request']['uri']
                 );
-                
+            }
+            
+            $stmt = $mysqli->prepare("
+                INSERT INTO audit_logs (
+                    timestamp, level, message, context, request_id, 
+                    user_id, ip_address, user_agent, uri
+                ) VALUES " . implode(', ', $rows));
+            
+            if ($stmt) {
+                $stmt->bind_param(str_repeat('s', count($params)), ...$params);
                 $stmt->execute();
                 $stmt->close();
             }
@@ -1,7 +1,7 @@
 <?php
 /**
  * Time Entries API
- * Supports actions: start, stop, check_running
+ * Supports actions: start, stop, check_running, list (keyset-paginated, ?limit=&cursor=), summary (daily_totals)
  *
  * FIX (2025-10-20): session_name() is set by time-entries.php (entry point)
  * FIX (2025-10-20): Removed closing PHP tag to prevent output before send_response()
@@ -19,100 +19,40 @@ require_once __DIR__ . '/security-middleware.php';
 require_once __DIR__ . '/error-handler.php';
 require_once __DIR__ . '/auth_helpers.php';
 require_once __DIR__ . '/csrf-middleware.php';
-require_once __DIR__ . '/db.php';
+require_once __DIR__ . '/DatabaseConnection.php';
 require_once __DIR__ . '/InputValidationService.php';
-
-// Frühdiagnose: Schreibe Fatals dieses Endpunkts immer in test.html
-if (!function_exists('te_register_shutdown')) {
-    function te_register_shutdown() {
-        register_shutdown_function(function () {
-            $err = error_get_last();
-            if ($err) {
-                $f = __DIR__ . '/test.html';
-                $ts = date('Y-m-d H:i:s');
-                $out = "<hr><b>[$ts] time-entries.php | fatal</b><br>" . htmlspecialchars(json_encode($err));
-                @file_put_contents($f, $out . "\n", FILE_APPEND);
-            }
-        });
-    }
-    te_register_shutdown();
-}
-
-// Bootstrap-Log
-$__te_boot = function($label){
-    $f = __DIR__ . '/test.html';
-    $ts = date('Y-m-d H:i:s');
-    @file_put_contents($f, "<hr><b>[$ts] time-entries.php | $label</b><br>\n", FILE_APPEND);
-};
-$__te_boot('bootstrap');
+require_once __DIR__ . '/schema-capabilities.php';
+require_once __DIR__ . '/ip-location-index.php';
+require_once __DIR__ . '/keyset-pagination.php';
+require_once __DIR__ . '/user-locations.php';
+require_once __DIR__ . '/daily-totals.php';
+require_once __DIR__ . '/identity.php';
+require_once __DIR__ . '/request-trace.php';
 
 // Hilfsfunktion global definiert: späte Definition innerhalb anderer Funktionen kann zu Fatal führen
 if (!function_exists('resolveColumn')) {
     function resolveColumn(mysqli $conn, array $candidates): ?string {
-        $names = [];
-        if ($res = $conn->query("SHOW COLUMNS FROM time_entries")) {
-            while ($r = $res->fetch_assoc()) { $names[strtolower($r['Field'])] = true; }
-            $res->close();
-        }
-        foreach ($candidates as $c) { if (!empty($names[strtolower($c)])) return $c; }
-        return null;
+        return schema_resolve_column($conn, 'time_entries', $candidates);
     }
 }
 
 initialize_api();
 initSecurityMiddleware();
 
-// lightweight debug logger to /api/debug-time-entries.log
+// Debug-Tracing: in-memory, gesampelt (TRACE_SAMPLE_RATE), ein Log-Eintrag pro Request
+// über request-trace.php / StructuredLogger statt synchroner Appends pro Schritt
 function tlog($label, $data = null) {
-    if ((getenv('APP_ENV') === 'production') && (!filter_var(getenv('APP_DEBUG') ?: '0', FILTER_VALIDATE_BOOLEAN))) { return; }
-    $line = '[' . date('Y-m-d H:i:s') . "] time-entries.php | " . $label;
-    if ($data !== null) {
-        $line .= ' | ' . (is_string($data) ? $data : json_encode($data));
-    }
-    // Use absolute path relative to this script
-    $logFile = __DIR__ . '/debug-time-entries.log';
-    @file_put_contents($logFile, $line . "\n", FILE_APPEND);
+    trace_event((string)$label, $data);
 }
 
-// TEMP: HTML log to /api/test.html so you can view via browser
 function hlog($title, $data = null) {
-    if ((getenv('APP_ENV') === 'production') && (!filter_var(getenv('APP_DEBUG') ?: '0', FILTER_VALIDATE_BOOLEAN))) { return; }
-    $f = __DIR__ . '/test.html';
-    $ts = date('Y-m-d H:i:s');
-    $out = "<hr><b>[$ts] $title</b><br>";
-    if ($data !== null) {
-        $payload = is_string($data) ? $data : json_encode($data);
-        $out .= htmlspecialchars($payload);
-    }
-    @file_put_contents($f, $out . "\n", FILE_APPEND);
+    trace_event((string)$title, $data);
 }
 
-// Resolve authoritative user id from session (prefer Azure OID)
+// Resolve authoritative user id from session (identity.php: Azure OID, then username; session-cached)
 function resolveUserId(mysqli $conn, array $sessionUser): ?int {
-    // Fast path: trust session numeric id if present
-    if (isset($sessionUser['id']) && is_numeric($sessionUser['id'])) {
-        $sid = (int)$sessionUser['id'];
-        if ($sid > 0) { return $sid; }
-    }
-    $oid = $sessionUser['azure_oid'] ?? ($sessionUser['oid'] ?? null);
-    $username = $sessionUser['username'] ?? ($sessionUser['name'] ?? null);
-    // Try Azure OID first
-    if (!empty($oid)) {
-        if ($stmt = $conn->prepare("SELECT id FROM users WHERE azure_oid = ? LIMIT 1")) {
-            $stmt->bind_param('s', $oid);
-            if ($stmt->execute()) { $stmt->bind_result($rid); if ($stmt->fetch()) { $stmt->close(); return (int)$rid; } }
-            $stmt->close();
-        }
-    }
-    // Fallback by username/email
-    if (!empty($username)) {
-        if ($stmt = $conn->prepare("SELECT id FROM users WHERE username = ? LIMIT 1")) {
-            $stmt->bind_param('s', $username);
-            if ($stmt->execute()) { $stmt->bind_result($rid); if ($stmt->fetch()) { $stmt->close(); return (int)$rid; } }
-            $stmt->close();
-        }
-    }
-    return null;
+    $me = identity_resolve($conn, $sessionUser);
+    return $me['id'] ?? null;
 }
 
 $method = $_SERVER['REQUEST_METHOD'] ?? 'GET';
@@ -228,7 +168,14 @@ if (in_array(strtoupper($method), ['POST', 'PUT', 'PATCH', 'DELETE'], true)) {
     }
 }
 
-$conn = $conn; // mysqli from db.php
+$conn = DatabaseConnection::getInstance()->getConnection();
+
+// Lesende Aktionen schreiben nichts in die Session: Identität auflösen (wird dort
+// zwischengespeichert), danach Session-Lock freigeben
+if (strtoupper($method) === 'GET') {
+    identity_resolve($conn, $sessionUser);
+    release_session_lock();
+}
 $validator = InputValidationService::getInstance();
 
 try {
@@ -239,6 +186,18 @@ try {
         case 'check_running':
             handleCheckRunning($conn, $sessionUser, $validator);
             break;
+        case 'list':
+            if ($method !== 'GET') {
+                send_response(405, ['message' => 'Method Not Allowed']);
+            }
+            handleList($conn, $sessionUser);
+            break;
+        case 'summary':
+            if ($method !== 'GET') {
+                send_response(405, ['message' => 'Method Not Allowed']);
+            }
+            handleSummary($conn, $sessionUser);
+            break;
         case 'start':
             if ($method !== 'POST') {
                 send_response(405, ['message' => 'Method Not Allowed']);
@@ -333,7 +292,6 @@ function handleCheckRunning(mysqli $conn, array $sessionUser, InputValidationSer
     $stopCol = resolveColumn($conn, ['stop_time','end_time']);
     $statusCol = resolveColumn($conn, ['status']);
     $startCol = resolveColumn($conn, ['start_time','start']);
-    $statusCol = resolveColumn($conn, ['status']);
     if (!$startCol) { $startCol = 'start_time'; }
     $whereStop = '';
     if ($statusCol) {
@@ -386,6 +344,113 @@ function handleCheckRunning(mysqli $conn, array $sessionUser, InputValidationSer
     }
 }
 
+/**
+ * Time entries, newest first, one page per request (keyset cursor over (date, start_time, id)).
+ * Role filter as in login.php: Admin all, Bereichsleiter/Standortleiter by assigned locations,
+ * everyone else only their own entries.
+ */
+function handleList(mysqli $conn, array $sessionUser): void {
+    $userId = resolveUserId($conn, $sessionUser);
+    if (!$userId) { tlog('list_user_not_found', $sessionUser); send_response(404, ['message' => 'User not found']); }
+    $role = identity_role($conn, $sessionUser);
+
+    $limit = keyset_limit();
+    [$where, $params] = keyset_condition(['te.date', 'te.start_time', 'te.id'], keyset_cursor(3));
+    $types = str_repeat('s', count($params));
+    $sql = "SELECT te.id, te.user_id AS userId, te.username, te.date, te.start_time AS startTime, te.stop_time AS stopTime, te.location, te.role, te.created_at AS createdAt, te.updated_by AS updatedBy, te.updated_at AS updatedAt
+            FROM time_entries te WHERE ";
+    if ($role === 'Admin') {
+        $sql .= $where;
+    } elseif ($role === 'Bereichsleiter' || $role === 'Standortleiter') {
+        $assignedLocations = identity_resolve($conn, $sessionUser)['locations'] ?? [];
+        if (empty($assignedLocations)) {
+            send_response(200, ['items' => [], 'count' => 0, 'nextCursor' => null]);
+        }
+        [$scope, $scopeTypes, $scopeParams] = user_locations_scope($conn, 'te.user_id', $assignedLocations);
+        $sql .= "$scope AND $where";
+        $params = array_merge($scopeParams, $params);
+        $types = $scopeTypes . $types;
+    } else {
+        $sql .= "te.user_id = ? AND $where";
+        array_unshift($params, $userId);
+        $types = 'i' . $types;
+    }
+    $sql .= " ORDER BY te.date DESC, te.start_time DESC, te.id DESC LIMIT " . ($limit + 1);
+
+    $stmt = $conn->prepare($sql);
+    if (!$stmt) { tlog('list_prepare_failed', $conn->error . ' | sql=' . $sql); send_response(500, ['message' => 'Database error']); }
+    if ($types !== '') { $stmt->bind_param($types, ...$params); }
+    if (!$stmt->execute()) { tlog('list_execute_failed', $stmt->error); send_response(500, ['message' => 'Database error']); }
+    $res = $stmt->get_result();
+    $rows = $res ? $res->fetch_all(MYSQLI_ASSOC) : [];
+    $stmt->close();
+
+    [$rows, $next] = keyset_page($rows, $limit, function ($r) { return [$r['date'], $r['startTime'], (int)$r['id']]; });
+    send_response(200, ['items' => $rows, 'count' => count($rows), 'nextCursor' => $next]);
+}
+
+/**
+ * Per-day totals from daily_totals (one row per user and day instead of every segment),
+ * newest first, keyset cursor over (date, user_id). Optional filters: from, to (Y-m-d), userId.
+ * Same role scope as handleList.
+ */
+function handleSummary(mysqli $conn, array $sessionUser): void {
+    if (!daily_totals_available($conn)) {
+        send_response(501, ['error' => 'NOT_AVAILABLE', 'message' => 'daily_totals fehlt (migrations/007_daily_totals.sql).']);
+    }
+    $userId = resolveUserId($conn, $sessionUser);
+    if (!$userId) { tlog('summary_user_not_found', $sessionUser); send_response(404, ['message' => 'User not found']); }
+    $role = identity_role($conn, $sessionUser);
+
+    $limit = keyset_limit();
+    [$where, $params] = keyset_condition(['dt.date', 'dt.user_id'], keyset_cursor(2));
+    $types = str_repeat('s', count($params));
+    $sql = "SELECT dt.user_id AS userId, u.username, u.display_name AS displayName, dt.date, dt.total_seconds AS totalSeconds,
+                   dt.pause_seconds AS pauseSeconds, dt.first_start AS firstStart, dt.last_stop AS lastStop, dt.segment_count AS segmentCount
+            FROM daily_totals dt
+            JOIN users u ON u.id = dt.user_id
+            WHERE $where";
+    foreach (['from' => '>=', 'to' => '<='] as $param => $op) {
+        if (!isset($_GET[$param]) || $_GET[$param] === '') { continue; }
+        if (!preg_match('/^\d{4}-\d{2}-\d{2}$/', (string)$_GET[$param])) {
+            send_response(400, ['error' => 'VALIDATION_ERROR', 'message' => "Ungültiges Datum: $param"]);
+        }
+        $sql .= " AND dt.date $op ?";
+        $params[] = (string)$_GET[$param];
+        $types .= 's';
+    }
+    $filterUser = isset($_GET['userId']) ? (int)$_GET['userId'] : 0;
+    if ($filterUser > 0) {
+        $sql .= " AND dt.user_id = ?";
+        $params[] = $filterUser;
+        $types .= 'i';
+    }
+
+    // Gleiche Regel wie der Export (daily_totals_scope)
+    $scope = daily_totals_scope($role, $userId, identity_resolve($conn, $sessionUser)['locations'] ?? []);
+    if (($scope['locations'] ?? null) === []) {
+        send_response(200, ['items' => [], 'count' => 0, 'nextCursor' => null]);
+    }
+    if ($scopeSql = daily_totals_scope_sql($conn, $scope)) {
+        [$scopeWhere, $scopeTypes, $scopeParams] = $scopeSql;
+        $sql .= " AND $scopeWhere";
+        $params = array_merge($params, $scopeParams);
+        $types .= $scopeTypes;
+    }
+    $sql .= " ORDER BY dt.date DESC, dt.user_id DESC LIMIT " . ($limit + 1);
+
+    $stmt = $conn->prepare($sql);
+    if (!$stmt) { tlog('summary_prepare_failed', $conn->error . ' | sql=' . $sql); send_response(500, ['message' => 'Database error']); }
+    if ($types !== '') { $stmt->bind_param($types, ...$params); }
+    if (!$stmt->execute()) { tlog('summary_execute_failed', $stmt->error); send_response(500, ['message' => 'Database error']); }
+    $res = $stmt->get_result();
+    $rows = $res ? $res->fetch_all(MYSQLI_ASSOC) : [];
+    $stmt->close();
+
+    [$rows, $next] = keyset_page($rows, $limit, function ($r) { return [$r['date'], (int)$r['userId']]; });
+    send_response(200, ['items' => $rows, 'count' => count($rows), 'nextCursor' => $next]);
+}
+
 function handleStart(mysqli $conn, array $sessionUser, InputValidationService $validator): void {
     tlog('start_begin');
     hlog('start_begin');
@@ -399,157 +464,112 @@ function handleStart(mysqli $conn, array $sessionUser, InputValidationService $v
 
     // Sanitize Username sicher über ValidationService (StringSanitizer nicht erforderlich)
     $username = $validator->sanitizeString($sessionUser['username'] ?? ($sessionUser['name'] ?? ''));
+    // Id/role come from identity.php; the DB is only asked when the session cache is stale
     $userId = resolveUserId($conn, $sessionUser);
     if (!$userId) { tlog('start_user_not_found', $sessionUser); send_response(404, ['message' => 'User not found']); }
     tlog('start_user_resolved', $userId);
     hlog('start_user_resolved', $userId);
 
-    // Get user role from users table (needed for time_entries.role field)
-    $userRole = 'employee'; // Default fallback
-    if ($stmt = $conn->prepare("SELECT role FROM users WHERE id = ? LIMIT 1")) {
-        $stmt->bind_param('i', $userId);
-        if ($stmt->execute()) {
-            $stmt->bind_result($roleResult);
-            if ($stmt->fetch()) {
-                $userRole = $roleResult;
-            }
-        }
+    // User role (needed for time_entries.role field)
+    $userRole = identity_role($conn, $sessionUser);
+
+    // Available columns (cached, see schema-capabilities.php)
+    $cols = schema_capabilities($conn)['time_entries'] ?? [];
+    tlog('start_cols', array_keys($cols));
+
+    // Prevent multiple running timers: with migrations/003_open_timer_guard.sql the unique index
+    // (user_id, open_timer_date) rejects the INSERT itself - no check-then-insert race.
+    // Without it fall back to the existence check.
+    $hasGuard = !empty($cols['open_timer_date']);
+    if (!$hasGuard) {
+        $stopCol = resolveColumn($conn, ['stop_time','end_time']);
+        $statusCol = resolveColumn($conn, ['status']);
+        $whereStop = $statusCol ? " AND `status`='running'" : ($stopCol ? (" AND `".$conn->real_escape_string($stopCol)."` IS NULL") : '');
+        $sqlExist = "SELECT `id` FROM `time_entries` WHERE `user_id` = ? AND `date` = ?" . $whereStop . " LIMIT 1";
+        hlog('start_exist_sql', $sqlExist);
+        $stmt = $conn->prepare($sqlExist);
+        if (!$stmt) { tlog('start_prepare_exists_failed', $conn->error . ' | sql=' . $sqlExist); hlog('start_prepare_exists_failed', $conn->error); send_response(500, ['message' => 'Database error']); }
+        $stmt->bind_param('is', $userId, $payload['date']);
+        if (!$stmt->execute()) { tlog('start_execute_exists_failed', $stmt->error); hlog('start_execute_exists_failed', $stmt->error); send_response(500, ['message' => 'Database error']); }
+        $stmt->store_result();
+        $existing = $stmt->num_rows > 0;
+        $stmt->free_result();
         $stmt->close();
+        tlog('start_exists_checked', ['existing' => $existing]);
+        if ($existing) {
+            send_response(409, [
+                'error' => 'TIMER_ALREADY_RUNNING',
+                'message' => 'Die Zeiterfassung läuft bereits.'
+            ]);
+        }
     }
 
-    // Prevent multiple running timers
-    $stopCol = resolveColumn($conn, ['stop_time','end_time']);
-    $statusCol = resolveColumn($conn, ['status']);
-    $whereStop = $statusCol ? " AND `status`='running'" : ($stopCol ? (" AND `".$conn->real_escape_string($stopCol)."` IS NULL") : '');
-    $sqlExist = "SELECT `id` FROM `time_entries` WHERE `user_id` = ? AND `date` = ?" . $whereStop . " LIMIT 1";
-    hlog('start_exist_sql', $sqlExist);
-    $stmt = $conn->prepare($sqlExist);
-    if (!$stmt) { tlog('start_prepare_exists_failed', $conn->error . ' | sql=' . $sqlExist); hlog('start_prepare_exists_failed', $conn->error); send_response(500, ['message' => 'Database error']); }
-    $stmt->bind_param('is', $userId, $payload['date']);
-    if (!$stmt->execute()) { tlog('start_execute_exists_failed', $stmt->error); hlog('start_execute_exists_failed', $stmt->error); send_response(500, ['message' => 'Database error']); }
-    $stmt->store_result();
-    $existing = $stmt->num_rows > 0;
-    $stmt->free_result();
-    $stmt->close();
-    tlog('start_exists_checked', ['existing' => $existing]);
-    if ($existing) {
-        send_response(409, [
-            'error' => 'TIMER_ALREADY_RUNNING',
-            'message' => 'Die Zeiterfassung läuft bereits.'
-        ]);
-    }
-
-    // Insert new entry (dynamic columns to match live schema)
-    $conn->begin_transaction();
+    // IP-basierte Standorterkennung (Default: Home Office)
+    $clientIP = $_SERVER['REMOTE_ADDR'] ?? '';
+    $detectedLocation = ip_location_detect($clientIP);
+    tlog('start_location_detected', ['ip' => $clientIP, 'location' => $detectedLocation]);
+
+    // Build insert columns/values based on available columns (single statement, autocommit)
+    $fields = ['`user_id`', '`date`', '`start_time`'];
+    $values = [$userId, $payload['date'], $payload['startTime']];
+    if (!empty($cols['username'])) { $fields[] = '`username`'; $values[] = $username; }
+    if (!empty($cols['updated_by'])) { $fields[] = '`updated_by`'; $values[] = $payload['createdBy']; }
+    if (!empty($cols['status'])) { $fields[] = '`status`'; $values[] = 'running'; }
+    // Location is set directly from IP detection (overrides DB defaults like 'web')
+    if (!empty($cols['location'])) { $fields[] = '`location`'; $values[] = $detectedLocation; }
+    if (!empty($cols['role'])) { $fields[] = '`role`'; $values[] = $userRole; }
+    $placeholders = array_fill(0, count($values), '?');
+    if (!empty($cols['created_at'])) { $fields[] = '`created_at`'; $placeholders[] = 'NOW()'; }
+    if (!empty($cols['updated_at'])) { $fields[] = '`updated_at`'; $placeholders[] = 'NOW()'; }
+
+    $sql = "INSERT INTO time_entries (" . implode(',', $fields) . ") VALUES (" . implode(',', $placeholders) . ")";
+    tlog('start_insert_sql', $sql);
+    hlog('start_insert_sql', $sql);
+    $bindTypes = '';
+    foreach ($values as $val) { $bindTypes .= is_int($val) ? 'i' : 's'; }
+
+    $errno = 0;
+    $error = '';
+    $span = trace_begin('start_insert');
     try {
-        // Detect available columns
-        $cols = [];
-        if ($res = $conn->query("SHOW COLUMNS FROM time_entries")) {
-            while ($r = $res->fetch_assoc()) { $cols[strtolower($r['Field'])] = true; }
-            $res->close();
-        }
-        tlog('start_cols', array_keys($cols));
-
-        // IP-basierte Standorterkennung
-        $detectedLocation = 'Home Office'; // Default
-        $clientIP = $_SERVER['REMOTE_ADDR'] ?? '';
-        if ($clientIP) {
-            $ipMapFile = __DIR__ . '/../cache/ip-location-map.json';
-            if (file_exists($ipMapFile) && is_readable($ipMapFile)) {
-                $ipMapData = json_decode(@file_get_contents($ipMapFile), true);
-                if (isset($ipMapData['entries']) && is_array($ipMapData['entries'])) {
-                    foreach ($ipMapData['entries'] as $entry) {
-                        $prefix = trim($entry['prefix'] ?? '');
-                        $location = trim($entry['location'] ?? '');
-                        if ($prefix && $location && strpos($clientIP, $prefix) === 0) {
-                            $detectedLocation = $location;
-                            break;
-                        }
-                    }
-                }
-            }
-        }
-        $sessionLoc = $detectedLocation;
-        tlog('start_location_detected', ['ip' => $clientIP, 'location' => $sessionLoc]);
-        // Build insert columns/params based on available columns
-        $fields = ['`user_id`', '`date`', '`start_time`'];
-        $placeholders = ['?', '?', '?'];
-        $types = 'iss';
-        $values = [$userId, $payload['date'], $payload['startTime']];
-        if (!empty($cols['username'])) { $fields[] = '`username`'; $placeholders[] = '?'; $types .= 's'; $values[] = $username; }
-        if (!empty($cols['updated_by'])) { $fields[] = '`updated_by`'; $placeholders[] = '?'; $types .= 's'; $values[] = $payload['createdBy']; }
-        if (!empty($cols['status'])) { $fields[] = '`status`'; $placeholders[] = '?'; $types .= 's'; $values[] = 'running'; }
-        // Set location if column exists (use session-detected location or Home Office)
-        if (!empty($cols['location'])) {
-            $loc = $sessionUser['location'] ?? 'Home Office';
-            $fields[] = '`location`';
-            $placeholders[] = '?';
-            $types .= 's';
-            $values[] = $loc;
-        }
-        // Set role if column exists (fetched from users table)
-        if (!empty($cols['role'])) {
-            $fields[] = '`role`';
-            $placeholders[] = '?';
-            $types .= 's';
-            $values[] = $userRole;
-        }
-        if (!empty($cols['created_at'])) { $fields[] = '`created_at`'; $placeholders[] = 'NOW()'; }
-        if (!empty($cols['updated_at'])) { $fields[] = '`updated_at`'; $placeholders[] = 'NOW()'; }
-
-        // Build SQL; handle NOW() (no placeholder) positions
-        $ph = [];
-        $bindIndices = [];
-        $vIndex = 0;
-        foreach ($placeholders as $i => $p) {
-            if ($p === 'NOW()') { $ph[] = 'NOW()'; }
-            else { $ph[] = '?'; $bindIndices[] = $i; }
-        }
-        $sql = "INSERT INTO time_entries (" . implode(',', $fields) . ") VALUES (" . implode(',', $ph) . ")";
-        tlog('start_insert_sql', $sql);
-        hlog('start_insert_sql', $sql);
         $stmt = $conn->prepare($sql);
         if (!$stmt) { tlog('start_prepare_insert_failed', $conn->error . ' | sql=' . $sql); hlog('start_prepare_insert_failed', $conn->error); throw new RuntimeException('Prepare failed: ' . $conn->error); }
-
-        // Build bind params according to $types and $values mapping
-        // We only bind for '?' placeholders, in the order they appeared
-        $bindValues = [];
-        $bindTypes = '';
-        // Build sequence values in the same order as dynamic additions above
-        $sequenceValues = [$userId, $payload['date'], $payload['startTime']];
-        if (!empty($cols['username'])) { $sequenceValues[] = $username; }
-        if (!empty($cols['updated_by'])) { $sequenceValues[] = $payload['createdBy']; }
-        if (!empty($cols['status'])) { $sequenceValues[] = 'running'; }
-        if (!empty($cols['location'])) { $sequenceValues[] = $sessionUser['location'] ?? 'Home Office'; }
-        if (!empty($cols['role'])) { $sequenceValues[] = $userRole; }
-        // Types accordingly
-        $bindTypes = '';
-        foreach ($sequenceValues as $idx => $val) {
-            $bindTypes .= is_int($val) ? 'i' : 's';
-            $bindValues[] = $val;
-        }
-        // Bind
-        $stmt->bind_param($bindTypes, ...$bindValues);
-        if (!$stmt->execute()) { tlog('start_execute_insert_failed', $stmt->error); hlog('start_execute_insert_failed', $stmt->error); throw new RuntimeException('Execute failed: ' . $stmt->error); }
+        $stmt->bind_param($bindTypes, ...$values);
+        if (!$stmt->execute()) { $errno = $stmt->errno; $error = $stmt->error; }
         $stmt->close();
-        $newId = $conn->insert_id;
-        // Safety fix: ensure location is set (overrides defaults like 'web' if present)
-        if (!empty($cols['location'])) {
-            $loc = $sessionLoc;
-            // Erzwinge Standort (unabhängig vom DB-Default)
-            $u = $conn->prepare("UPDATE time_entries SET location = ? WHERE id = ?");
-            if ($u) { $u->bind_param('si', $loc, $newId); @$u->execute(); $u->close(); }
-        }
-        tlog('start_success', $newId);
-        hlog('start_success', $newId);
-        $conn->commit();
-        send_response(200, ['id' => $newId]);
+    } catch (mysqli_sql_exception $e) {
+        // mysqli in strict report mode throws instead of returning false
+        $errno = $e->getCode();
+        $error = $e->getMessage();
     } catch (Throwable $e) {
         tlog('start_exception', ['type' => get_class($e), 'message' => $e->getMessage()]);
         hlog('start_exception', ['type' => get_class($e), 'message' => $e->getMessage()]);
-        $conn->rollback();
         send_response(500, ['error' => 'DATABASE_ERROR', 'message' => 'Ein Datenbankfehler ist aufgetreten.']);
     }
+    trace_end($span, ['errno' => $errno]);
+
+    if ($errno === 1062 && $hasGuard) {
+        // Duplicate key on uniq_user_open_timer: a timer for this user and day is already running
+        tlog('start_conflict', ['user' => $userId, 'date' => $payload['date']]);
+        send_response(409, [
+            'error' => 'TIMER_ALREADY_RUNNING',
+            'message' => 'Die Zeiterfassung läuft bereits.'
+        ]);
+    }
+    if ($errno !== 0) {
+        tlog('start_execute_insert_failed', $error);
+        hlog('start_execute_insert_failed', $error);
+        send_response(500, ['error' => 'DATABASE_ERROR', 'message' => 'Ein Datenbankfehler ist aufgetreten.']);
+    }
+
+    $newId = $conn->insert_id;
+    // Tagessumme nachziehen; ein Fehler hier darf den bereits gestarteten Timer nicht scheitern lassen
+    if (!daily_totals_refresh($conn, $userId, $payload['date'])) {
+        tlog('start_daily_totals_failed', $conn->error);
+    }
+    tlog('start_success', $newId);
+    hlog('start_success', $newId);
+    send_response(200, ['id' => $newId]);
 }
 
 function handleStop(mysqli $conn, array $sessionUser, InputValidationService $validator): void {
@@ -564,7 +584,7 @@ function handleStop(mysqli $conn, array $sessionUser, InputValidationService $va
 
     // Load entry
     $stmt = $conn->prepare(
-        "SELECT id, date, start_time AS startTime, stop_time AS stopTime FROM time_entries WHERE id = ? LIMIT 1"
+        "SELECT id, user_id, date, start_time AS startTime, stop_time AS stopTime FROM time_entries WHERE id = ? LIMIT 1"
     );
     if (!$stmt) {
         tlog('stop_prepare_select_failed', $conn->error);
@@ -572,9 +592,9 @@ function handleStop(mysqli $conn, array $sessionUser, InputValidationService $va
     }
     $stmt->bind_param('i', $entryId);
     if (!$stmt->execute()) { tlog('stop_select_execute_failed', $stmt->error); send_response(500, ['message' => 'Database error']); }
-    $stmt->bind_result($sid, $sdate, $sstart, $sstop);
+    $stmt->bind_result($sid, $suser, $sdate, $sstart, $sstop);
     $row = null;
-    if ($stmt->fetch()) { $row = ['id' => $sid, 'date' => $sdate, 'startTime' => $sstart, 'stopTime' => $sstop]; }
+    if ($stmt->fetch()) { $row = ['id' => $sid, 'userId' => (int)$suser, 'date' => $sdate, 'startTime' => $sstart, 'stopTime' => $sstop]; }
     $stmt->close();
 
     if (!$row) {
@@ -611,12 +631,8 @@ function handleStop(mysqli $conn, array $sessionUser, InputValidationService $va
 
     $conn->begin_transaction();
     try {
-        // Detect if status column exists to mark completed
-        $cols = [];
-        if ($res = $conn->query("SHOW COLUMNS FROM time_entries")) {
-            while ($r = $res->fetch_assoc()) { $cols[strtolower($r['Field'])] = true; }
-            $res->close();
-        }
+        // Detect if status column exists to mark completed (cached, see schema-capabilities.php)
+        $cols = schema_capabilities($conn)['time_entries'] ?? [];
         $hasStatus = !empty($cols['status']);
         $sql = "UPDATE time_entries SET stop_time = ?, updated_by = ?, updated_at = NOW()" . ($hasStatus? ", status='completed'" : "") . " WHERE id = ? AND stop_time IS NULL";
         $stmt = $conn->prepare($sql);
@@ -625,37 +641,24 @@ function handleStop(mysqli $conn, array $sessionUser, InputValidationService $va
             throw new RuntimeException('Prepare failed: ' . $conn->error);
         }
         $stmt->bind_param('ssi', $payload['stopTime'], $updatedBy, $entryId);
+        $span = trace_begin('stop_update');
         if (!$stmt->execute()) {
             tlog('stop_execute_update_failed', $stmt->error);
             throw new RuntimeException('Execute failed: ' . $stmt->error);
         }
         $affected = $stmt->affected_rows;
         $stmt->close();
+        trace_end($span, ['affected' => $affected]);
         // Erzwinge Standort auch beim Stop (sollte bereits gesetzt sein, ist hier idempotent)
         if (!empty($cols['location'])) {
             // IP-basierte Standorterkennung beim Stop
-            $detectedLocation = 'Home Office';
-            $clientIP = $_SERVER['REMOTE_ADDR'] ?? '';
-            if ($clientIP) {
-                $ipMapFile = __DIR__ . '/../cache/ip-location-map.json';
-                if (file_exists($ipMapFile) && is_readable($ipMapFile)) {
-                    $ipMapData = json_decode(@file_get_contents($ipMapFile), true);
-                    if (isset($ipMapData['entries']) && is_array($ipMapData['entries'])) {
-                        foreach ($ipMapData['entries'] as $entry) {
-                            $prefix = trim($entry['prefix'] ?? '');
-                            $location = trim($entry['location'] ?? '');
-                            if ($prefix && $location && strpos($clientIP, $prefix) === 0) {
-                                $detectedLocation = $location;
-                                break;
-                            }
-                        }
-                    }
-                }
-            }
-            $loc = $detectedLocation;
+            $loc = ip_location_detect($_SERVER['REMOTE_ADDR'] ?? '');
             $u = $conn->prepare("UPDATE time_entries SET location = ? WHERE id = ?");
             if ($u) { $u->bind_param('si', $loc, $entryId); @$u->execute(); $u->close(); }
         }
+        if ($affected > 0 && !daily_totals_refresh($conn, $row['userId'], $row['date'])) {
+            throw new RuntimeException('Daily totals refresh failed: ' . $conn->error);
+        }
         $conn->commit();
 
         if ($affected === 0) {
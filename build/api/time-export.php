@@ -0,0 +1,375 @@
+<?php
+/**
+ * Time Export - server-side CSV / PDF export of the per-day totals
+ *
+ * Rows come from daily_totals (migration 007) through an unbuffered prepared
+ * statement and are written out one by one, so memory stays constant no matter
+ * how many days are exported:
+ *   - CSV is streamed with fputcsv() to php://output (chunked transfer)
+ *   - PDF is a queued job: export.php stores the job in build/cache/exports/,
+ *     it is rendered after the response (fastcgi_finish_request) or by
+ *     scripts/export-worker.php, and downloaded once it is done
+ *
+ * Columns match src/utils/export.ts (Soll = weekly_hours / number of workdays).
+ *
+ * Usage:
+ *   $filter = time_export_filter($_GET);                       // 400 on invalid input
+ *   $scope  = time_export_scope($conn, $userId, $role, $filter);
+ *   time_export_stream_csv(time_export_rows($conn, $filter, $scope), 'arbeitszeiten.csv');
+ */
+
+if (!defined('API_GUARD')) {
+    die('Direct access not permitted');
+}
+
+require_once __DIR__ . '/daily-totals.php';
+require_once __DIR__ . '/user-locations.php';
+
+const TIME_EXPORT_HEADERS = ['Username', 'Datum', 'Startzeit', 'Stoppzeit', 'Gesamtzeit', 'Pause', 'Soll/Ist-Diff.', 'Standort', 'Rolle'];
+const TIME_EXPORT_FLUSH_ROWS = 500;
+const TIME_EXPORT_JOB_TTL = 86400;
+
+function time_export_dir(): string {
+    return __DIR__ . '/../cache/exports';
+}
+
+/**
+ * Validated filter from request parameters: from, to (Y-m-d), location, userId
+ */
+function time_export_filter(array $src): array {
+    $filter = ['from' => null, 'to' => null, 'location' => null, 'userId' => null];
+    foreach (['from', 'to'] as $key) {
+        $value = trim((string)($src[$key] ?? ''));
+        if ($value === '') { continue; }
+        $d = DateTime::createFromFormat('!Y-m-d', $value);
+        if (!$d || $d->format('Y-m-d') !== $value) {
+            send_response(400, ['error' => 'VALIDATION_ERROR', 'message' => "Ungültiges Datum: $key"]);
+        }
+        $filter[$key] = $value;
+    }
+    $location = trim((string)($src['location'] ?? ''));
+    if ($location !== '') { $filter['location'] = $location; }
+    if (isset($src['userId']) && (int)$src['userId'] > 0) { $filter['userId'] = (int)$src['userId']; }
+    return $filter;
+}
+
+/**
+ * Which users the caller may export (daily_totals_scope(), the rule of the summary),
+ * resolved once so a queued job does not need the session. A location filter
+ * narrows the scope (403 if the location is not assigned to a leader).
+ */
+function time_export_scope(mysqli $conn, int $userId, string $role, array $filter): array {
+    $isLeader = $role === 'Bereichsleiter' || $role === 'Standortleiter';
+    $scope = daily_totals_scope($role, $userId, $isLeader ? get_user_assigned_locations($conn, $userId) : []);
+    if ($filter['location'] === null || isset($scope['userId'])) {
+        return $scope;
+    }
+    if (isset($scope['locations']) && !in_array($filter['location'], $scope['locations'], true)) {
+        send_response(403, ['message' => 'Standort nicht zugeordnet']);
+    }
+    return ['locations' => [$filter['location']]];
+}
+
+function time_export_duration(int $seconds): string {
+    return sprintf('%02d:%02d:%02d', intdiv($seconds, 3600), intdiv($seconds % 3600, 60), $seconds % 60);
+}
+
+/**
+ * Export rows (display values, newest day first), fetched unbuffered one by one.
+ * No other query may run on $conn until the generator is exhausted.
+ */
+function time_export_rows(mysqli $conn, array $filter, array $scope): Generator {
+    $where = [];
+    $types = '';
+    $params = [];
+    if ($filter['from'] !== null) { $where[] = 'dt.date >= ?'; $types .= 's'; $params[] = $filter['from']; }
+    if ($filter['to'] !== null) { $where[] = 'dt.date <= ?'; $types .= 's'; $params[] = $filter['to']; }
+    if ($filter['userId'] !== null) { $where[] = 'dt.user_id = ?'; $types .= 'i'; $params[] = $filter['userId']; }
+    if ($scopeSql = daily_totals_scope_sql($conn, $scope)) {
+        [$sql, $scopeTypes, $scopeParams] = $scopeSql;
+        $where[] = $sql; $types .= $scopeTypes; $params = array_merge($params, $scopeParams);
+    }
+    // Standort des ersten Segments des Tages (Index idx_user_date_start)
+    $sql = "SELECT u.display_name, dt.date, dt.first_start, dt.last_stop, dt.total_seconds, dt.pause_seconds,
+                   md.weekly_hours, JSON_LENGTH(md.workdays),
+                   (SELECT te.location FROM time_entries te WHERE te.user_id = dt.user_id AND te.date = dt.date
+                    ORDER BY te.start_time, te.id LIMIT 1),
+                   u.role
+            FROM daily_totals dt
+            JOIN users u ON u.id = dt.user_id
+            LEFT JOIN master_data md ON md.user_id = dt.user_id"
+         . ($where ? ' WHERE ' . implode(' AND ', $where) : '')
+         . " ORDER BY dt.date DESC, dt.first_start, dt.user_id";
+
+    $stmt = $conn->prepare($sql);
+    if (!$stmt) {
+        throw new RuntimeException('Prepare failed: ' . $conn->error);
+    }
+    if ($types !== '') { $stmt->bind_param($types, ...$params); }
+    if (!$stmt->execute()) {
+        $error = $stmt->error;
+        $stmt->close();
+        throw new RuntimeException('Execute failed: ' . $error);
+    }
+    // Without store_result() rows are read from the connection as they are fetched
+    $stmt->bind_result($name, $date, $firstStart, $lastStop, $total, $pause, $weeklyHours, $workdays, $location, $role);
+    try {
+        while ($stmt->fetch()) {
+            $soll = ($weeklyHours !== null && (int)$workdays > 0) ? (int)round((float)$weeklyHours / (int)$workdays * 3600) : 0;
+            $diff = (int)$total - $soll;
+            yield [
+                (string)$name,
+                date('j.n.Y', strtotime((string)$date)),
+                (string)$firstStart,
+                (string)$lastStop,
+                time_export_duration((int)$total),
+                time_export_duration((int)$pause),
+                ($diff >= 0 ? '+' : '-') . time_export_duration(abs($diff)),
+                (string)$location,
+                (string)$role,
+            ];
+        }
+    } finally {
+        $stmt->close();
+    }
+}
+
+/**
+ * Stream rows as semicolon separated CSV download (same layout as the client export)
+ */
+function time_export_stream_csv(iterable $rows, string $filename): void {
+    // Gepufferte Ausgabe verwerfen, damit jede Zeile direkt rausgeht
+    while (ob_get_level() > 0) { ob_end_clean(); }
+    header('Content-Type: text/csv; charset=utf-8');
+    header('Content-Disposition: attachment; filename="' . $filename . '"');
+    header('Cache-Control: no-store');
+    header('X-Accel-Buffering: no');
+
+    $out = fopen('php://output', 'w');
+    fputcsv($out, TIME_EXPORT_HEADERS, ';');
+    $n = 0;
+    foreach ($rows as $row) {
+        fputcsv($out, $row, ';');
+        if (++$n % TIME_EXPORT_FLUSH_ROWS === 0) { flush(); }
+    }
+    fclose($out);
+    flush();
+}
+
+/**
+ * Minimal streaming PDF writer for a single table (A4 landscape, Helvetica).
+ * Pages are written to the file as soon as they are full; only object offsets stay in memory.
+ */
+class TimeExportPdf {
+    private const WIDTH = 842;
+    private const HEIGHT = 595;
+    private const MARGIN = 36;
+    private const FONT_SIZE = 8;
+    private const ROW_HEIGHT = 12;
+    // Username, Datum, Start, Stop, Gesamt, Pause, Diff, Standort (like exportToPdf, without Rolle)
+    private const COLUMNS = [170, 70, 60, 60, 70, 60, 80, 200];
+
+    private $fh;
+    private array $offsets = [];
+    private array $pages = [];
+    private int $nextObject = 4; // 1 catalog, 2 pages, 3/4 fonts
+    private string $content = '';
+    private float $y = 0;
+    private string $title;
+
+    public function __construct(string $path, string $title) {
+        $this->fh = fopen($path, 'wb');
+        if (!$this->fh) {
+            throw new RuntimeException("Cannot write $path");
+        }
+        $this->title = $title;
+        $this->write("%PDF-1.4\n%\xE2\xE3\xCF\xD3\n");
+        $this->object(3, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>');
+        $this->object(4, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>');
+    }
+
+    public function addRow(array $cells): void {
+        if ($this->content === '' || $this->y < self::MARGIN + self::ROW_HEIGHT) {
+            $this->newPage();
+        }
+        $this->cells($cells, 'F1');
+    }
+
+    public function close(): void {
+        if ($this->content === '') {
+            $this->newPage();
+        }
+        $this->flushPage();
+        $kids = implode(' ', array_map(fn($id) => "$id 0 R", $this->pages));
+        $this->object(2, '<< /Type /Pages /Kids [' . $kids . '] /Count ' . count($this->pages) . ' >>');
+        $this->object(1, '<< /Type /Catalog /Pages 2 0 R >>');
+
+        $xref = ftell($this->fh);
+        $count = $this->nextObject + 1;
+        ksort($this->offsets);
+        $this->write("xref\n0 $count\n0000000000 65535 f \n");
+        for ($i = 1; $i < $count; $i++) {
+            $this->write(sprintf("%010d 00000 n \n", $this->offsets[$i] ?? 0));
+        }
+        $this->write("trailer\n<< /Size $count /Root 1 0 R >>\nstartxref\n$xref\n%%EOF\n");
+        fclose($this->fh);
+    }
+
+    private function newPage(): void {
+        $this->flushPage();
+        $this->y = self::HEIGHT - self::MARGIN;
+        $page = count($this->pages) + 1;
+        $this->content = 'BT /F2 11 Tf ' . self::MARGIN . ' ' . $this->y . ' Td (' . $this->text($this->title . "  -  Seite $page") . ") Tj ET\n";
+        $this->y -= 2 * self::ROW_HEIGHT;
+        // Kopfzeile mit MP-Blau hinterlegt (wie headStyles im Client-Export)
+        $width = array_sum(self::COLUMNS);
+        $this->content .= sprintf("0 0.337 0.702 rg %d %.1F %d %d re f\n", self::MARGIN, $this->y - 3, $width, self::ROW_HEIGHT);
+        $this->content .= "1 g\n";
+        $this->cells(array_slice(TIME_EXPORT_HEADERS, 0, count(self::COLUMNS)), 'F2');
+        $this->content .= "0 g\n";
+    }
+
+    private function cells(array $cells, string $font): void {
+        $x = self::MARGIN;
+        foreach (self::COLUMNS as $i => $width) {
+            $value = (string)($cells[$i] ?? '');
+            $maxChars = (int)floor($width / (self::FONT_SIZE * 0.5)) - 1;
+            if (mb_strlen($value) > $maxChars) { $value = mb_substr($value, 0, $maxChars - 1) . '…'; }
+            $this->content .= sprintf("BT /%s %d Tf %d %.1F Td (%s) Tj ET\n", $font, self::FONT_SIZE, $x + 2, $this->y, $this->text($value));
+            $x += $width;
+        }
+        $this->y -= self::ROW_HEIGHT;
+    }
+
+    private function flushPage(): void {
+        if ($this->content === '') {
+            return;
+        }
+        $contentId = ++$this->nextObject;
+        $pageId = ++$this->nextObject;
+        $this->object($contentId, '<< /Length ' . strlen($this->content) . " >>\nstream\n" . $this->content . "\nendstream");
+        $this->object($pageId, '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 ' . self::WIDTH . ' ' . self::HEIGHT . ']'
+            . ' /Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents ' . $contentId . ' 0 R >>');
+        $this->pages[] = $pageId;
+        $this->content = '';
+    }
+
+    private function object(int $id, string $body): void {
+        $this->offsets[$id] = ftell($this->fh);
+        $this->write("$id 0 obj\n$body\nendobj\n");
+    }
+
+    private function text(string $value): string {
+        $value = function_exists('mb_convert_encoding') ? mb_convert_encoding($value, 'Windows-1252', 'UTF-8') : (string)@iconv('UTF-8', 'Windows-1252//TRANSLIT', $value);
+        return strtr($value, ['\\' => '\\\\', '(' => '\\(', ')' => '\\)', "\r" => ' ', "\n" => ' ']);
+    }
+
+    private function write(string $data): void {
+        if (fwrite($this->fh, $data) === false) {
+            throw new RuntimeException('PDF write failed');
+        }
+    }
+}
+
+// ---------------------------------------------------------------------------
+// PDF job queue (one JSON file per job in build/cache/exports/)
+
+function time_export_job_valid_id(string $id): bool {
+    return (bool)preg_match('/^[a-f0-9]{32}$/', $id);
+}
+
+function time_export_job_file(string $id, string $ext = 'json'): string {
+    return time_export_dir() . "/$id.$ext";
+}
+
+function time_export_job_load(string $id): ?array {
+    if (!time_export_job_valid_id($id) || !is_file(time_export_job_file($id))) {
+        return null;
+    }
+    $job = json_decode((string)@file_get_contents(time_export_job_file($id)), true);
+    return is_array($job) ? $job : null;
+}
+
+function time_export_job_save(array $job): void {
+    $file = time_export_job_file($job['id']);
+    $tmp = $file . '.' . getmypid() . '.tmp';
+    if (@file_put_contents($tmp, json_encode($job, JSON_UNESCAPED_UNICODE), LOCK_EX) === false || !@rename($tmp, $file)) {
+        @unlink($tmp);
+        throw new RuntimeException('Cannot write export job');
+    }
+}
+
+function time_export_job_create(int $ownerId, array $filter, array $scope): array {
+    $dir = time_export_dir();
+    if (!is_dir($dir) && !@mkdir($dir, 0750, true)) {
+        throw new RuntimeException('Cannot create export directory');
+    }
+    $job = [
+        'id' => bin2hex(random_bytes(16)),
+        'owner' => $ownerId,
+        'status' => 'queued',
+        'filter' => $filter,
+        'scope' => $scope,
+        'createdAt' => date('c'),
+    ];
+    time_export_job_save($job);
+    return $job;
+}
+
+/**
+ * Render a queued job to PDF. Returns false if another process already claimed it.
+ */
+function time_export_job_run(mysqli $conn, string $id): bool {
+    $lock = @fopen(time_export_job_file($id, 'lock'), 'c');
+    if (!$lock || !flock($lock, LOCK_EX | LOCK_NB)) {
+        return false;
+    }
+    try {
+        $job = time_export_job_load($id);
+        if (!$job || $job['status'] !== 'queued') {
+            return false;
+        }
+        $job['status'] = 'running';
+        time_export_job_save($job);
+
+        $filter = $job['filter'];
+        $range = trim(($filter['from'] ?? '') . ' - ' . ($filter['to'] ?? ''), ' -');
+        $pdf = new TimeExportPdf(time_export_job_file($id, 'pdf'), 'Arbeitszeiten-Export' . ($range !== '' ? " $range" : ''));
+        foreach (time_export_rows($conn, $filter, $job['scope']) as $row) {
+            $pdf->addRow($row);
+        }
+        $pdf->close();
+        $job['status'] = 'done';
+        $job['finishedAt'] = date('c');
+    } catch (Throwable $e) {
+        $job['status'] = 'failed';
+        $job['error'] = $e->getMessage();
+        @unlink(time_export_job_file($id, 'pdf'));
+    } finally {
+        if (isset($job['id'])) { time_export_job_save($job); }
+        flock($lock, LOCK_UN);
+        fclose($lock);
+        @unlink(time_export_job_file($id, 'lock'));
+    }
+    return true;
+}
+
+/**
+ * Ids of queued jobs, oldest first; expired jobs and their files are removed on the way
+ */
+function time_export_jobs_pending(): array {
+    $pending = [];
+    $files = glob(time_export_dir() . '/*.json') ?: [];
+    usort($files, fn($a, $b) => filemtime($a) <=> filemtime($b));
+    foreach ($files as $file) {
+        $id = basename($file, '.json');
+        if (time() - (int)@filemtime($file) > TIME_EXPORT_JOB_TTL) {
+            @unlink($file);
+            @unlink(time_export_job_file($id, 'pdf'));
+            continue;
+        }
+        $job = time_export_job_load($id);
+        if ($job && $job['status'] === 'queued') { $pending[] = $id; }
+    }
+    return $pending;
+}
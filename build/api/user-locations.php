@@ -0,0 +1,69 @@
+<?php
+/**
+ * User Locations - indexed location scoping for Standortleiter/Bereichsleiter
+ *
+ * master_data.locations (JSON) stays the source of truth for a user's assigned
+ * locations. Migration 006 mirrors it into user_locations (location, user_id), so
+ * "users of these locations" is an index lookup instead of JSON_OVERLAPS over
+ * every master_data row. masterdata.php keeps the mirror in sync on every write.
+ * Without the migration the JSON predicate is used.
+ *
+ * Usage:
+ *   [$scope, $types, $params] = user_locations_scope($conn, 'te.user_id', $assignedLocations);
+ *   $sql = "SELECT ... FROM time_entries te WHERE $scope ...";
+ */
+
+if (!defined('API_GUARD')) {
+    die('Direct access not permitted');
+}
+
+require_once __DIR__ . '/schema-capabilities.php';
+
+function user_locations_available(mysqli $conn): bool {
+    return schema_has_column($conn, 'user_locations', 'location');
+}
+
+/**
+ * WHERE fragment restricting $userIdExpr to users assigned to one of $locations.
+ * Returns [sql, bind types, params].
+ */
+function user_locations_scope(mysqli $conn, string $userIdExpr, array $locations): array {
+    $locations = array_values($locations);
+    if (user_locations_available($conn)) {
+        $in = implode(',', array_fill(0, count($locations), '?'));
+        return ["$userIdExpr IN (SELECT ul.user_id FROM user_locations ul WHERE ul.location IN ($in))",
+                str_repeat('s', count($locations)), $locations];
+    }
+    return ["$userIdExpr IN (SELECT md.user_id FROM master_data md WHERE JSON_OVERLAPS(md.locations, CAST(? AS JSON)))",
+            's', [json_encode($locations)]];
+}
+
+/**
+ * Replace the user_locations rows of $userId (call inside the master_data write transaction)
+ */
+function user_locations_sync(mysqli $conn, int $userId, array $locations): void {
+    if (!user_locations_available($conn)) {
+        return;
+    }
+    $st = $conn->prepare("DELETE FROM user_locations WHERE user_id = ?");
+    if (!$st) { throw new RuntimeException('Prepare failed'); }
+    $st->bind_param('i', $userId);
+    if (!$st->execute()) { throw new RuntimeException('Execute failed'); }
+    $st->close();
+
+    $locations = array_values(array_unique(array_filter(array_map('strval', $locations), 'strlen')));
+    if (!$locations) {
+        return;
+    }
+    $params = [];
+    foreach ($locations as $location) {
+        $params[] = $userId;
+        $params[] = $location;
+    }
+    $sql = "INSERT INTO user_locations (user_id, location) VALUES " . implode(',', array_fill(0, count($locations), '(?, ?)'));
+    $st = $conn->prepare($sql);
+    if (!$st) { throw new RuntimeException('Prepare failed'); }
+    $st->bind_param(str_repeat('is', count($locations)), ...$params);
+    if (!$st->execute()) { throw new RuntimeException('Execute failed'); }
+    $st->close();
+}
@@ -1,14 +1,15 @@
 <?php
 /**
  * Users API
+ * GET:   list users visible to the caller (same filter as login.php, ETag / 304)
  * PATCH: update user role (RBAC enforced)
  */
 define('API_GUARD', true);
 
-require_once __DIR__ . '/security-middleware.php';
-require_once __DIR__ . '/auth_helpers.php';
-require_once __DIR__ . '/csrf-middleware.php';
-require_once __DIR__ . '/DatabaseConnection.php';
+require_once __DIR__ . '/api-bootstrap.php';
+require_once __DIR__ . '/http-cache.php';
+require_once __DIR__ . '/bootstrap-data.php';
+require_once __DIR__ . '/identity.php';
 // require_once __DIR__ . '/debug-helpers.php';  // TEMP DISABLED FOR DEBUGGING
 
 // Dummy hlog function
@@ -22,14 +23,35 @@ if (!function_exists('hlog')) {
 initialize_api();
 initSecurityMiddleware();
 
-if (($_SERVER['REQUEST_METHOD'] ?? '') !== 'PATCH') {
+$method = $_SERVER['REQUEST_METHOD'] ?? '';
+if (!in_array($method, ['GET', 'PATCH'], true)) {
   http_response_code(405);
-  header('Allow: PATCH');
+  header('Allow: GET, PATCH');
   header('Content-Type: application/json; charset=utf-8');
   echo json_encode(['error'=>'Method not allowed']);
   exit;
 }
 
+// GET: Admin sieht alle Users, Bereichsleiter/Standortleiter sich selbst und die Users
+// ihrer zugeordneten Standorte, alle anderen nur sich selbst
+if ($method === 'GET') {
+  $sessionUser = verify_session_and_get_user();
+  $conn = DatabaseConnection::getInstance()->getConnection();
+  $me = identity_resolve($conn, $sessionUser);
+  // Nur lesend: Session-Lock freigeben, parallele Requests laufen weiter
+  release_session_lock();
+  if (!$me) {
+    send_response(404, ['message' => 'User not found']);
+  }
+  try {
+    http_cache_conditional($conn, ['users', 'master_data'], $me['role'] . ':' . $me['id']);
+    $users = bootstrap_users($conn, $me['id'], $me['role']);
+  } catch (Throwable $e) {
+    send_response(500, ['message' => 'Database error']);
+  }
+  send_response(200, $users);
+}
+
 // CSRF validation
 $csrfOk = function_exists('validateCsrfToken') ? validateCsrfToken() : true;
 if (!$csrfOk) {
@@ -49,27 +71,6 @@ $conn = $db->getConnection();
 
 $sessionUser = verify_session_and_get_user();
 
-function getUserRole(mysqli $conn, array $sessionUser): string {
-  $oid = $sessionUser['azure_oid'] ?? ($sessionUser['oid'] ?? null);
-  $username = $sessionUser['username'] ?? null;
-  $role = '';
-  if (!empty($oid)) {
-    if ($st = $conn->prepare("SELECT role FROM users WHERE azure_oid = ? LIMIT 1")) {
-      $st->bind_param('s', $oid);
-      if ($st->execute()) { $st->bind_result($r); if ($st->fetch()) { $role = (string)$r; } }
-      $st->close();
-    }
-  }
-  if (!$role && $username) {
-    if ($st = $conn->prepare("SELECT role FROM users WHERE username = ? LIMIT 1")) {
-      $st->bind_param('s', $username);
-      if ($st->execute()) { $st->bind_result($r); if ($st->fetch()) { $role = (string)$r; } }
-      $st->close();
-    }
-  }
-  return $role ?: 'Mitarbeiter';
-}
-
 $raw = file_get_contents('php://input');
 $data = json_decode($raw, true) ?: [];
 
@@ -90,7 +91,7 @@ if ($userId <= 0 || $newRole === '') {
 $allowedRoles = ['Admin','Bereichsleiter','Standortleiter','Mitarbeiter','Honorarkraft'];
 if (!in_array($newRole, $allowedRoles, true)) { send_response(400, ['message' => 'Ungültige Rolle']); }
 
-$actorRole = getUserRole($conn, $sessionUser);
+$actorRole = identity_role($conn, $sessionUser);
 
 hlog('Permission check', [
     'actorRole' => $actorRole,
@@ -126,6 +127,10 @@ if (!$st->execute()) {
 // Check if any rows were actually updated
 $affectedRows = $st->affected_rows;
 $st->close();
+if ($affectedRows > 0) {
+    // Rolle geändert: alle zwischengespeicherten Identitäten neu auflösen
+    identity_invalidate();
+}
 
 hlog('UPDATE executed', [
     'affected_rows' => $affectedRows,
@@ -138,13 +143,14 @@ if ($affectedRows === 0) {
     // Verify which case it is
     $userExists = false;
     $currentRole = null;
-    if ($checkStmt = $conn->prepare("SELECT role FROM users WHERE id = ? LIMIT 1")) {
-        $checkStmt->bind_param('i', $userId);
-        if ($checkStmt->execute()) {
-            $checkStmt->bind_result($currentRole);
-            $userExists = $checkStmt->fetch();
+    try {
+        $rows = $db->executeQuery("SELECT role FROM users WHERE id = ? LIMIT 1", 'i', [$userId]);
+        if ($rows) {
+            $userExists = true;
+            $currentRole = $rows[0]['role'];
         }
-        $checkStmt->close();
+    } catch (Throwable $e) {
+        hlog('Role lookup failed', $e->getMessage(), 'error');
     }
 
     if (!$userExists) {
@@ -166,13 +172,11 @@ if ($affectedRows === 0) {
 } else {
     // Success - verify the update actually worked
     $verifiedRole = null;
-    if ($verifyStmt = $conn->prepare("SELECT role FROM users WHERE id = ? LIMIT 1")) {
-        $verifyStmt->bind_param('i', $userId);
-        if ($verifyStmt->execute()) {
-            $verifyStmt->bind_result($verifiedRole);
-            $verifyStmt->fetch();
-        }
-        $verifyStmt->close();
+    try {
+        $rows = $db->executeQuery("SELECT role FROM users WHERE id = ? LIMIT 1", 'i', [$userId]);
+        $verifiedRole = $rows[0]['role'] ?? null;
+    } catch (Throwable $e) {
+        hlog('Role lookup failed', $e->getMessage(), 'error');
     }
 
     if ($verifiedRole === $newRole) {
@@ -54,9 +54,19 @@ echo "✅ Backend deployed"
 echo ""
 echo "🧹 Clearing OPcache..."
 
-# Clear OPcache
-curl -s "https://aze.mikropartner.de/api/clear-opcache.php" > /dev/null
-echo "✅ OPcache cleared"
+# Clear OPcache (nur geänderte Dateien, siehe api/opcache-sync.php)
+if ! CACHE_REPORT=$(curl -sf "https://aze.mikropartner.de/api/clear-cache.php"); then
+    echo "❌ clear-cache.php nicht erreichbar - OPcache evtl. veraltet"
+    exit 1
+fi
+# Geänderte vorgeladene Dateien (api/preload.php) werden nicht invalidiert
+if echo "$CACHE_REPORT" | grep -q '"restart_required": true'; then
+    echo "❌ Vorgeladene Dateien geändert - der Server läuft noch mit dem alten Code:"
+    echo "$CACHE_REPORT" | sed -n '/"preloaded_changed"/,/\]/p' | grep -v preloaded_changed | grep '"' | sed 's/^ */   /; s#\\/#/#g'
+    echo "   PHP-FPM neu starten (bzw. beim Hoster neu laden lassen)."
+    exit 1
+fi
+echo "✅ OPcache: geänderte Dateien invalidiert"
 
 echo ""
 echo "✅ Deployment abgeschlossen!"
@@ -0,0 +1,18 @@
+-- One running timer per user and day, enforced by the database
+-- File: /migrations/003_open_timer_guard.sql
+-- Purpose: time-entries.php?action=start inserts without a prior existence check.
+--          A second open entry (stop_time IS NULL) for the same user and date
+--          fails with a duplicate key error, which the API maps to 409 TIMER_ALREADY_RUNNING.
+-- Requires: stop_time nullable (see schema.sql / stop_time migration)
+-- Date: 2026-10-19
+-- Afterwards: call /api/clear-cache.php so the API picks up the new column (schema-capabilities.php)
+
+-- Existing duplicates must be resolved first, otherwise the unique index cannot be created:
+--   SELECT user_id, date, COUNT(*) FROM time_entries
+--   WHERE stop_time IS NULL GROUP BY user_id, date HAVING COUNT(*) > 1;
+
+-- open_timer_date is the entry date while the timer runs and NULL once stopped;
+-- NULLs do not collide in a unique index, so stopped entries are unaffected
+ALTER TABLE `time_entries`
+ADD COLUMN `open_timer_date` DATE GENERATED ALWAYS AS (IF(`stop_time` IS NULL, `date`, NULL)) STORED,
+ADD UNIQUE INDEX `uniq_user_open_timer` (`user_id`, `open_timer_date`);
@@ -0,0 +1,16 @@
+-- Indexes for keyset (cursor) pagination
+-- File: /migrations/004_keyset_pagination_indexes.sql
+-- Purpose: time-entries.php?action=list and approvals.php?limit=&cursor= page with
+--          WHERE (key) < (cursor) ORDER BY key DESC LIMIT n instead of OFFSET.
+--          Each page is an index range scan, independent of its depth.
+-- Date: 2026-10-19
+-- Note: time_entries pages use idx_user_date_start / idx_date_start_time from 002
+--       (InnoDB appends the primary key id, which is the cursor tie-breaker).
+
+-- Approvals for Admin / leadership views: ORDER BY requested_at DESC, id DESC
+ALTER TABLE `approval_requests`
+ADD INDEX `idx_requested_at_id` (`requested_at` DESC, `id` DESC);
+
+-- Own approvals (Mitarbeiter / Honorarkraft): requested_by = ? ORDER BY requested_at DESC, id DESC
+ALTER TABLE `approval_requests`
+ADD INDEX `idx_requested_by_requested_at_id` (`requested_by`, `requested_at` DESC, `id` DESC);
@@ -0,0 +1,54 @@
+-- Normalized approval status + per-status counters
+-- File: /migrations/005_approval_status_normalization.sql
+-- Purpose: approval_requests.status held free-form values ('approved', 'open', '',
+--          NULL ...), so list queries filtered on TRIM(LOWER(status)) and could not
+--          use idx_status_requested_at. The column is canonicalized to
+--          ENUM('pending','genehmigt','abgelehnt') NOT NULL; approvals.php / login.php
+--          then filter with status = 'pending' / status IN ('genehmigt','abgelehnt').
+--          approval_status_counts replaces the COUNT(*) scans for dashboard meta.
+-- Date: 2026-10-19
+-- Note: Run during a maintenance window (no concurrent writes while the counters
+--       are seeded) and call clear-cache.php afterwards so the schema cache sees
+--       the new column type.
+
+-- 1. Canonicalize legacy values (same mapping as the former list filters)
+UPDATE `approval_requests`
+SET `status` = CASE
+    WHEN TRIM(LOWER(`status`)) IN ('genehmigt', 'approved', 'completed', 'done') THEN 'genehmigt'
+    WHEN TRIM(LOWER(`status`)) IN ('abgelehnt', 'rejected') THEN 'abgelehnt'
+    ELSE 'pending'
+END;
+
+ALTER TABLE `approval_requests`
+MODIFY `status` ENUM('pending', 'genehmigt', 'abgelehnt') NOT NULL DEFAULT 'pending';
+
+-- 2. Counter table, seeded from the canonical data
+CREATE TABLE IF NOT EXISTS `approval_status_counts` (
+  `status` ENUM('pending', 'genehmigt', 'abgelehnt') NOT NULL,
+  `request_count` INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (`status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+REPLACE INTO `approval_status_counts` (`status`, `request_count`)
+SELECT s.`status`, COUNT(ar.`id`)
+FROM (SELECT 'pending' AS `status` UNION ALL SELECT 'genehmigt' UNION ALL SELECT 'abgelehnt') s
+LEFT JOIN `approval_requests` ar ON ar.`status` = s.`status`
+GROUP BY s.`status`;
+
+-- 3. Keep the counters in step with every write (single-statement triggers, no DELIMITER needed)
+DROP TRIGGER IF EXISTS `trg_approval_status_count_insert`;
+CREATE TRIGGER `trg_approval_status_count_insert` AFTER INSERT ON `approval_requests`
+FOR EACH ROW
+UPDATE `approval_status_counts` SET `request_count` = `request_count` + 1 WHERE `status` = NEW.`status`;
+
+DROP TRIGGER IF EXISTS `trg_approval_status_count_update`;
+CREATE TRIGGER `trg_approval_status_count_update` AFTER UPDATE ON `approval_requests`
+FOR EACH ROW
+UPDATE `approval_status_counts`
+SET `request_count` = `request_count` + (`status` = NEW.`status`) - (`status` = OLD.`status`)
+WHERE `status` IN (OLD.`status`, NEW.`status`) AND OLD.`status` <> NEW.`status`;
+
+DROP TRIGGER IF EXISTS `trg_approval_status_count_delete`;
+CREATE TRIGGER `trg_approval_status_count_delete` AFTER DELETE ON `approval_requests`
+FOR EACH ROW
+UPDATE `approval_status_counts` SET `request_count` = `request_count` - 1 WHERE `status` = OLD.`status`;
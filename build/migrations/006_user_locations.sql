@@ -0,0 +1,45 @@
+-- Location scoping via junction table and integer requester id
+-- File: /migrations/006_user_locations.sql
+-- Purpose: Standortleiter/Bereichsleiter lists joined approval_requests to users on
+--          the varchar username and filtered with JSON_OVERLAPS(master_data.locations),
+--          which no index can serve. user_locations (location, user_id) turns the
+--          location scope into an index lookup, approval_requests.requested_by_user_id
+--          replaces the username join by an indexed integer.
+-- Date: 2026-10-19
+-- Note: master_data.locations stays the source of truth; masterdata.php rewrites a
+--       user's user_locations rows in the same transaction. Call clear-cache.php
+--       afterwards so the schema cache sees the new table and column.
+
+-- 1. Junction table user -> assigned location
+CREATE TABLE IF NOT EXISTS `user_locations` (
+  `user_id` int(11) NOT NULL,
+  `location` varchar(255) NOT NULL,
+  PRIMARY KEY (`location`, `user_id`),
+  KEY `idx_user_id` (`user_id`),
+  CONSTRAINT `user_locations_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO `user_locations` (`user_id`, `location`)
+SELECT md.`user_id`, jt.`location`
+FROM `master_data` md
+JOIN JSON_TABLE(md.`locations`, '$[*]' COLUMNS (`location` varchar(255) PATH '$')) jt
+WHERE md.`locations` IS NOT NULL AND jt.`location` IS NOT NULL AND jt.`location` <> '';
+
+-- 2. Integer requester id on approval_requests
+ALTER TABLE `approval_requests`
+ADD COLUMN `requested_by_user_id` int(11) NULL AFTER `requested_by`,
+ADD INDEX `idx_requested_by_user_status` (`requested_by_user_id`, `status`, `requested_at` DESC),
+ADD CONSTRAINT `approval_requests_ibfk_2` FOREIGN KEY (`requested_by_user_id`) REFERENCES `users` (`id`) ON DELETE SET NULL;
+
+UPDATE `approval_requests` ar
+JOIN `users` u ON u.`username` = ar.`requested_by`
+SET ar.`requested_by_user_id` = u.`id`
+WHERE ar.`requested_by_user_id` IS NULL;
+
+-- New requests resolve the id from requested_by (unique users.username), so the
+-- INSERTs in approvals.php do not need to change
+DROP TRIGGER IF EXISTS `trg_approval_requested_by_user`;
+CREATE TRIGGER `trg_approval_requested_by_user` BEFORE INSERT ON `approval_requests`
+FOR EACH ROW
+SET NEW.`requested_by_user_id` = COALESCE(NEW.`requested_by_user_id`,
+    (SELECT u.`id` FROM `users` u WHERE u.`username` = NEW.`requested_by` LIMIT 1));
@@ -0,0 +1,40 @@
+-- Materialized per-day totals of time entries
+-- File: /migrations/007_daily_totals.sql
+-- Purpose: Timesheet and dashboard views downloaded every raw segment and aggregated
+--          per day in the browser (src/utils/aggregate.ts). daily_totals holds one
+--          row per user and day with the same figures; time-entries.php and
+--          approvals.php refresh the affected day on every write (daily-totals.php),
+--          time-entries.php?action=summary serves it.
+-- Date: 2026-10-19
+-- Note: Same rules as aggregate.ts - a stop before the start crosses midnight, running
+--       segments count 0 seconds, pauses are the positive gaps between consecutive
+--       segments. Call clear-cache.php afterwards so the schema cache sees the table.
+
+CREATE TABLE IF NOT EXISTS `daily_totals` (
+  `user_id` int(11) NOT NULL,
+  `date` date NOT NULL,
+  `total_seconds` int(11) NOT NULL DEFAULT 0,
+  `pause_seconds` int(11) NOT NULL DEFAULT 0,
+  `first_start` time DEFAULT NULL,
+  `last_stop` time DEFAULT NULL COMMENT 'NULL = last segment still running',
+  `segment_count` int(11) NOT NULL DEFAULT 0,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`user_id`, `date`),
+  KEY `idx_date_user` (`date`, `user_id`),
+  CONSTRAINT `daily_totals_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Backfill from existing entries
+REPLACE INTO `daily_totals` (`user_id`, `date`, `total_seconds`, `pause_seconds`, `first_start`, `last_stop`, `segment_count`)
+SELECT seg.`user_id`, seg.`date`, SUM(seg.dur), COALESCE(SUM(seg.gap), 0), MIN(seg.`start_time`),
+       MAX(IF(seg.rn_desc = 1, seg.`stop_time`, NULL)), COUNT(*)
+FROM (
+  SELECT `user_id`, `date`, `start_time`, `stop_time`,
+         IF(`stop_time` IS NULL, 0, MOD(TIME_TO_SEC(`stop_time`) - TIME_TO_SEC(`start_time`) + 86400, 86400)) AS dur,
+         IF(`stop_time` IS NULL, 0, GREATEST(0, TIME_TO_SEC(LEAD(`start_time`) OVER w)
+             - TIME_TO_SEC(`stop_time`) - IF(`stop_time` < `start_time`, 86400, 0))) AS gap,
+         ROW_NUMBER() OVER (PARTITION BY `user_id`, `date` ORDER BY `start_time` DESC, `id` DESC) AS rn_desc
+  FROM `time_entries`
+  WINDOW w AS (PARTITION BY `user_id`, `date` ORDER BY `start_time`, `id`)
+) seg
+GROUP BY seg.`user_id`, seg.`date`;
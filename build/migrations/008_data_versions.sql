@@ -0,0 +1,60 @@
+-- Revision counters for conditional GET (ETag / If-None-Match)
+-- File: /migrations/008_data_versions.sql
+-- Purpose: settings.php, masterdata.php and users.php derive their ETag from a version
+--          number per table instead of re-reading and re-serializing the data. Triggers
+--          bump the counter on every write, so all writers (API, onboarding, admin
+--          scripts) invalidate the ETag without code changes.
+-- Date: 2026-10-19
+-- Note: Call clear-cache.php afterwards so the schema cache sees the table; until then
+--       the endpoints answer without ETag.
+
+CREATE TABLE IF NOT EXISTS `data_versions` (
+  `name` varchar(64) NOT NULL,
+  `version` bigint(20) UNSIGNED NOT NULL DEFAULT 1,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp(),
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO `data_versions` (`name`, `version`) VALUES
+('global_settings', 1),
+('master_data', 1),
+('users', 1);
+
+-- global_settings
+DROP TRIGGER IF EXISTS `trg_version_global_settings_insert`;
+CREATE TRIGGER `trg_version_global_settings_insert` AFTER INSERT ON `global_settings`
+FOR EACH ROW UPDATE `data_versions` SET `version` = `version` + 1 WHERE `name` = 'global_settings';
+
+DROP TRIGGER IF EXISTS `trg_version_global_settings_update`;
+CREATE TRIGGER `trg_version_global_settings_update` AFTER UPDATE ON `global_settings`
+FOR EACH ROW UPDATE `data_versions` SET `version` = `version` + 1 WHERE `name` = 'global_settings';
+
+DROP TRIGGER IF EXISTS `trg_version_global_settings_delete`;
+CREATE TRIGGER `trg_version_global_settings_delete` AFTER DELETE ON `global_settings`
+FOR EACH ROW UPDATE `data_versions` SET `version` = `version` + 1 WHERE `name` = 'global_settings';
+
+-- master_data
+DROP TRIGGER IF EXISTS `trg_version_master_data_insert`;
+CREATE TRIGGER `trg_version_master_data_insert` AFTER INSERT ON `master_data`
+FOR EACH ROW UPDATE `data_versions` SET `version` = `version` + 1 WHERE `name` = 'master_data';
+
+DROP TRIGGER IF EXISTS `trg_version_master_data_update`;
+CREATE TRIGGER `trg_version_master_data_update` AFTER UPDATE ON `master_data`
+FOR EACH ROW UPDATE `data_versions` SET `version` = `version` + 1 WHERE `name` = 'master_data';
+
+DROP TRIGGER IF EXISTS `trg_version_master_data_delete`;
+CREATE TRIGGER `trg_version_master_data_delete` AFTER DELETE ON `master_data`
+FOR EACH ROW UPDATE `data_versions` SET `version` = `version` + 1 WHERE `name` = 'master_data';
+
+-- users
+DROP TRIGGER IF EXISTS `trg_version_users_insert`;
+CREATE TRIGGER `trg_version_users_insert` AFTER INSERT ON `users`
+FOR EACH ROW UPDATE `data_versions` SET `version` = `version` + 1 WHERE `name` = 'users';
+
+DROP TRIGGER IF EXISTS `trg_version_users_update`;
+CREATE TRIGGER `trg_version_users_update` AFTER UPDATE ON `users`
+FOR EACH ROW UPDATE `data_versions` SET `version` = `version` + 1 WHERE `name` = 'users';
+
+DROP TRIGGER IF EXISTS `trg_version_users_delete`;
+CREATE TRIGGER `trg_version_users_delete` AFTER DELETE ON `users`
+FOR EACH ROW UPDATE `data_versions` SET `version` = `version` + 1 WHERE `name` = 'users';
@@ -0,0 +1,96 @@
+<?php
+/**
+ * Compression Benchmark
+ * File: /scripts/compression-benchmark.php
+ * Purpose: Compare CPU cost against bytes saved for gzip and Brotli on typical API
+ *          payloads (approvals list, time entries, settings), encoded the way
+ *          send_response() does. Uses response_encode() from api/response-compression.php,
+ *          so the default levels are the ones production uses.
+ *
+ * Usage:
+ *   php build/scripts/compression-benchmark.php [iterations=50]
+ *
+ * Output columns: raw/encoded bytes, saved %, median encode time, µs per KB saved.
+ */
+
+// Prevent web access
+if (php_sapi_name() !== 'cli') {
+    die('This script can only be run from command line');
+}
+
+require_once __DIR__ . '/../api/response-compression.php';
+
+$iterations = max(1, (int)($argv[1] ?? 50));
+mt_srand(42);
+
+function bench_entry(int $id): array {
+    $date = date('Y-m-d', strtotime('2025-01-01 +' . ($id % 300) . ' days'));
+    $start = sprintf('%02d:%02d:00', 6 + $id % 4, ($id * 7) % 60);
+    return [
+        'id' => $id,
+        'userId' => 1 + $id % 40,
+        'username' => 'Mitarbeiter ' . (1 + $id % 40),
+        'date' => $date,
+        'startTime' => $start,
+        'stopTime' => sprintf('%02d:%02d:00', 14 + $id % 4, ($id * 13) % 60),
+        'location' => ['Berlin', 'Hamburg', 'München', 'Köln', 'Frankfurt'][$id % 5],
+        'role' => 'Mitarbeiter',
+        'createdAt' => $date . ' ' . $start,
+        'updatedBy' => 'Mitarbeiter ' . (1 + $id % 40),
+        'updatedAt' => $date . ' ' . $start,
+    ];
+}
+
+function bench_approval(int $id): array {
+    $entry = bench_entry($id);
+    return [
+        'id' => (string)$id,
+        'type' => $id % 3 === 0 ? 'delete' : 'edit',
+        'entry' => $entry,
+        'newData' => ['startTime' => $entry['startTime'], 'stopTime' => sprintf('%02d:%02d:00', 15 + $id % 3, mt_rand(0, 59)), 'location' => $entry['location']],
+        'reasonData' => ['reason' => ['Vergessen auszustempeln', 'Falsche Zeit erfasst', 'Außentermin'][$id % 3], 'details' => 'Korrektur ' . mt_rand(1000, 9999)],
+        'requestedBy' => $entry['username'],
+        'status' => 'pending',
+    ];
+}
+
+$payloads = [
+    'settings' => ['overtimeThreshold' => 8.0, 'changeReasons' => ['Vergessen auszustempeln', 'Falsche Zeit erfasst', 'Außentermin', 'Sonstiges'], 'locations' => ['Berlin', 'Hamburg', 'München', 'Köln', 'Frankfurt']],
+    'time-entries (100)' => ['items' => array_map('bench_entry', range(1, 100)), 'nextCursor' => 'MTAwfDIwMjUtMDQtMTA'],
+    'time-entries (500)' => ['items' => array_map('bench_entry', range(1, 500)), 'nextCursor' => null],
+    'approvals (50)' => ['items' => array_map('bench_approval', range(1, 50)), 'meta' => ['total' => 50, 'pending' => 50]],
+    'approvals (300)' => ['items' => array_map('bench_approval', range(1, 300)), 'meta' => ['total' => 300, 'pending' => 300]],
+];
+
+$variants = [['gzip', 1], ['gzip', RESPONSE_COMPRESSION_GZIP_LEVEL], ['gzip', 9]];
+if (function_exists('brotli_compress')) {
+    array_push($variants, ['br', 1], ['br', RESPONSE_COMPRESSION_BROTLI_QUALITY], ['br', 11]);
+} else {
+    echo "ext-brotli not loaded - gzip only\n";
+}
+
+printf("%d iterations, threshold %d bytes, defaults gzip %d / br %d\n\n", $iterations, RESPONSE_COMPRESSION_MIN_BYTES, RESPONSE_COMPRESSION_GZIP_LEVEL, RESPONSE_COMPRESSION_BROTLI_QUALITY);
+printf("%-20s %-8s %10s %10s %8s %12s %14s\n", 'payload', 'codec', 'raw', 'encoded', 'saved', 'median µs', 'µs/KB saved');
+
+foreach ($payloads as $name => $data) {
+    $json = json_encode($data, JSON_UNESCAPED_UNICODE | JSON_PRETTY_PRINT);
+    $raw = strlen($json);
+    if ($raw < RESPONSE_COMPRESSION_MIN_BYTES) {
+        printf("%-20s %-8s %10d %10s %8s %12s %14s\n", $name, '-', $raw, '-', '-', '-', 'below threshold');
+        continue;
+    }
+    foreach ($variants as [$encoding, $level]) {
+        $times = [];
+        $encoded = '';
+        for ($i = 0; $i < $iterations; $i++) {
+            $t = hrtime(true);
+            $encoded = response_encode($json, $encoding, $level);
+            $times[] = (hrtime(true) - $t) / 1e3;
+        }
+        sort($times);
+        $median = $times[intdiv(count($times), 2)];
+        $size = strlen($encoded);
+        $savedKb = max(($raw - $size) / 1024, 0.001);
+        printf("%-20s %-8s %10d %10d %7.1f%% %12.1f %14.2f\n", $name, "$encoding-$level", $raw, $size, 100 * (1 - $size / $raw), $median, $median / $savedKb);
+    }
+}
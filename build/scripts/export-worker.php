@@ -0,0 +1,30 @@
+<?php
+/**
+ * Export Worker
+ * File: /scripts/export-worker.php
+ * Purpose: Render queued PDF exports (api/export.php) for hosts without PHP-FPM's
+ *          fastcgi_finish_request, and remove expired export files.
+ *
+ * Cron (every minute):
+ *   * * * * * php /path/to/build/scripts/export-worker.php
+ */
+
+// Prevent web access
+if (php_sapi_name() !== 'cli') {
+    die('This script can only be run from command line');
+}
+
+define('API_GUARD', true);
+
+require_once __DIR__ . '/../api/db.php';
+require_once __DIR__ . '/../api/time-export.php';
+
+$done = 0;
+foreach (time_export_jobs_pending() as $id) {
+    if (time_export_job_run($conn, $id)) {
+        $job = time_export_job_load($id);
+        echo date('Y-m-d H:i:s') . " $id " . ($job['status'] ?? 'unknown') . "\n";
+        $done++;
+    }
+}
+echo date('Y-m-d H:i:s') . " $done export job(s) processed\n";
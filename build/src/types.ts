@@ -41,6 +41,19 @@ export type AggregatedTimeEntry = TimeEntry & {
     pauseSeconds: number;
 };
 
+// Serverseitige Tagessumme (time-entries.php?action=summary, Tabelle daily_totals)
+export type DailySummary = {
+    userId: number;
+    username: string;
+    displayName: string;
+    date: string;
+    totalSeconds: number;
+    pauseSeconds: number;
+    firstStart: string | null;
+    lastStop: string | null;
+    segmentCount: number;
+};
+
 export type ViewState = {
   current: 'main' | 'timesheet' | 'masterdata' | 'daydetail' | 'approvals' | 'changehistory' | 'dashboard' | 'globalsettings';
   context?: any;
@@ -81,8 +81,8 @@ export const GlobalSettingsView: React.FC<{
             .catch(() => setIpLoadError('Fehler beim Laden der IP-Zuordnung.'));
     }, []);
 
-    // Simple IP prefix validation: allow patterns like 10.49.1. or 192.168.0.
-    const isValidPrefix = (p: string) => /^\d{1,3}(?:\.\d{1,3}){1,3}\.?$/.test(p.trim());
+    // Simple IP prefix validation: allow patterns like 10.49.1. or 192.168.0. and CIDR (10.49.0.0/16, 2001:db8::/32)
+    const isValidPrefix = (p: string) => /^\d{1,3}(?:\.\d{1,3}){1,3}\.?$/.test(p.trim()) || /^[0-9a-fA-F:.]+\/\d{1,3}$/.test(p.trim());
     const canonicalizeLocation = (name: string) => {
         const n = name.trim();
         if (!n) return '';
@@ -313,7 +313,7 @@ export const GlobalSettingsView: React.FC<{
                             return !(v.prefixOk && v.locationOk);
                         }) && (
                           <div className="error" role="alert" style={{ marginTop: 8 }}>
-                            Bitte korrigiere ungültige IP‑Präfixe (Format: z. B. 10.49.1.) und wähle nur Standorte aus der Stammliste.
+                            Bitte korrigiere ungültige IP‑Präfixe (Format: z. B. 10.49.1. oder 10.49.0.0/16) und wähle nur Standorte aus der Stammliste.
                           </div>
                         )}
                     </div>
@@ -199,8 +199,8 @@ export const MainAppView: React.FC = () => {
   
   const refreshData = async () => {
     try {
-        console.log('[refreshData] START - Calling api.loginAndGetInitialData()');
-        const initialData = await api.loginAndGetInitialData();
+        console.log('[refreshData] START - Calling api.refreshInitialData()');
+        const initialData = await api.refreshInitialData();
         console.log('[refreshData] API response received, users count:', initialData.users?.length);
         console.log('[refreshData] User data sample:', initialData.users?.slice(0, 3));
 
@@ -214,8 +214,8 @@ export const MainAppView: React.FC = () => {
         // wieder auf alte Werte zurückgesetzt werden.
         setHistory(initialData.history);
         setGlobalSettings(initialData.globalSettings);
-        if ((initialData as any).currentLocation) {
-          setCurrentLocation((initialData as any).currentLocation);
+        if (initialData.currentLocation) {
+          setCurrentLocation(initialData.currentLocation);
         }
         console.log('[refreshData] State updates completed');
     } catch(err) {
@@ -0,0 +1,73 @@
+<?php
+/**
+ * Unit Tests for the IP Location Index
+ * Tests prefix parsing and trie lookups of ip-location-index.php
+ *
+ * Test Coverage:
+ * - Legacy octet prefixes, CIDR and single hosts (IPv4 / IPv6)
+ * - IPv4-mapped IPv6 client addresses
+ * - Overlapping networks: the entry listed first wins (as the former linear scan)
+ */
+
+use PHPUnit\Framework\TestCase;
+
+class IpLocationIndexTest extends TestCase
+{
+    protected function setUp(): void
+    {
+        parent::setUp();
+
+        if (!defined('API_GUARD')) {
+            define('API_GUARD', true);
+        }
+
+        require_once API_BASE_PATH . '/ip-location-index.php';
+    }
+
+    /**
+     * Test the supported prefix notations
+     */
+    public function testPrefixNotations(): void
+    {
+        $index = ip_location_index_compile([
+            ['prefix' => '10.49.1.', 'location' => 'Zentrale Berlin'],
+            ['prefix' => '10.50.0.0/16', 'location' => 'Hamburg'],
+            ['prefix' => '192.168.7.5', 'location' => 'Köln'],
+            ['prefix' => '2001:db8:10::/48', 'location' => 'München'],
+        ]);
+
+        $this->assertSame('Zentrale Berlin', ip_location_lookup($index, '10.49.1.200'));
+        $this->assertSame('Hamburg', ip_location_lookup($index, '10.50.77.1'));
+        $this->assertSame('Köln', ip_location_lookup($index, '192.168.7.5'));
+        $this->assertNull(ip_location_lookup($index, '192.168.7.6'));
+        $this->assertSame('München', ip_location_lookup($index, '2001:db8:10:ffff::1'));
+        $this->assertSame('Zentrale Berlin', ip_location_lookup($index, '::ffff:10.49.1.5'));
+        $this->assertNull(ip_location_lookup($index, 'not-an-ip'));
+    }
+
+    /**
+     * Test overlapping networks: list order decides, not prefix length
+     */
+    public function testOverlappingRangesKeepListOrder(): void
+    {
+        $broadFirst = ip_location_index_compile([
+            ['prefix' => '10.49.', 'location' => 'Zentrale Berlin'],
+            ['prefix' => '10.49.1.', 'location' => 'Berlin Außenstelle'],
+        ]);
+        $this->assertSame('Zentrale Berlin', ip_location_lookup($broadFirst, '10.49.1.5'));
+        $this->assertSame('Zentrale Berlin', ip_location_lookup($broadFirst, '10.49.2.5'));
+
+        $specificFirst = ip_location_index_compile([
+            ['prefix' => '10.49.1.0/24', 'location' => 'Berlin Außenstelle'],
+            ['prefix' => '10.49.0.0/16', 'location' => 'Zentrale Berlin'],
+        ]);
+        $this->assertSame('Berlin Außenstelle', ip_location_lookup($specificFirst, '10.49.1.5'));
+        $this->assertSame('Zentrale Berlin', ip_location_lookup($specificFirst, '10.49.2.5'));
+
+        $duplicate = ip_location_index_compile([
+            ['prefix' => '10.49.1.', 'location' => 'Erster Eintrag'],
+            ['prefix' => '10.49.1.0/24', 'location' => 'Zweiter Eintrag'],
+        ]);
+        $this->assertSame('Erster Eintrag', ip_location_lookup($duplicate, '10.49.1.5'));
+    }
+}
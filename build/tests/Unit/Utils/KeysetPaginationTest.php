@@ -0,0 +1,71 @@
+<?php
+/**
+ * Unit Tests for Keyset Pagination
+ * Tests the cursor helpers and how the list endpoints bind their parameters
+ *
+ * Test Coverage:
+ * - Cursor encoding/decoding round trip and malformed cursors
+ * - WHERE fragment and parameter count with and without cursor
+ * - Admin first page (no scope, no cursor) binds nothing
+ */
+
+use PHPUnit\Framework\TestCase;
+
+class KeysetPaginationTest extends TestCase
+{
+    protected function setUp(): void
+    {
+        parent::setUp();
+
+        if (!defined('API_GUARD')) {
+            define('API_GUARD', true);
+        }
+
+        require_once API_BASE_PATH . '/keyset-pagination.php';
+        $_GET = [];
+    }
+
+    /**
+     * Test cursor round trip
+     */
+    public function testCursorRoundTrip(): void
+    {
+        $key = ['2025-01-31 08:00:00', 42];
+        $this->assertSame($key, keyset_decode(keyset_encode($key), 2));
+        $this->assertNull(keyset_decode(keyset_encode($key), 3), 'Wrong part count must be rejected');
+        $this->assertNull(keyset_decode('not-a-cursor', 2), 'Garbage must be rejected');
+    }
+
+    /**
+     * Test that placeholders and parameters match for a cursor
+     */
+    public function testConditionWithCursor(): void
+    {
+        [$sql, $params] = keyset_condition(['requested_at', 'id'], ['2025-01-31 08:00:00', 42]);
+
+        $this->assertSame(substr_count($sql, '?'), count($params));
+        $this->assertStringStartsWith('(requested_at <= ?', $sql);
+    }
+
+    /**
+     * Test Admin first page: no scope parameters and no cursor leave nothing to bind
+     */
+    public function testAdminFirstPageWithoutCursorBindsNothing(): void
+    {
+        $_GET = ['limit' => '25'];
+
+        [$sql, $params] = keyset_condition(['requested_at', 'id'], keyset_cursor(2));
+        $pageTypes = str_repeat('s', count($params));
+
+        $this->assertSame('1=1', $sql);
+        $this->assertSame('', $pageTypes);
+
+        // bind_param('') throws a ValueError on PHP 8 - the admin branches must skip it
+        $approvalsCode = file_get_contents(API_BASE_PATH . '/approvals.php');
+        $this->assertStringContainsString("if (\$stmt && \$pageTypes !== '') { \$stmt->bind_param(\$pageTypes, ...\$pageParams); }", $approvalsCode);
+
+        $timeEntriesCode = file_get_contents(API_BASE_PATH . '/time-entries.impl.php');
+        $this->assertStringContainsString("if (\$types !== '') { \$stmt->bind_param(\$types, ...\$params); }", $timeEntriesCode);
+        $this->assertDoesNotMatchRegularExpression('/^\s*\$stmt->bind_param\(\$types, \.\.\.\$params\);/m', $timeEntriesCode);
+    }
+}
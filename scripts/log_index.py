@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Log Index
+Incremental SQLite (FTS5) index over the JSON-lines logs written by
+build/api/structured-logger.php (logs/app-YYYY-MM-DD.log plus rotations .1 .. .10).
+
+Each file is tracked by device + inode (plus a hash of its first line against inode
+reuse) with the byte offset of its last complete line, so a run only reads bytes
+appended since the previous one. Rotation renames a file but keeps its inode, so
+rotated files are not indexed twice.
+
+    python log_index.py index                          # once (e.g. from cron)
+    python log_index.py index --follow 5               # tail: re-index every 5 s
+    python log_index.py query --request-id 3f2a...     # all entries of one request
+    python log_index.py query --level error,critical --endpoint approvals --since 24h
+    python log_index.py query --search '"Database error" AND timeout' --since 7d
+    python log_index.py stats --since 7d               # errors per endpoint per hour
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_LOG_DIR = os.environ.get('AZE_LOG_DIR', str(Path(__file__).resolve().parent.parent / 'build' / 'logs'))
+DEFAULT_DB_PATH = os.environ.get('AZE_LOG_INDEX_DB', str(Path(__file__).parent / 'log_index.db'))
+
+LOG_FILE_PATTERN = re.compile(r'^app-\d{4}-\d{2}-\d{2}\.log(\.\d+)?$')
+FINGERPRINT_BYTES = 4096
+BATCH_ROWS = 5000
+ERROR_LEVELS = ('error', 'critical', 'alert', 'emergency')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    dev INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    indexed_at REAL NOT NULL,
+    PRIMARY KEY (dev, inode)
+);
+
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    level TEXT NOT NULL,
+    message TEXT,
+    context TEXT,
+    request_id TEXT,
+    endpoint TEXT,
+    method TEXT,
+    uri TEXT,
+    ip TEXT,
+    user_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_entries_ts ON entries(ts);
+CREATE INDEX IF NOT EXISTS idx_entries_request ON entries(request_id);
+CREATE INDEX IF NOT EXISTS idx_entries_level_ts ON entries(level, ts);
+CREATE INDEX IF NOT EXISTS idx_entries_endpoint_ts ON entries(endpoint, ts);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    message, context, content='entries', content_rowid='id'
+);
+"""
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds from ISO 8601 ('2026-10-19', '2026-10-19T08:00') or a relative age ('90m', '24h', '7d')"""
+    if not value:
+        return None
+    match = re.fullmatch(r'(\d+)([smhd])', value.strip())
+    if match:
+        seconds = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[match.group(2)]
+        return time.time() - int(match.group(1)) * seconds
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()
+    return parsed.timestamp()
+
+
+def endpoint_of(uri: Optional[str]) -> Optional[str]:
+    """'/api/time-entries.php?action=list' -> 'time-entries'"""
+    if not uri or uri == 'CLI':
+        return None
+    name = urlsplit(uri).path.rstrip('/').rsplit('/', 1)[-1]
+    return name[:-4] if name.endswith('.php') else (name or None)
+
+
+def entry_row(line: bytes) -> Optional[Tuple]:
+    """One log line -> entries row (without id), None for lines that are not logger JSON"""
+    try:
+        entry = json.loads(line)
+        ts = datetime.fromisoformat(entry['@timestamp']).timestamp()
+    except (ValueError, KeyError, TypeError):
+        return None
+    request = entry.get('request') or {}
+    user = entry.get('user') or {}
+    context = entry.get('context')
+    return (
+        ts,
+        str(entry.get('level', '')),
+        entry.get('message'),
+        json.dumps(context, ensure_ascii=False) if context else None,
+        request.get('id'),
+        endpoint_of(request.get('uri')),
+        request.get('method'),
+        request.get('uri'),
+        request.get('ip'),
+        None if user.get('id') is None else str(user['id']),
+    )
+
+
+class LogIndex:
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite ohne FTS5: Volltextsuche fällt auf LIKE zurück
+            self.fts = False
+
+    def close(self):
+        self.conn.close()
+
+    # -- indexing -----------------------------------------------------------------
+
+    def index_dir(self, log_dir: str) -> Dict[str, int]:
+        """Index the new bytes of every log file in log_dir; returns files/bytes/entries counts"""
+        totals = {'files': 0, 'bytes': 0, 'entries': 0}
+        paths = sorted(p for p in Path(log_dir).iterdir() if LOG_FILE_PATTERN.match(p.name)) if os.path.isdir(log_dir) else []
+        # Älteste Rotation zuerst, damit Einträge in Schreibreihenfolge landen
+        paths.sort(key=lambda p: (p.name.split('.log')[0], -int(p.suffix[1:]) if p.suffix[1:].isdigit() else 0))
+        for path in paths:
+            read, added = self.index_file(path)
+            if read:
+                totals['files'] += 1
+                totals['bytes'] += read
+                totals['entries'] += added
+        return totals
+
+    def index_file(self, path: Path) -> Tuple[int, int]:
+        """Index complete lines appended to path since the last run; returns (bytes read, entries added)"""
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return 0, 0
+        with open(path, 'rb') as f:
+            fingerprint = self._fingerprint(f)
+            known = self.conn.execute('SELECT fingerprint, offset FROM files WHERE dev = ? AND inode = ?',
+                                      (st.st_dev, st.st_ino)).fetchone()
+            offset = known['offset'] if known and known['fingerprint'] == fingerprint else 0
+            if offset > st.st_size:
+                offset = 0  # truncated
+            if offset == st.st_size:
+                return 0, 0
+
+            f.seek(offset)
+            read = added = 0
+            pending = b''
+            with self.conn:
+                rows = []
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    data = pending + chunk
+                    cut = data.rfind(b'\n') + 1
+                    pending = data[cut:]
+                    for line in data[:cut].splitlines():
+                        row = entry_row(line) if line.strip() else None
+                        if row:
+                            rows.append(row)
+                    read += cut
+                    if len(rows) >= BATCH_ROWS:
+                        added += self._insert(rows)
+                        rows = []
+                added += self._insert(rows)
+                # Unvollständige letzte Zeile beim nächsten Lauf erneut lesen
+                self._save_file(st, path, fingerprint, offset + read)
+        return read, added
+
+    @staticmethod
+    def _fingerprint(f) -> str:
+        """Hash of the first complete line: fixed once written, differs when an inode is reused"""
+        head = f.read(FINGERPRINT_BYTES)
+        cut = head.find(b'\n')
+        return hashlib.sha1(head[:cut] if cut >= 0 else b'').hexdigest()
+
+    def _save_file(self, st: os.stat_result, path: Path, fingerprint: str, offset: int):
+        self.conn.execute("""
+            INSERT INTO files (dev, inode, path, fingerprint, offset, indexed_at) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (dev, inode) DO UPDATE SET path = excluded.path, fingerprint = excluded.fingerprint,
+                offset = excluded.offset, indexed_at = excluded.indexed_at
+        """, (st.st_dev, st.st_ino, str(path), fingerprint, offset, time.time()))
+
+    def _insert(self, rows: List[Tuple]) -> int:
+        if not rows:
+            return 0
+        first = self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM entries').fetchone()[0]
+        self.conn.executemany(
+            'INSERT INTO entries (ts, level, message, context, request_id, endpoint, method, uri, ip, user_id) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        if self.fts:
+            self.conn.execute('INSERT INTO entries_fts (rowid, message, context) '
+                              'SELECT id, message, context FROM entries WHERE id > ?', (first,))
+        return len(rows)
+
+    # -- queries ------------------------------------------------------------------
+
+    @staticmethod
+    def _filters(levels: Optional[List[str]] = None, endpoint: Optional[str] = None,
+                 since: Optional[float] = None, until: Optional[float] = None,
+                 request_id: Optional[str] = None) -> Tuple[List[str], List]:
+        where, params = [], []
+        if request_id:
+            where.append('e.request_id = ?')
+            params.append(request_id)
+        if levels:
+            where.append('e.level IN (' + ','.join('?' * len(levels)) + ')')
+            params += levels
+        if endpoint:
+            where.append('e.endpoint = ?')
+            params.append(endpoint)
+        if since is not None:
+            where.append('e.ts >= ?')
+            params.append(since)
+        if until is not None:
+            where.append('e.ts < ?')
+            params.append(until)
+        return where, params
+
+    def query(self, levels: Optional[List[str]] = None, endpoint: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None, request_id: Optional[str] = None,
+              search: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Matching entries, newest first (request_id queries oldest first, i.e. in request order)"""
+        where, params = self._filters(levels, endpoint, since, until, request_id)
+        source = 'entries e'
+        if search and self.fts:
+            source = 'entries_fts JOIN entries e ON e.id = entries_fts.rowid'
+            where.append('entries_fts MATCH ?')
+            params.append(search)
+        elif search:
+            where.append('(e.message LIKE ? OR e.context LIKE ?)')
+            params += [f'%{search}%'] * 2
+        order = 'e.ts, e.id' if request_id else 'e.ts DESC, e.id DESC'
+        sql = (f'SELECT e.* FROM {source}' + (' WHERE ' + ' AND '.join(where) if where else '')
+               + f' ORDER BY {order} LIMIT ?')
+        return [dict(row) for row in self.conn.execute(sql, params + [limit])]
+
+    def stats(self, levels: Optional[List[str]] = None, endpoint: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None, bucket: int = 3600) -> List[Dict]:
+        """Entry counts per endpoint and time bucket (default: hour), newest bucket first"""
+        where, params = self._filters(levels or list(ERROR_LEVELS), endpoint, since, until)
+        sql = ("SELECT CAST(e.ts / ? AS INTEGER) * ? AS bucket, COALESCE(e.endpoint, '-') AS endpoint, "
+               "COUNT(*) AS count, COUNT(DISTINCT e.request_id) AS requests FROM entries e"
+               + (' WHERE ' + ' AND '.join(where) if where else '')
+               + ' GROUP BY bucket, endpoint ORDER BY bucket DESC, count DESC')
+        return [dict(row) for row in self.conn.execute(sql, [bucket, bucket] + params)]
+
+
+def _fmt_time(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).astimezone().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _levels(value: Optional[str]) -> Optional[List[str]]:
+    return [v.strip().lower() for v in value.split(',') if v.strip()] if value else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental SQLite/FTS5 index over StructuredLogger logs")
+    parser.add_argument('command', choices=['index', 'query', 'stats'], help="Action")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="SQLite database path")
+    parser.add_argument('--logs', default=DEFAULT_LOG_DIR, help="Log directory (index)")
+    parser.add_argument('--follow', type=float, metavar='SECONDS', help="Keep indexing every SECONDS (index)")
+    parser.add_argument('--request-id', help="Entries of one request")
+    parser.add_argument('--level', help="Comma-separated levels (stats default: error and above)")
+    parser.add_argument('--endpoint', help="Endpoint name, e.g. time-entries")
+    parser.add_argument('--since', help="ISO time or age like 24h / 7d")
+    parser.add_argument('--until', help="ISO time or age")
+    parser.add_argument('--search', help="Full-text search in message/context (FTS5 syntax)")
+    parser.add_argument('--bucket', type=int, default=3600, help="Stats bucket in seconds")
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--json', action='store_true', help="JSON output")
+    args = parser.parse_args()
+
+    index = LogIndex(args.db)
+    try:
+        if args.command == 'index':
+            while True:
+                started = time.perf_counter()
+                totals = index.index_dir(args.logs)
+                if totals['bytes'] or not args.follow:
+                    print(f"📥 {totals['entries']} entries from {totals['files']} files "
+                          f"({totals['bytes'] / 1024:.0f} KiB) in {(time.perf_counter() - started) * 1000:.0f} ms")
+                if not args.follow:
+                    break
+                time.sleep(args.follow)
+            return 0
+
+        since, until = parse_time(args.since), parse_time(args.until)
+        if args.command == 'stats':
+            rows = index.stats(_levels(args.level), args.endpoint, since, until, args.bucket)
+            if args.json:
+                print(json.dumps(rows, indent=2))
+            for row in [] if args.json else rows:
+                print(f"{_fmt_time(row['bucket'])}  {row['endpoint']:<24} {row['count']:>7}  ({row['requests']} requests)")
+            return 0
+
+        rows = index.query(_levels(args.level), args.endpoint, since, until, args.request_id, args.search, args.limit)
+        if args.json:
+            print(json.dumps(rows, indent=2, ensure_ascii=False))
+        for row in [] if args.json else rows:
+            print(f"{_fmt_time(row['ts'])} {row['level'].upper():<9} {row['endpoint'] or '-':<16} "
+                  f"{(row['request_id'] or '-')[:12]}  {row['message']}")
+        return 0
+    except sqlite3.OperationalError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    exit(main())
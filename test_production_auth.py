@@ -6,11 +6,19 @@ Tests for Issue #74 - Authorization vulnerability
 
 import requests
 import json
+import sys
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "tests"))
+from result_store import ResultRecorder, normalize_status
 
 # Production API configuration
 BASE_URL = "https://aze.mikropartner.de/api"
 
+recorder = ResultRecorder("production_auth", BASE_URL)
+RESPONSE_HOOKS = {"response": recorder.record_response}
+
 def test_unauthenticated_access():
     """Test that unauthenticated requests are properly blocked"""
     print("\n=== Testing Unauthenticated Access ===")
@@ -26,7 +34,7 @@ def test_unauthenticated_access():
     
     for endpoint in endpoints:
         try:
-            response = requests.get(BASE_URL + endpoint, verify=False)
+            response = requests.get(BASE_URL + endpoint, verify=False, hooks=RESPONSE_HOOKS)
             if response.status_code == 401:
                 print(f"✅ {endpoint}: Correctly returns 401 Unauthorized")
                 results.append({"endpoint": endpoint, "status": "PASS", "code": 401})
@@ -49,7 +57,8 @@ def test_role_change_protection():
         response = requests.patch(
             BASE_URL + "/users.php",
             json=data,
-            verify=False
+            verify=False,
+            hooks=RESPONSE_HOOKS
         )
         
         if response.status_code == 401:
@@ -79,7 +88,8 @@ def test_sql_injection_protection():
             response = requests.get(
                 BASE_URL + "/time-entries.php",
                 params={"user_id": injection},
-                verify=False
+                verify=False,
+                hooks=RESPONSE_HOOKS
             )
             
             # We expect 401 (unauthorized) or 400 (bad request)
@@ -139,6 +149,14 @@ def generate_report(all_results):
     
     print("\nDetailed report saved to: production_auth_test_report.json")
     
+    for category, results in all_results.items():
+        for result in (results if isinstance(results, list) else [results]):
+            name = result.get('endpoint') or result.get('injection')
+            status = 'pass' if result.get('code') == 401 else normalize_status(result)
+            recorder.add_result(f"{category}: {name}" if name else category, status,
+                                message=result.get('error', ''))
+    recorder.save()
+    
     return passed == total_tests
 
 def main():
@@ -8,6 +8,10 @@ import requests
 import json
 import sys
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "tests"))
+from result_store import ResultRecorder
 
 # Test environment configuration
 BASE_URL = "https://aze.mikropartner.de/aze-test/api"
@@ -18,6 +22,8 @@ class SecurityTester:
         self.base_url = base_url
         self.session = requests.Session()
         self.test_results = []
+        self.recorder = ResultRecorder("security_fixes", base_url)
+        self.recorder.track_session(self.session)
         
     def log_result(self, test_name, passed, details=""):
         """Log test result"""
@@ -166,6 +172,9 @@ class SecurityTester:
         
         print("Report saved to: security_test_report.json")
         
+        self.recorder.add_results(self.test_results)
+        self.recorder.save()
+        
         return failed == 0
 
 def main():
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+API Micro-Benchmark
+Starts `php -S` against build/ with a local MariaDB/MySQL database, seeds
+realistic data volumes and benchmarks each endpoint at fixed concurrency.
+Results are written as JSON (keyed by git revision) so performance changes in
+e.g. time-entries.impl.php or approvals.php can be compared run to run.
+
+Requirements: php (mysqli), mysql client, a local MariaDB/MySQL server.
+The benchmark database is dropped and recreated on --seed.
+
+Usage:
+    python tests/api_benchmark.py run --seed                      # full dataset
+    python tests/api_benchmark.py run --seed --scale 0.05         # quick dataset
+    python tests/api_benchmark.py run --concurrency 16 --requests 2000
+    python tests/api_benchmark.py compare bench_old.json bench_new.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import synthetic_data
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BUILD_DIR = REPO_ROOT / 'build'
+
+DATASET = {'users': 200, 'time_entries': 2_000_000, 'approval_requests': 100_000}
+
+# Schema changes applied on top of build/schema.sql (PHP migrations + SQL migrations)
+MIGRATIONS_SQL = """
+ALTER TABLE time_entries MODIFY stop_time TIME NULL;
+ALTER TABLE approval_requests MODIFY COLUMN type ENUM('edit','delete','create') NOT NULL;
+ALTER TABLE approval_requests MODIFY COLUMN entry_id INT NULL;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS onboarding_completed TINYINT(1) DEFAULT 0;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS home_location VARCHAR(255) NULL;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS created_via_onboarding TINYINT(1) DEFAULT 0;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS pending_since DATETIME NULL;
+"""
+MIGRATION_FILES = ['build/api/migrations/*.sql', 'build/migrations/*.sql']
+
+
+# --------------------------------------------------------------------------- database
+
+class MySQL:
+    """Thin wrapper around the mysql CLI (no Python driver needed)"""
+
+    def __init__(self, host: str, port: int, user: str, password: str, database: str):
+        self.host, self.port, self.user, self.password, self.database = host, port, user, password, database
+
+    def run(self, sql: str, database: bool = True, local_infile: bool = False) -> str:
+        cmd = ['mysql', f'--host={self.host}', f'--port={self.port}', f'--user={self.user}',
+               '--batch', '--skip-column-names', '--default-character-set=utf8mb4']
+        if local_infile:
+            cmd.append('--local-infile=1')
+        if database:
+            cmd.append(self.database)
+        env = dict(os.environ, MYSQL_PWD=self.password)
+        result = subprocess.run(cmd, input=sql, capture_output=True, text=True, env=env)
+        if result.returncode != 0:
+            raise RuntimeError(f"mysql failed: {result.stderr.strip()}")
+        return result.stdout
+
+    def scalar(self, sql: str) -> str:
+        return self.run(sql).strip()
+
+    def version(self) -> str:
+        return self.scalar('SELECT VERSION();')
+
+
+def create_schema(db: MySQL):
+    db.run(f"DROP DATABASE IF EXISTS `{db.database}`; CREATE DATABASE `{db.database}` "
+           f"CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;", database=False)
+    db.run((BUILD_DIR / 'schema.sql').read_text(encoding='utf-8'))
+    db.run(MIGRATIONS_SQL)
+    for pattern in MIGRATION_FILES:
+        for path in sorted(REPO_ROOT.glob(pattern)):
+            db.run(path.read_text(encoding='utf-8'))
+    # Sample rows from schema.sql are replaced by the seeded dataset
+    db.run("SET foreign_key_checks=0; DELETE FROM master_data; DELETE FROM users; SET foreign_key_checks=1;")
+
+
+def seed_dataset(db: MySQL, workdir: Path, users: int, time_entries: int, approvals: int, seed: int = 42) -> Dict:
+    """Generate the dataset with synthetic_data.py and bulk load it with LOAD DATA"""
+    counts = synthetic_data.generate(workdir, users, time_entries, approvals, seed=seed)
+    db.run((workdir / 'load.sql').read_text(encoding='utf-8'), local_infile=True)
+    return counts
+
+
+def bench_users(db: MySQL) -> Dict[str, List[Dict]]:
+    """Seeded users per role, without a running timer (the timer scenario starts one)"""
+    rows = db.run("SELECT u.id, u.role, u.username, u.azure_oid, u.display_name FROM users u "
+                  "WHERE NOT EXISTS (SELECT 1 FROM time_entries t WHERE t.user_id = u.id AND t.stop_time IS NULL) "
+                  "ORDER BY u.id;")
+    users: Dict[str, List[Dict]] = {}
+    for line in rows.splitlines():
+        uid, role, username, oid, name = line.split('\t')
+        users.setdefault(role, []).append({'id': int(uid), 'role': role, 'username': username, 'oid': oid,
+                                           'name': name})
+    return users
+
+
+def dataset_counts(db: MySQL) -> Dict:
+    counts = {}
+    for table in ('users', 'time_entries', 'approval_requests'):
+        counts[table] = int(db.scalar(f"SELECT COUNT(*) FROM `{table}`;"))
+    return counts
+
+
+# ------------------------------------------------------------------------- php server
+
+def _php_serialize(value) -> str:
+    if value is None:
+        return 'N;'
+    if isinstance(value, bool):
+        return f"b:{int(value)};"
+    if isinstance(value, int):
+        return f"i:{value};"
+    if isinstance(value, dict):
+        items = ''.join(_php_serialize(k) + _php_serialize(v) for k, v in value.items())
+        return f"a:{len(value)}:{{{items}}}"
+    text = str(value)
+    return f's:{len(text.encode("utf-8"))}:"{text}";'
+
+
+class BenchSession:
+    """Pre-authenticated PHP session (file handler) for one seeded user"""
+
+    def __init__(self, save_path: Path, user: Dict):
+        self.id = secrets.token_hex(16)
+        self.csrf_token = secrets.token_hex(32)
+        self.user_id = user['id']
+        self.username = user['username']
+        now = int(time.time())
+        data = {
+            'user': {'oid': user['oid'], 'id': user['id'], 'name': user['name'], 'username': user['username'],
+                     'azure_oid': user['oid'], 'role': user['role'], 'needs_onboarding': False},
+            'created_at': now, 'last_activity': now, 'last_regeneration': now,
+            'csrf_token': self.csrf_token, 'csrf_token_time': now,
+        }
+        payload = ''.join(f"{k}|{_php_serialize(v)}" for k, v in data.items())
+        (save_path / f"sess_{self.id}").write_text(payload, encoding='utf-8')
+
+    def http_session(self, workers: int):
+        import requests
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        session.mount('http://', adapter)
+        session.cookies.set('AZE_SESSION', self.id)
+        session.cookies.set('csrf_cookie_token', hashlib.sha256(self.csrf_token.encode()).hexdigest())
+        session.headers.update({'X-CSRF-Token': self.csrf_token, 'Content-Type': 'application/json'})
+        return session
+
+
+class PHPServer:
+    def __init__(self, db: MySQL, workers: int, port: int = 0):
+        self.db = db
+        self.workers = workers
+        self.port = port or self._free_port()
+        self.tmp = Path(tempfile.mkdtemp(prefix='aze-bench-'))
+        self.session_path = self.tmp / 'sessions'
+        self.session_path.mkdir()
+        self.process = None
+
+    @staticmethod
+    def _free_port() -> int:
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            return s.getsockname()[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        env = dict(os.environ,
+                   DB_HOST=self.db.host,
+                   DB_USERNAME=self.db.user, DB_PASSWORD=self.db.password, DB_NAME=self.db.database,
+                   APP_ENV='production', APP_DEBUG='false', RATE_LIMIT_ENABLED='false',
+                   PHP_CLI_SERVER_WORKERS=str(self.workers))
+        cmd = ['php', '-d', 'variables_order=EGPCS', '-d', f'session.save_path={self.session_path}',
+               '-d', f'mysqli.default_port={self.db.port}',
+               '-d', 'display_errors=0', '-d', 'opcache.enable_cli=1',
+               '-S', f'127.0.0.1:{self.port}', '-t', str(BUILD_DIR)]
+        self.process = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=0.2):
+                    return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__(None, None, None)
+        raise RuntimeError("php -S did not start")
+
+    def __exit__(self, *exc):
+        if self.process:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+# -------------------------------------------------------------------------- scenarios
+
+# name -> (role of the session user, request function(http, base_url, bench_session) -> [(label, status, seconds)])
+Scenario = Callable[[object, str, BenchSession], List[Tuple[str, int, float]]]
+
+
+def _timed(label: str, call) -> Tuple[str, int, float]:
+    start = time.perf_counter()
+    response = call()
+    elapsed = time.perf_counter() - start
+    return label, response.status_code, elapsed
+
+
+def _get(label: str, path: str) -> Scenario:
+    return lambda http, base, _: [_timed(label, lambda: http.get(base + path, timeout=60))]
+
+
+def _post(label: str, path: str, body: Dict) -> Scenario:
+    return lambda http, base, _: [_timed(label, lambda: http.post(base + path, json=body, timeout=60))]
+
+
+def _timer_cycle(http, base: str, session: BenchSession) -> List[Tuple[str, int, float]]:
+    now = datetime.now()
+    start = time.perf_counter()
+    response = http.post(f"{base}/api/time-entries.php?action=start", timeout=60, json={
+        'date': now.strftime('%Y-%m-%d'), 'startTime': now.strftime('%H:%M:%S'), 'createdBy': session.username})
+    samples = [('timer_start', response.status_code, time.perf_counter() - start)]
+    try:
+        entry_id = response.json().get('id')
+    except ValueError:
+        entry_id = None
+    if entry_id:
+        samples.append(_timed('timer_stop', lambda: http.post(
+            f"{base}/api/time-entries.php?action=stop", timeout=60,
+            json={'id': entry_id, 'stopTime': datetime.now().strftime('%H:%M:%S'), 'updatedBy': session.username})))
+    return samples
+
+
+SCENARIOS: Dict[str, Tuple[str, Scenario]] = {
+    'health': ('Admin', _get('health', '/api/health.php')),
+    'auth_status': ('Mitarbeiter', _get('auth_status', '/api/auth-status.php')),
+    'login_bootstrap_employee': ('Mitarbeiter', _post('login_bootstrap_employee', '/api/login.php', {})),
+    'login_bootstrap_admin': ('Admin', _post('login_bootstrap_admin', '/api/login.php', {})),
+    'settings': ('Mitarbeiter', _get('settings', '/api/settings.php')),
+    'approvals_pending_admin': ('Admin', _get('approvals_pending_admin', '/api/approvals.php')),
+    'approvals_pending_leader': ('Standortleiter', _get('approvals_pending_leader', '/api/approvals.php')),
+    'approvals_all_admin': ('Admin', _get('approvals_all_admin', '/api/approvals.php?status=all')),
+    'check_running': ('Mitarbeiter', _get('check_running', '/api/time-entries.php?action=check_running')),
+    'timer_start_stop': ('Mitarbeiter', _timer_cycle),
+}
+
+def _summary(latencies: List[float], statuses: List[int], wall: float) -> Dict:
+    ordered = sorted(latencies)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))] * 1000 if ordered else 0.0
+
+    errors = sum(1 for s in statuses if s >= 400 or s == 0)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'status_codes': {str(code): statuses.count(code) for code in sorted(set(statuses))},
+        'throughput_rps': round(len(latencies) / wall, 2) if wall else 0.0,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        'p50_ms': round(pct(0.50), 3),
+        'p90_ms': round(pct(0.90), 3),
+        'p99_ms': round(pct(0.99), 3),
+        'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def run_scenario(server: PHPServer, users: Dict[str, List[Dict]], name: str, concurrency: int, total: int,
+                 warmup: int) -> Dict[str, Dict]:
+    role, scenario = SCENARIOS[name]
+    candidates = users.get(role)
+    if not candidates:
+        raise SystemExit(f"❌ No seeded '{role}' user for scenario {name} - reseed with more users")
+    # One session per worker (distinct users for write scenarios, so timers do not collide)
+    sessions = [BenchSession(server.session_path, candidates[i % len(candidates)]) for i in range(concurrency)]
+    clients = [s.http_session(1) for s in sessions]
+
+    for i in range(warmup):
+        scenario(clients[i % concurrency], server.base_url, sessions[i % concurrency])
+
+    samples: Dict[str, Tuple[List[float], List[int]]] = {}
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker(slot: int):
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    return
+            for label, status, elapsed in scenario(clients[slot], server.base_url, sessions[slot]):
+                with lock:
+                    latencies, statuses = samples.setdefault(label, ([], []))
+                    latencies.append(elapsed)
+                    statuses.append(status)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    wall = time.perf_counter() - start
+    return {label: _summary(lat, st, wall) for label, (lat, st) in samples.items()}
+
+
+# ---------------------------------------------------------------------------- runner
+
+def _git_rev() -> Optional[str]:
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=REPO_ROOT)
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--', 'build/api'], capture_output=True, text=True,
+                               cwd=REPO_ROOT).stdout.strip()
+        return rev.stdout.strip() + ('-dirty' if dirty else '')
+    except Exception:
+        return None
+
+
+def _php_version() -> str:
+    out = subprocess.run(['php', '-r', 'echo PHP_VERSION;'], capture_output=True, text=True)
+    return out.stdout.strip()
+
+
+def run_benchmark(args) -> Dict:
+    if (BUILD_DIR / '.env').exists():
+        # config.php prefers build/.env over the environment - never benchmark against its database
+        raise SystemExit("❌ build/.env exists and would override the benchmark database settings. Move it away first.")
+
+    db = MySQL(args.db_host, args.db_port, args.db_user, args.db_password, args.db_name)
+    if args.seed:
+        sizes = {k: max(1, int(v * args.scale)) for k, v in DATASET.items()}
+        sizes['users'] = max(sizes['users'], 200)
+        print(f"🌱 Seeding {args.db_name}: {sizes}")
+        started = time.perf_counter()
+        create_schema(db)
+        with tempfile.TemporaryDirectory(prefix='aze-seed-') as workdir:
+            seed_dataset(db, Path(workdir), sizes['users'], sizes['time_entries'], sizes['approval_requests'])
+        print(f"   done in {time.perf_counter() - started:.1f}s")
+
+    names = args.scenarios or list(SCENARIOS)
+    results = {
+        'meta': {
+            'git_rev': _git_rev(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'php_version': _php_version(),
+            'db_version': db.version(),
+            'dataset': dataset_counts(db),
+            'concurrency': args.concurrency,
+            'requests_per_scenario': args.requests,
+            'warmup': args.warmup,
+        },
+        'endpoints': {},
+    }
+
+    users = bench_users(db)
+    with PHPServer(db, args.concurrency) as server:
+        print(f"🚀 php -S on {server.base_url} (workers={args.concurrency})")
+        for name in names:
+            for label, summary in run_scenario(server, users, name, args.concurrency, args.requests, args.warmup).items():
+                results['endpoints'][label] = summary
+                flag = "✅" if summary['errors'] == 0 else "❌"
+                print(f"{flag} {label:28s} p50 {summary['p50_ms']:8.2f} ms  p99 {summary['p99_ms']:8.2f} ms  "
+                      f"{summary['throughput_rps']:8.1f} req/s  errors {summary['errors']}")
+    return results
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"📊 {old['meta'].get('git_rev')} → {new['meta'].get('git_rev')}")
+    regressions = 0
+    for label in sorted(set(old['endpoints']) | set(new['endpoints'])):
+        a, b = old['endpoints'].get(label), new['endpoints'].get(label)
+        if not a or not b:
+            print(f"   {label:28s} {'added' if b else 'removed'}")
+            continue
+        change = (b['p50_ms'] - a['p50_ms']) / a['p50_ms'] * 100 if a['p50_ms'] else 0.0
+        flag = "🔴" if change > threshold else "🟢" if change < -threshold else "⚪"
+        regressions += change > threshold
+        print(f"{flag} {label:28s} p50 {a['p50_ms']:8.2f} → {b['p50_ms']:8.2f} ms ({change:+.1f}%)  "
+              f"p99 {a['p99_ms']:8.2f} → {b['p99_ms']:8.2f} ms")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AZE API micro-benchmark")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help="Seed (optional) and benchmark")
+    run.add_argument('--db-host', default=os.environ.get('BENCH_DB_HOST', '127.0.0.1'))
+    run.add_argument('--db-port', type=int, default=int(os.environ.get('BENCH_DB_PORT', '3306')))
+    run.add_argument('--db-user', default=os.environ.get('BENCH_DB_USER', 'root'))
+    run.add_argument('--db-password', default=os.environ.get('BENCH_DB_PASSWORD', ''))
+    run.add_argument('--db-name', default=os.environ.get('BENCH_DB_NAME', 'aze_bench'))
+    run.add_argument('--seed', action='store_true', help="Drop, recreate and seed the benchmark database")
+    run.add_argument('--scale', type=float, default=1.0, help="Dataset scale factor (1.0 = 2M time entries)")
+    run.add_argument('--concurrency', type=int, default=8)
+    run.add_argument('--requests', type=int, default=500, help="Iterations per scenario")
+    run.add_argument('--warmup', type=int, default=20)
+    run.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS))
+    run.add_argument('--output', help="JSON result file (default: api_benchmark_<rev>.json)")
+
+    cmp_ = sub.add_parser('compare', help="Compare two result files")
+    cmp_.add_argument('old')
+    cmp_.add_argument('new')
+    cmp_.add_argument('--threshold', type=float, default=10.0, help="p50 change in %% flagged as regression")
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        return compare(args.old, args.new, args.threshold)
+
+    results = run_benchmark(args)
+    output = args.output or f"api_benchmark_{results['meta']['git_rev'] or 'unknown'}.json"
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"📄 Results saved to: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Test Impact Index
+Static map from tests to the PHP files they exercise, used to pick the
+minimal set of tests for a change.
+
+- Python suites (tests/*.py, test_*.py): per test function, the *.php URLs it
+  and the same-file helpers it calls use (make_request, send_guess, ...)
+- Playwright specs (build/e2e, build/tests/e2e, tests/e2e): per test(), the
+  *.php URLs in the test, its describe block / beforeEach and the file header
+- PHPUnit tests (build/tests): per test method, the *.php files it loads
+- PHP endpoints: require/include graph of build/api and api/
+
+Usage:
+    python tests/impact_index.py select                 # working tree vs HEAD
+    python tests/impact_index.py select --base main     # branch vs main
+    python tests/impact_index.py select --files build/api/approvals.php
+    python tests/impact_index.py show build/api/DatabaseConnection.php
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+INDEX_FILE = REPO_ROOT / 'tests' / '.impact_index.json'
+
+PHP_DIRS = ['build/api', 'api']
+PYTHON_GLOBS = ['tests/*.py', 'test_*.py']
+PLAYWRIGHT_GLOBS = ['build/e2e/*.spec.ts', 'build/tests/e2e/*.test.ts', 'tests/e2e/*.spec.ts']
+PHPUNIT_GLOBS = ['build/tests/**/*Test.php']
+
+PHP_REF = re.compile(r'([\w.-]+\.php)\b')
+INCLUDE_RE = re.compile(
+    r'\b(?:require|include)(?:_once)?\s*\(?\s*(?:__DIR__\s*\.\s*)?[\'"]([^\'"]+\.php)[\'"]'
+)
+# Hooks, or test()/describe() calls with a title *and* a callback - a bare
+# test.skip('reason') inside a test body is a runtime skip, not a block
+TS_BLOCK_RE = re.compile(
+    r'\btest\.(beforeEach|beforeAll)\s*\('
+    r'|\btest(?:\.(describe|only|skip)(?:\.\w+)?)?\s*\(\s*([\'"`])(.*?)\3\s*,\s*'
+    r'(?:\{[^{}]*\}\s*,\s*)?(?:async\b|function\b|\(|\w+\s*=>)'
+)
+PHPUNIT_METHOD_RE = re.compile(r'public\s+function\s+(test\w+)\s*\(')
+
+
+def _rel(path: Path) -> str:
+    return path.resolve().relative_to(REPO_ROOT).as_posix()
+
+
+def _glob(patterns: Iterable[str]) -> List[Path]:
+    files = set()
+    for pattern in patterns:
+        files.update(p for p in REPO_ROOT.glob(pattern) if p.is_file())
+    return sorted(files)
+
+
+class ImpactIndex:
+    def __init__(self, data: Dict):
+        self.includes: Dict[str, List[str]] = data['includes']
+        self.php_by_name: Dict[str, List[str]] = data['php_by_name']
+        self.tests: Dict[str, Dict] = data['tests']
+        self.python_imports: Dict[str, List[str]] = data['python_imports']
+        self.sources: Dict[str, float] = data['sources']
+        self._closure: Dict[str, Set[str]] = {}
+
+    # ------------------------------------------------------------------ build
+
+    @classmethod
+    def build(cls) -> 'ImpactIndex':
+        php_files = [p for d in PHP_DIRS for p in sorted((REPO_ROOT / d).glob('*.php'))]
+        php_by_name: Dict[str, List[str]] = {}
+        for path in php_files:
+            php_by_name.setdefault(path.name, []).append(_rel(path))
+
+        includes = {_rel(p): cls._php_includes(p) for p in php_files}
+        tests: Dict[str, Dict] = {}
+        python_imports: Dict[str, List[str]] = {}
+        sources: Dict[str, float] = {}
+
+        local_modules = {p.stem: _rel(p) for p in _glob(PYTHON_GLOBS)}
+        for path in _glob(PYTHON_GLOBS):
+            rel = _rel(path)
+            sources[rel] = path.stat().st_mtime
+            try:
+                tree = ast.parse(path.read_text(encoding='utf-8'))
+            except (SyntaxError, UnicodeDecodeError):
+                continue
+            python_imports[rel] = sorted(cls._python_local_imports(tree, local_modules))
+            for name, refs in cls._python_functions(tree):
+                tests[f"{rel}::{name}"] = {'kind': 'python', 'file': rel, 'name': name, 'refs': sorted(refs)}
+
+        for path in _glob(PLAYWRIGHT_GLOBS):
+            rel = _rel(path)
+            sources[rel] = path.stat().st_mtime
+            for title, refs in cls._playwright_tests(path):
+                tests[f"{rel}::{title}"] = {'kind': 'playwright', 'file': rel, 'name': title, 'refs': sorted(refs)}
+
+        for path in _glob(PHPUNIT_GLOBS):
+            rel = _rel(path)
+            sources[rel] = path.stat().st_mtime
+            for method, refs in cls._phpunit_tests(path):
+                tests[f"{rel}::{method}"] = {'kind': 'phpunit', 'file': rel, 'name': method, 'refs': sorted(refs)}
+
+        for path in php_files:
+            sources[_rel(path)] = path.stat().st_mtime
+
+        return cls({'includes': includes, 'php_by_name': php_by_name, 'tests': tests,
+                    'python_imports': python_imports, 'sources': sources})
+
+    @staticmethod
+    def _php_includes(path: Path) -> List[str]:
+        """Files a PHP file pulls in via require/include with a literal path"""
+        found = set()
+        for target in INCLUDE_RE.findall(path.read_text(encoding='utf-8', errors='replace')):
+            resolved = (path.parent / target.lstrip('/')).resolve()
+            if resolved.is_file() and REPO_ROOT in resolved.parents:
+                found.add(_rel(resolved))
+        return sorted(found)
+
+    @staticmethod
+    def _python_local_imports(tree: ast.AST, local_modules: Dict[str, str]) -> Set[str]:
+        found = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                names = [node.module] if node.module else []
+            else:
+                continue
+            found.update(local_modules[n] for n in names if n in local_modules)
+        return found
+
+    @staticmethod
+    def _python_functions(tree: ast.AST):
+        """(test function, *.php names in its string literals and in the same-file helpers it calls)"""
+        functions: Dict[str, ast.AST] = {}
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                functions[node.name] = node
+            elif isinstance(node, ast.ClassDef):
+                for item in node.body:
+                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        functions[f"{node.name}.{item.name}"] = item
+
+        by_short_name = {name.rsplit('.', 1)[-1]: name for name in functions}
+        direct: Dict[str, Set[str]] = {}
+        calls: Dict[str, Set[str]] = {}
+        for name, node in functions.items():
+            direct[name], calls[name] = set(), set()
+            for child in ast.walk(node):
+                if isinstance(child, ast.Constant) and isinstance(child.value, str):
+                    direct[name].update(PHP_REF.findall(child.value))
+                elif isinstance(child, ast.Call):
+                    callee = child.func.id if isinstance(child.func, ast.Name) else \
+                        child.func.attr if isinstance(child.func, ast.Attribute) else None
+                    if callee in by_short_name:
+                        calls[name].add(by_short_name[callee])
+
+        for name in functions:
+            short = name.rsplit('.', 1)[-1]
+            if not (short.startswith('test') or short == 'run_tests'):
+                continue
+            refs, seen, stack = set(), set(), [name]
+            while stack:
+                current = stack.pop()
+                if current in seen:
+                    continue
+                seen.add(current)
+                refs |= direct[current]
+                stack.extend(calls[current])
+            yield name, refs
+
+    @staticmethod
+    def _playwright_tests(path: Path):
+        """(test title, *.php names from the test, its describe/beforeEach scope and the file header)"""
+        source = path.read_text(encoding='utf-8', errors='replace')
+        blocks = list(TS_BLOCK_RE.finditer(source))
+        header_refs = set(PHP_REF.findall(source[:blocks[0].start()] if blocks else source))
+        header_refs |= ImpactIndex._page_object_refs(path, source)
+
+        scope_refs: Set[str] = set()
+        for i, match in enumerate(blocks):
+            end = blocks[i + 1].start() if i + 1 < len(blocks) else len(source)
+            refs = set(PHP_REF.findall(source[match.start():end]))
+            kind, title = match.group(1) or match.group(2), match.group(4)
+            if kind == 'describe':
+                scope_refs = refs
+            elif kind in ('beforeEach', 'beforeAll'):
+                scope_refs |= refs
+            else:
+                yield title, refs | scope_refs | header_refs
+
+    @staticmethod
+    def _page_object_refs(path: Path, source: str) -> Set[str]:
+        refs = set()
+        for module in re.findall(r'from\s+[\'"](\.{1,2}/[^\'"]+)[\'"]', source):
+            candidate = (path.parent / module).with_suffix('.ts')
+            if candidate.is_file():
+                refs.update(PHP_REF.findall(candidate.read_text(encoding='utf-8', errors='replace')))
+        return refs
+
+    @staticmethod
+    def _phpunit_tests(path: Path):
+        source = path.read_text(encoding='utf-8', errors='replace')
+        methods = list(PHPUNIT_METHOD_RE.finditer(source))
+        class_refs = set(PHP_REF.findall(source[:methods[0].start()] if methods else source))
+        class_refs.discard('bootstrap.php')
+        for i, match in enumerate(methods):
+            end = methods[i + 1].start() if i + 1 < len(methods) else len(source)
+            refs = set(PHP_REF.findall(source[match.start():end])) | class_refs
+            yield match.group(1), refs
+
+    # ------------------------------------------------------------ persistence
+
+    def save(self, path: Path = INDEX_FILE):
+        with open(path, 'w') as f:
+            json.dump({'includes': self.includes, 'php_by_name': self.php_by_name, 'tests': self.tests,
+                       'python_imports': self.python_imports, 'sources': self.sources}, f, indent=1)
+
+    @classmethod
+    def load(cls, path: Path = INDEX_FILE) -> 'ImpactIndex':
+        """Cached index, rebuilt when any indexed source changed or a new one appeared"""
+        if path.exists():
+            try:
+                with open(path) as f:
+                    index = cls(json.load(f))
+                if not index._stale():
+                    return index
+            except (ValueError, KeyError):
+                pass
+        index = cls.build()
+        index.save(path)
+        return index
+
+    def _stale(self) -> bool:
+        current = _glob(PYTHON_GLOBS + PLAYWRIGHT_GLOBS + PHPUNIT_GLOBS)
+        current += [p for d in PHP_DIRS for p in (REPO_ROOT / d).glob('*.php')]
+        if len(current) != len(self.sources):
+            return True
+        for path in current:
+            rel = _rel(path)
+            if self.sources.get(rel) != path.stat().st_mtime:
+                return True
+        return False
+
+    # -------------------------------------------------------------- selection
+
+    def closure(self, php_file: str) -> Set[str]:
+        """php_file plus everything it includes, transitively"""
+        if php_file not in self._closure:
+            seen, stack = set(), [php_file]
+            while stack:
+                current = stack.pop()
+                if current in seen:
+                    continue
+                seen.add(current)
+                stack.extend(self.includes.get(current, []))
+            self._closure[php_file] = seen
+        return self._closure[php_file]
+
+    def test_files(self, test: Dict) -> Set[str]:
+        files = set()
+        for ref in test['refs']:
+            for php_file in self.php_by_name.get(ref, []):
+                files |= self.closure(php_file)
+        return files
+
+    def select(self, changed: Iterable[str]) -> Dict:
+        changed = set(changed)
+        selected: Dict[str, Dict] = {}
+        reasons: Dict[str, Set[str]] = {}
+
+        def pick(test_id: str, reason: str):
+            selected[test_id] = self.tests[test_id]
+            reasons.setdefault(test_id, set()).add(reason)
+
+        # Changed test files and the python helpers they import
+        changed_modules = {f for f in changed if f.endswith('.py')}
+        for rel, imports in self.python_imports.items():
+            for module in changed_modules & set(imports):
+                changed.add(rel)
+                reasons.setdefault(rel, set()).add(module)
+        for test_id, test in self.tests.items():
+            if test['file'] in changed:
+                pick(test_id, test['file'])
+
+        # Changed PHP files, through the include graph
+        changed_php = {f for f in changed if f.endswith('.php') and f.split('/')[0] in ('build', 'api')}
+        covered = set()
+        for test_id, test in self.tests.items():
+            hit = changed_php & self.test_files(test)
+            if hit:
+                covered |= hit
+                for f in hit:
+                    pick(test_id, f)
+
+        test_files = {t['file'] for t in self.tests.values()} | set(self.python_imports)
+        unmapped = sorted(f for f in changed if f not in test_files and f not in covered)
+        return {
+            'tests': {tid: sorted(reasons[tid]) for tid in sorted(selected)},
+            'uncovered_php': sorted(changed_php - covered),
+            'unmapped': unmapped,
+        }
+
+    def commands(self, test_ids: Iterable[str]) -> List[str]:
+        by_file: Dict[str, List[str]] = {}
+        for test_id in test_ids:
+            test = self.tests[test_id]
+            by_file.setdefault(test['file'], []).append(test)
+
+        commands = []
+        for rel, tests in sorted(by_file.items()):
+            kind = tests[0]['kind']
+            if kind == 'python':
+                # Suites are standalone scripts: run the whole file
+                commands.append(f"python {rel}")
+            elif kind == 'playwright':
+                pattern = '|'.join(re.escape(t['name']) for t in tests)
+                spec = os.path.relpath(REPO_ROOT / rel, REPO_ROOT / 'build')
+                commands.append(f"cd build && npx playwright test {spec} -g \"{pattern}\"")
+            elif kind == 'phpunit':
+                pattern = '|'.join(t['name'] for t in tests)
+                commands.append(f"cd build && vendor/bin/phpunit --filter '/::({pattern})$/' "
+                                f"{os.path.relpath(REPO_ROOT / rel, REPO_ROOT / 'build')}")
+        return commands
+
+
+def changed_files(base: str) -> List[str]:
+    """Files changed against `base` (committed, staged, unstaged and untracked)"""
+    def git(*args) -> List[str]:
+        out = subprocess.run(['git', *args], capture_output=True, text=True, cwd=REPO_ROOT, check=True)
+        return [line for line in out.stdout.splitlines() if line]
+
+    files = set(git('diff', '--name-only', base))
+    files.update(git('ls-files', '--others', '--exclude-standard'))
+    return sorted(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Select tests affected by a change")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sel = sub.add_parser('select', help="Tests affected by a git diff or a file list")
+    sel.add_argument('--base', default='HEAD', help="Git revision to diff against")
+    sel.add_argument('--files', nargs='+', help="Changed files (instead of git diff)")
+    sel.add_argument('--json', action='store_true', help="Machine-readable output")
+    show = sub.add_parser('show', help="Tests that reach a file")
+    show.add_argument('file')
+    sub.add_parser('index', help="Rebuild the cached index")
+    args = parser.parse_args()
+
+    if args.command == 'index':
+        index = ImpactIndex.build()
+        index.save()
+        print(f"📇 Indexed {len(index.tests)} tests, {len(index.includes)} PHP files -> {_rel(INDEX_FILE)}")
+        return 0
+
+    index = ImpactIndex.load()
+
+    if args.command == 'show':
+        target = _rel(Path(args.file))
+        for test_id, test in sorted(index.tests.items()):
+            if target in index.test_files(test) or test['file'] == target:
+                print(test_id)
+        return 0
+
+    files = args.files or changed_files(args.base)
+    result = index.select(files)
+    if args.json:
+        print(json.dumps({**result, 'commands': index.commands(result['tests'])}, indent=2))
+        return 0
+
+    print(f"🔍 {len(files)} changed file(s), {len(result['tests'])} affected test(s)")
+    for test_id, reasons in result['tests'].items():
+        print(f"  • {test_id}  ← {', '.join(reasons)}")
+    if result['uncovered_php']:
+        print("\n⚠️  Changed PHP without any mapped test:")
+        for f in result['uncovered_php']:
+            print(f"  - {f}")
+    if result['tests']:
+        print("\n▶️  Run:")
+        for command in index.commands(result['tests']):
+            print(f"  {command}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
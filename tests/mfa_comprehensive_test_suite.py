@@ -17,10 +17,6 @@ This test suite verifies:
 import requests
 import json
 import time
-import hashlib
-import hmac
-import base64
-import struct
 import re
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Any
@@ -28,6 +24,9 @@ import sqlite3
 import os
 import sys
 
+from mfa_totp import generate_totp_code, generate_totp_window
+from result_store import ResultRecorder
+
 # Test Configuration
 TEST_URL = "https://aze.mikropartner.de/aze-test"
 TEST_USER_EMAIL = "mfa-test@example.com"
@@ -39,6 +38,8 @@ class MFATestSuite:
     def __init__(self):
         self.session = requests.Session()
         self.test_results = []
+        self.recorder = ResultRecorder("mfa_comprehensive", TEST_URL)
+        self.recorder.track_session(self.session)
         self.failed_tests = []
         self.passed_tests = []
         self.setup_complete = False
@@ -97,26 +98,7 @@ class MFATestSuite:
 
     def generate_totp_code(self, secret: str, timestamp: int = None) -> str:
         """Generate TOTP code for testing"""
-        if timestamp is None:
-            timestamp = int(time.time()) // 30
-            
-        # Convert secret from base32
-        secret_bytes = base64.b32decode(secret.upper() + '=' * (8 - len(secret) % 8))
-        
-        # Pack timestamp
-        time_bytes = struct.pack('>Q', timestamp)
-        
-        # Generate HMAC-SHA1
-        hmac_hash = hmac.new(secret_bytes, time_bytes, hashlib.sha1).digest()
-        
-        # Dynamic truncation
-        offset = hmac_hash[-1] & 0x0f
-        truncated = struct.unpack('>I', hmac_hash[offset:offset + 4])[0]
-        truncated &= 0x7fffffff
-        
-        # Generate 6-digit code
-        code = truncated % 1000000
-        return f"{code:06d}"
+        return generate_totp_code(secret, timestamp)
 
     def test_endpoint_availability(self):
         """Test 1: Verify MFA endpoints are accessible"""
@@ -264,15 +246,10 @@ class MFATestSuite:
         # Test TOTP code generation with known secret
         current_time = int(time.time())
         
-        # Generate codes for different time windows
-        codes = []
-        timestamps = []
-        
-        for i in range(-2, 3):  # Test 5 different time windows
-            timestamp = (current_time // 30) + i
-            code = self.generate_totp_code(TOTP_SECRET, timestamp)
-            codes.append(code)
-            timestamps.append(timestamp)
+        # Generate codes for 5 different time windows in one batch
+        window = generate_totp_window(TOTP_SECRET, current_time // 30, before=2, after=2)
+        timestamps = list(window.keys())
+        codes = list(window.values())
         
         # Verify all codes are 6 digits and numeric
         valid_codes = all(re.match(r'^\d{6}$', code) for code in codes)
@@ -622,6 +599,9 @@ class MFATestSuite:
         with open(report_file, 'w') as f:
             f.write(report)
         
+        self.recorder.add_results(self.test_results)
+        self.recorder.save()
+        
         print("\n" + "=" * 60)
         print(f"📄 Test Report Generated: {report_file}")
         print(f"📊 Pass Rate: {pass_rate:.1f}% ({passed}/{total_tests} tests passed)")
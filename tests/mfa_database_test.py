@@ -11,11 +11,15 @@ from datetime import datetime
 import hashlib
 import base64
 
+from result_store import ResultRecorder
+
 class MFADatabaseTest:
     def __init__(self, base_url="https://aze.mikropartner.de/aze-test"):
         self.base_url = base_url
         self.session = requests.Session()
         self.results = []
+        self.recorder = ResultRecorder("mfa_database", base_url)
+        self.recorder.track_session(self.session)
         
     def log_result(self, test_name, success, message, details=None):
         """Log test result"""
@@ -351,6 +355,9 @@ class MFADatabaseTest:
         with open("MFA_DATABASE_TEST_REPORT.md", "w") as f:
             f.write(report)
         
+        self.recorder.add_results(self.results)
+        self.recorder.save()
+        
         print("\n" + "=" * 50)
         print(f"📄 Database Test Report: MFA_DATABASE_TEST_REPORT.md")
         print(f"📊 Database Pass Rate: {pass_rate:.1f}%")
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+MFA Lockout Simulator
+Fires pipelined guess sequences at /api/mfa-verify.php (or an in-process
+stand-in with the same lockout rules) to check:
+1. Lockout threshold (MFA_MAX_ATTEMPTS failed attempts -> 429)
+2. Lockout holds even for a valid TOTP code
+3. Backup code comparison timing does not leak matching prefixes
+
+Usage:
+    python mfa_lockout_simulator.py                      # local stand-in
+    python mfa_lockout_simulator.py --url https://aze.mikropartner.de/aze-test --user-id 42
+    python mfa_lockout_simulator.py --report /tmp/lockout.json  # default: tests/mfa_lockout_report.json
+"""
+
+import argparse
+import hmac
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from mfa_totp import TOTP_WINDOW, current_step, generate_totp_code, verify_totp_code
+from result_store import ResultRecorder
+
+# Mirrors mfa-config.php defaults
+MFA_MAX_ATTEMPTS = 5
+MFA_LOCKOUT_DURATION = 30  # minutes
+
+DEFAULT_REPORT_PATH = str(Path(__file__).parent / 'mfa_lockout_report.json')
+MFA_BACKUP_CODE_LENGTH = 8
+
+TOTP_SECRET = "JBSWY3DPEHPK3PXP"
+BACKUP_CODES = ["40718263", "91827364", "55501234", "12093847", "66351902", "78812345", "30495867", "24681357"]
+
+
+class LocalMFAVerifier:
+    """In-process stand-in for mfa-verify.php (same status codes and lockout rules)"""
+
+    def __init__(self, secret: str = TOTP_SECRET, backup_codes: List[str] = None,
+                 max_attempts: int = MFA_MAX_ATTEMPTS, lockout_minutes: int = MFA_LOCKOUT_DURATION,
+                 clock: Callable[[], float] = time.time):
+        self.secret = secret
+        self.backup_codes = list(backup_codes if backup_codes is not None else BACKUP_CODES)
+        self.max_attempts = max_attempts
+        self.lockout_seconds = lockout_minutes * 60
+        self.clock = clock
+        self._failed: Dict[int, List[float]] = {}
+        self._locked_until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def verify(self, user_id: int, code: str) -> Tuple[int, Dict]:
+        """Return (status_code, body) exactly like the PHP endpoint would"""
+        code = ''.join(ch for ch in str(code) if ch.isdigit())
+        if not user_id or not code:
+            return 400, {'success': False, 'error': 'Missing required fields'}
+
+        with self._lock:
+            now = self.clock()
+            if self._locked_until.get(user_id, 0) > now:
+                return 429, {'success': False, 'error': 'Account temporarily locked',
+                             'locked_until': self._locked_until[user_id], 'attempts_remaining': 0}
+
+            if self._verify_code(code):
+                # Like clear_failed_attempts(): only the lockout is removed, the audit log stays
+                self._locked_until.pop(user_id, None)
+                return 200, {'success': True, 'message': 'MFA verification successful'}
+
+            window_start = now - self.lockout_seconds
+            attempts = [t for t in self._failed.get(user_id, []) if t > window_start]
+            attempts.append(now)
+            self._failed[user_id] = attempts
+            remaining = max(0, self.max_attempts - len(attempts))
+            if remaining == 0:
+                self._locked_until[user_id] = now + self.lockout_seconds
+                return 429, {'success': False, 'error': 'Too many failed attempts. Account locked.',
+                             'locked': True, 'attempts_remaining': 0}
+            return 400, {'success': False, 'error': 'Invalid code', 'attempts_remaining': remaining}
+
+    def _verify_code(self, code: str) -> bool:
+        if len(code) == 6:
+            return verify_totp_code(self.secret, code, current_step(self.clock()), TOTP_WINDOW)
+        if len(code) == MFA_BACKUP_CODE_LENGTH:
+            # Constant-time over all codes: no early exit, no prefix-dependent timing
+            matched = False
+            for candidate in self.backup_codes:
+                matched |= hmac.compare_digest(candidate, code)
+            return matched
+        return False
+
+
+class MFALockoutSimulator:
+    def __init__(self, base_url: Optional[str] = None, user_id: int = 4242, concurrency: int = 8,
+                 timeout: int = 10, verifier: Optional[LocalMFAVerifier] = None,
+                 report_path: str = DEFAULT_REPORT_PATH):
+        self.report_path = report_path
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.user_id = user_id
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.verifier = verifier or LocalMFAVerifier()
+        self.results = []
+        self.recorder = ResultRecorder("mfa_lockout", self.base_url or "local")
+        self.session = None
+        if self.base_url:
+            import requests
+            self.session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
+            self.recorder.track_session(self.session)
+
+    def log_result(self, test_name: str, success: bool, message: str, details: Dict = None):
+        """Log test result"""
+        self.results.append({
+            "test": test_name,
+            "success": success,
+            "message": message,
+            "details": details or {},
+            "timestamp": datetime.now().isoformat()
+        })
+        status = "✅" if success else "❌"
+        print(f"{status} {test_name}: {message}")
+
+    def send_guess(self, user_id: int, code: str) -> Dict:
+        """Send one verification attempt and time it"""
+        start = time.perf_counter()
+        if self.session is None:
+            status, body = self.verifier.verify(user_id, code)
+        else:
+            try:
+                response = self.session.post(f"{self.base_url}/api/mfa-verify.php",
+                                             json={"user_id": user_id, "code": code}, timeout=self.timeout)
+                status = response.status_code
+                try:
+                    body = response.json()
+                except ValueError:
+                    body = {'raw': response.text[:200]}
+            except Exception as e:
+                status, body = 0, {'error': str(e)}
+        return {"code": code, "status": status, "body": body, "elapsed": time.perf_counter() - start}
+
+    def fire_sequence(self, user_id: int, codes: List[str], concurrency: int = None) -> List[Dict]:
+        """Fire a guess sequence with `concurrency` requests in flight; results keep input order"""
+        workers = concurrency or self.concurrency
+        if workers == 1:
+            return [self.send_guess(user_id, code) for code in codes]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda code: self.send_guess(user_id, code), codes))
+
+    def test_lockout_threshold(self):
+        """Test 1: Lockout after MFA_MAX_ATTEMPTS failed guesses, even at full attack rate"""
+        user_id = self.user_id
+        guesses = [f"{n:06d}" for n in range(MFA_MAX_ATTEMPTS * 3)]
+        valid = set(generate_totp_code(TOTP_SECRET, current_step() + d) for d in range(-TOTP_WINDOW, TOTP_WINDOW + 1))
+        guesses = [g for g in guesses if g not in valid]
+
+        start = time.perf_counter()
+        attempts = self.fire_sequence(user_id, guesses)
+        duration = time.perf_counter() - start
+
+        statuses = [a["status"] for a in attempts]
+        accepted = sum(1 for s in statuses if s == 200)
+        rejected_before_lock = sum(1 for s in statuses if s == 400)
+        first_lock = next((i + 1 for i, s in enumerate(statuses) if s == 429), None)
+        success = accepted == 0 and first_lock is not None and rejected_before_lock <= MFA_MAX_ATTEMPTS - 1
+
+        self.log_result(
+            "Lockout Threshold",
+            success,
+            f"{len(attempts)} guesses at {len(attempts) / duration:.0f} req/s, "
+            f"{rejected_before_lock} rejected before lockout, first 429 at attempt {first_lock}",
+            {"status_codes": statuses, "max_attempts": MFA_MAX_ATTEMPTS, "concurrency": self.concurrency}
+        )
+
+    def test_lockout_blocks_valid_code(self):
+        """Test 2: A locked account rejects the correct TOTP code"""
+        attempt = self.send_guess(self.user_id, generate_totp_code(TOTP_SECRET))
+        success = attempt["status"] == 429
+        self.log_result(
+            "Lockout Blocks Valid Code",
+            success,
+            f"Valid code after lockout returned {attempt['status']}",
+            {"body": attempt["body"]}
+        )
+
+    def test_backup_code_timing(self, samples: int = 200):
+        """Test 3: Backup code verification time must not depend on matching prefix length"""
+        # Fresh user per sample batch so the lockout does not short-circuit verification
+        target = self.verifier.backup_codes[0] if self.session is None else BACKUP_CODES[0]
+        timings: Dict[int, List[float]] = {}
+        base_user = self.user_id + 1000
+
+        for prefix_len in range(MFA_BACKUP_CODE_LENGTH):
+            suffix_digit = str((int(target[prefix_len]) + 1) % 10)
+            guess = (target[:prefix_len] + suffix_digit * (MFA_BACKUP_CODE_LENGTH - prefix_len))
+            codes = [guess] * samples
+            # Spread guesses across users to stay below the lockout threshold
+            elapsed = []
+            for i in range(0, samples, MFA_MAX_ATTEMPTS - 1):
+                user = base_user + prefix_len * samples + i
+                batch = codes[i:i + MFA_MAX_ATTEMPTS - 1]
+                elapsed.extend(a["elapsed"] for a in self.fire_sequence(user, batch, concurrency=1))
+            timings[prefix_len] = elapsed
+
+        medians = {k: statistics.median(v) for k, v in timings.items()}
+        spread = max(medians.values()) - min(medians.values())
+        noise = statistics.median([statistics.pstdev(v) for v in timings.values()])
+        # Leak if timing grows monotonically with prefix length beyond measurement noise
+        ordered = [medians[k] for k in sorted(medians)]
+        monotonic = all(b >= a for a, b in zip(ordered, ordered[1:]))
+        success = not (monotonic and spread > noise)
+
+        self.log_result(
+            "Backup Code Timing",
+            success,
+            f"Median spread {spread * 1e6:.1f}µs across prefix lengths (noise {noise * 1e6:.1f}µs)",
+            {"median_us_by_prefix": {k: round(v * 1e6, 2) for k, v in medians.items()}}
+        )
+
+    def run_all_tests(self):
+        """Run all lockout simulations"""
+        target = self.base_url or "local stand-in"
+        print(f"🔐 MFA Lockout Simulator - target: {target}")
+        print("=" * 60)
+        self.test_lockout_threshold()
+        self.test_lockout_blocks_valid_code()
+        self.test_backup_code_timing()
+        return self.generate_report()
+
+    def generate_report(self):
+        """Print summary and return overall success"""
+        passed = sum(1 for r in self.results if r["success"])
+        total = len(self.results)
+        print("=" * 60)
+        print(f"📊 {passed}/{total} simulations passed")
+        with open(self.report_path, 'w') as f:
+            json.dump({"target": self.base_url or "local", "results": self.results}, f, indent=2, default=str)
+        self.recorder.add_results(self.results)
+        self.recorder.save()
+        return passed == total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MFA lockout and timing simulator")
+    parser.add_argument('--url', help="Base URL (omit to use the local stand-in)")
+    parser.add_argument('--user-id', type=int, default=4242, help="MFA-enabled test user id")
+    parser.add_argument('--concurrency', type=int, default=8, help="Guesses in flight")
+    parser.add_argument('--report', default=DEFAULT_REPORT_PATH, help="JSON report file")
+    args = parser.parse_args()
+
+    simulator = MFALockoutSimulator(args.url, args.user_id, args.concurrency, report_path=args.report)
+    return 0 if simulator.run_all_tests() else 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -8,8 +8,11 @@ import urllib.request
 import urllib.error
 import json
 import ssl
+import time
 from datetime import datetime
 
+from result_store import ResultRecorder
+
 # Disable SSL verification for test environment
 ssl_context = ssl.create_default_context()
 ssl_context.check_hostname = False
@@ -17,9 +20,12 @@ ssl_context.verify_mode = ssl.CERT_NONE
 
 TEST_URL = "https://aze.mikropartner.de/aze-test"
 
+recorder = ResultRecorder("mfa_simple", TEST_URL)
+
 def test_endpoint(endpoint, method="GET", data=None):
     """Test an API endpoint"""
     url = f"{TEST_URL}{endpoint}"
+    start = time.perf_counter()
     
     try:
         if data:
@@ -32,6 +38,7 @@ def test_endpoint(endpoint, method="GET", data=None):
         response = urllib.request.urlopen(req, context=ssl_context, timeout=10)
         status = response.getcode()
         body = response.read().decode('utf-8')
+        recorder.add_latency(url, method, status, time.perf_counter() - start)
         
         return {
             "success": True,
@@ -39,6 +46,7 @@ def test_endpoint(endpoint, method="GET", data=None):
             "body": body
         }
     except urllib.error.HTTPError as e:
+        recorder.add_latency(url, method, e.code, time.perf_counter() - start)
         return {
             "success": False,
             "status": e.code,
@@ -65,9 +73,11 @@ def run_tests():
     if result["status"] in [200, 401, 405]:  # Expected responses
         print("✅ MFA Setup endpoint is accessible")
         tests_passed += 1
+        recorder.add_result("MFA Setup Endpoint", "pass")
     else:
         print(f"❌ MFA Setup endpoint failed: {result['error']}")
         tests_failed += 1
+        recorder.add_result("MFA Setup Endpoint", "fail", message=result.get("error", ""))
     
     # Test 2: MFA Verify Endpoint
     print("\n2. Testing MFA Verify Endpoint...")
@@ -75,9 +85,11 @@ def run_tests():
     if result["status"] in [400, 401, 405]:  # Expected for missing data
         print("✅ MFA Verify endpoint is accessible")
         tests_passed += 1
+        recorder.add_result("MFA Verify Endpoint", "pass")
     else:
         print(f"❌ MFA Verify endpoint failed: {result['error']}")
         tests_failed += 1
+        recorder.add_result("MFA Verify Endpoint", "fail", message=result.get("error", ""))
     
     # Test 3: Database Schema Check
     print("\n3. Testing Database Schema...")
@@ -85,9 +97,11 @@ def run_tests():
     if result["success"] and "ALTER TABLE" in result.get("body", ""):
         print("✅ Database schema file is accessible")
         tests_passed += 1
+        recorder.add_result("Database Schema", "pass")
     else:
         print("❌ Database schema file not found")
         tests_failed += 1
+        recorder.add_result("Database Schema", "fail", message=result.get("error", ""))
     
     # Test 4: Config File
     print("\n4. Testing MFA Configuration...")
@@ -95,9 +109,11 @@ def run_tests():
     if result["status"] in [200, 403]:  # May be protected
         print("✅ MFA config file exists")
         tests_passed += 1
+        recorder.add_result("MFA Configuration", "pass")
     else:
         print("❌ MFA config file not found")
         tests_failed += 1
+        recorder.add_result("MFA Configuration", "fail", message=result.get("error", ""))
     
     # Test 5: Login with MFA
     print("\n5. Testing Login with MFA...")
@@ -105,9 +121,11 @@ def run_tests():
     if result["status"] in [400, 401, 405]:  # Expected for no auth
         print("✅ Login with MFA endpoint is accessible")
         tests_passed += 1
+        recorder.add_result("Login with MFA", "pass")
     else:
         print(f"❌ Login with MFA failed: {result['error']}")
         tests_failed += 1
+        recorder.add_result("Login with MFA", "fail", message=result.get("error", ""))
     
     # Summary
     print("\n" + "=" * 50)
@@ -153,6 +171,7 @@ Status: {'READY' if failed == 0 else 'NEEDS ATTENTION'}
             f.write(report)
         
         print(f"\n📄 Report saved to: mfa_test_report.txt")
+        recorder.save()
         
     except Exception as e:
         print(f"\n❌ Test execution error: {e}")
\ No newline at end of file
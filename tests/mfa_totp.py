@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Shared TOTP helpers for the MFA test suites
+RFC 6238 code generation matching api/mfa-setup.php (SHA1, 6 digits, 30s period).
+
+Decoded secrets and keyed HMAC states are cached per secret, so generating
+many codes (time-step windows, brute-force sequences) only pays the base32
+decode and HMAC key setup once.
+"""
+
+import base64
+import hashlib
+import hmac
+import struct
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+TOTP_PERIOD = 30        # Seconds per time step (MFA_TOTP_PERIOD)
+TOTP_DIGITS = 6         # Code length (MFA_CODE_LENGTH)
+TOTP_WINDOW = 1         # Accepted steps before/after (MFA_TOTP_WINDOW)
+
+_MODULUS = 10 ** TOTP_DIGITS
+_COUNTER = struct.Struct('>Q')
+_TRUNCATE = struct.Struct('>I')
+
+
+@lru_cache(maxsize=128)
+def decode_secret(secret: str) -> bytes:
+    """Decode a base32 secret (padding optional, case-insensitive)"""
+    normalized = secret.strip().replace(' ', '').upper()
+    return base64.b32decode(normalized + '=' * (-len(normalized) % 8))
+
+
+@lru_cache(maxsize=128)
+def _keyed_hmac(secret: str):
+    """HMAC-SHA1 state with the key already absorbed; copy() per message"""
+    return hmac.new(decode_secret(secret), digestmod=hashlib.sha1)
+
+
+def current_step(timestamp: Optional[float] = None) -> int:
+    """Time step (counter) for a unix timestamp, default now"""
+    return int(time.time() if timestamp is None else timestamp) // TOTP_PERIOD
+
+
+def _code_for_step(base, step: int) -> str:
+    mac = base.copy()
+    mac.update(_COUNTER.pack(step))
+    digest = mac.digest()
+    offset = digest[-1] & 0x0f
+    truncated = _TRUNCATE.unpack_from(digest, offset)[0] & 0x7fffffff
+    return f"{truncated % _MODULUS:0{TOTP_DIGITS}d}"
+
+
+def generate_totp_code(secret: str, timestamp: int = None) -> str:
+    """Generate the TOTP code for a time step (default: current step)
+
+    `timestamp` is the time-step counter, not seconds - same semantics as the
+    former per-suite generate_totp_code implementations.
+    """
+    step = current_step() if timestamp is None else timestamp
+    return _code_for_step(_keyed_hmac(secret), step)
+
+
+def generate_totp_codes(secret: str, steps: Iterable[int]) -> List[str]:
+    """Generate codes for many time steps in one batch"""
+    base = _keyed_hmac(secret)
+    return [_code_for_step(base, step) for step in steps]
+
+
+def generate_totp_window(secret: str, step: int = None, before: int = TOTP_WINDOW,
+                         after: int = TOTP_WINDOW) -> Dict[int, str]:
+    """Codes for every step in [step - before, step + after], keyed by step"""
+    center = current_step() if step is None else step
+    steps = range(center - before, center + after + 1)
+    return dict(zip(steps, generate_totp_codes(secret, steps)))
+
+
+def verify_totp_code(secret: str, code: str, step: int = None, window: int = TOTP_WINDOW) -> bool:
+    """Server-side check with clock drift tolerance (like verify_totp_code in PHP)"""
+    candidates = generate_totp_window(secret, step, window, window).values()
+    # Compare against every candidate so timing does not reveal which step matched
+    matched = False
+    for candidate in candidates:
+        matched |= hmac.compare_digest(candidate, code)
+    return matched
@@ -8,18 +8,19 @@ import requests
 import json
 import time
 import re
-import hashlib
-import hmac
-import base64
-import struct
 from datetime import datetime
 from typing import Dict, List, Optional
 
+from mfa_totp import generate_totp_code
+from result_store import ResultRecorder
+
 class MFAUserFlowTest:
     def __init__(self, base_url="https://aze.mikropartner.de/aze-test"):
         self.base_url = base_url
         self.session = requests.Session()
         self.results = []
+        self.recorder = ResultRecorder("mfa_user_flow", base_url)
+        self.recorder.track_session(self.session)
         self.test_user_data = None
         
     def log_result(self, test_name: str, success: bool, message: str, details: Dict = None):
@@ -38,27 +39,8 @@ class MFAUserFlowTest:
         
     def generate_totp_code(self, secret: str, timestamp: int = None) -> str:
         """Generate TOTP code for testing"""
-        if timestamp is None:
-            timestamp = int(time.time()) // 30
-            
         try:
-            # Convert secret from base32
-            secret_bytes = base64.b32decode(secret.upper() + '=' * (8 - len(secret) % 8))
-            
-            # Pack timestamp
-            time_bytes = struct.pack('>Q', timestamp)
-            
-            # Generate HMAC-SHA1
-            hmac_hash = hmac.new(secret_bytes, time_bytes, hashlib.sha1).digest()
-            
-            # Dynamic truncation
-            offset = hmac_hash[-1] & 0x0f
-            truncated = struct.unpack('>I', hmac_hash[offset:offset + 4])[0]
-            truncated &= 0x7fffffff
-            
-            # Generate 6-digit code
-            code = truncated % 1000000
-            return f"{code:06d}"
+            return generate_totp_code(secret, timestamp)
         except Exception as e:
             print(f"Error generating TOTP code: {e}")
             return "000000"
@@ -551,6 +533,9 @@ class MFAUserFlowTest:
         with open("MFA_USER_FLOW_TEST_REPORT.md", "w") as f:
             f.write(report)
         
+        self.recorder.add_results(self.results)
+        self.recorder.save()
+        
         print("\n" + "=" * 50)
         print(f"📄 User Flow Test Report: MFA_USER_FLOW_TEST_REPORT.md")
         print(f"👤 User Experience Score: {pass_rate:.1f}%")
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Test Result Store
+SQLite history of every suite run (results + per-endpoint latency) with
+trend, flakiness and latency regression queries.
+
+Suites record through ResultRecorder:
+
+    recorder = ResultRecorder("mfa_user_flow", environment=base_url)
+    recorder.track_session(self.session)      # endpoint latency via response hook
+    ...
+    recorder.add_results(self.results)        # at report time
+    recorder.save()                           # one transaction per run
+
+Report:
+    python result_store.py report --format md --output TEST_TRENDS.md
+    python result_store.py report --format html --output test_trends.html
+"""
+
+import argparse
+import html
+import os
+import sqlite3
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+DEFAULT_DB_PATH = os.environ.get('AZE_TEST_RESULTS_DB', str(Path(__file__).parent / 'test_results.db'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    suite TEXT NOT NULL,
+    environment TEXT,
+    git_rev TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_suite_started ON runs(suite, started_at);
+
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    test TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration_ms REAL,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_test_run ON results(test, run_id);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results(run_id);
+
+CREATE TABLE IF NOT EXISTS latencies (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    endpoint TEXT NOT NULL,
+    method TEXT,
+    status_code INTEGER,
+    latency_ms REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_latencies_endpoint_time ON latencies(endpoint, recorded_at);
+CREATE INDEX IF NOT EXISTS idx_latencies_run_endpoint ON latencies(run_id, endpoint);
+"""
+
+PASS, FAIL, ERROR = 'pass', 'fail', 'error'
+
+
+def _git_rev() -> Optional[str]:
+    """Short commit hash of the checkout, so trends can be lined up with deploys"""
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             timeout=5, cwd=Path(__file__).parent)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def normalize_status(result: Dict) -> str:
+    """Map the different suite result shapes (success / passed / status) onto pass/fail/error"""
+    if 'success' in result:
+        return PASS if result['success'] else FAIL
+    if 'passed' in result:
+        return PASS if result['passed'] else FAIL
+    status = str(result.get('status', '')).upper()
+    if status in ('PASS', 'PASSED', 'BLOCKED', 'OK'):
+        return PASS
+    if status == 'ERROR':
+        return ERROR
+    return FAIL
+
+
+class ResultStore:
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def save_run(self, suite: str, environment: str, started_at: float, results: Iterable[tuple],
+                 latencies: Iterable[tuple], finished_at: float = None) -> int:
+        """Write one run with all its rows in a single transaction
+
+        results:   (test, status, duration_ms, message)
+        latencies: (endpoint, method, status_code, latency_ms, recorded_at)
+        """
+        with self.conn:
+            cur = self.conn.execute(
+                'INSERT INTO runs (suite, environment, git_rev, started_at, finished_at) VALUES (?, ?, ?, ?, ?)',
+                (suite, environment, _git_rev(), started_at, finished_at or time.time())
+            )
+            run_id = cur.lastrowid
+            self.conn.executemany(
+                'INSERT INTO results (run_id, test, status, duration_ms, message) VALUES (?, ?, ?, ?, ?)',
+                ((run_id,) + tuple(r) for r in results)
+            )
+            self.conn.executemany(
+                'INSERT INTO latencies (run_id, endpoint, method, status_code, latency_ms, recorded_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                ((run_id,) + tuple(l) for l in latencies)
+            )
+        return run_id
+
+    def suites(self) -> List[str]:
+        return [row[0] for row in self.conn.execute('SELECT DISTINCT suite FROM runs ORDER BY suite')]
+
+    def run_trend(self, suite: str, limit: int = 20) -> List[Dict]:
+        """Pass/fail counts of the last `limit` runs of a suite, oldest first"""
+        rows = self.conn.execute("""
+            SELECT r.id, r.started_at, r.git_rev,
+                   COUNT(res.test) AS total,
+                   SUM(res.status = 'pass') AS passed,
+                   SUM(res.status <> 'pass') AS failed,
+                   SUM(res.duration_ms) AS duration_ms
+            FROM (SELECT * FROM runs WHERE suite = ? ORDER BY started_at DESC LIMIT ?) r
+            LEFT JOIN results res ON res.run_id = r.id
+            GROUP BY r.id
+            ORDER BY r.started_at
+        """, (suite, limit)).fetchall()
+        trend = []
+        for row in rows:
+            item = dict(row)
+            item['pass_rate'] = (item['passed'] or 0) / item['total'] * 100 if item['total'] else 0.0
+            trend.append(item)
+        return trend
+
+    def flakiness(self, suite: str = None, window: int = 20, min_runs: int = 3) -> List[Dict]:
+        """Flakiness score per test: status flips / possible flips over its last `window` runs
+
+        0.0 = stable (always passing or always failing), 1.0 = alternates every run.
+        """
+        rows = self.conn.execute("""
+            WITH recent AS (
+                SELECT runs.suite, res.test, res.status,
+                       ROW_NUMBER() OVER (PARTITION BY runs.suite, res.test ORDER BY res.run_id DESC) AS rn
+                FROM results res JOIN runs ON runs.id = res.run_id
+                WHERE (? IS NULL OR runs.suite = ?)
+            ),
+            ordered AS (
+                SELECT suite, test, status,
+                       LAG(status) OVER (PARTITION BY suite, test ORDER BY rn DESC) AS prev_status
+                FROM recent WHERE rn <= ?
+            )
+            SELECT suite, test,
+                   COUNT(*) AS runs,
+                   SUM(status = 'pass') AS passed,
+                   SUM(prev_status IS NOT NULL AND status <> prev_status) AS flips
+            FROM ordered
+            GROUP BY suite, test
+            HAVING COUNT(*) >= ?
+        """, (suite, suite, window, min_runs)).fetchall()
+        scores = []
+        for row in rows:
+            item = dict(row)
+            item['score'] = item['flips'] / (item['runs'] - 1)
+            scores.append(item)
+        return sorted(scores, key=lambda s: (-s['score'], s['suite'], s['test']))
+
+    def endpoint_latency(self, endpoint: str = None, days: int = 30) -> Dict[str, List[Dict]]:
+        """Per-endpoint latency stats for each run in the last `days`, oldest first"""
+        since = time.time() - days * 86400
+        rows = self.conn.execute("""
+            SELECT l.endpoint, l.run_id, r.started_at, r.git_rev, l.latency_ms
+            FROM latencies l JOIN runs r ON r.id = l.run_id
+            WHERE l.recorded_at >= ? AND (? IS NULL OR l.endpoint = ?)
+            ORDER BY l.endpoint, r.started_at, l.run_id
+        """, (since, endpoint, endpoint))
+
+        series: Dict[str, List[Dict]] = {}
+        current_key, samples, meta = None, [], None
+        for row in rows:
+            key = (row['endpoint'], row['run_id'])
+            if key != current_key:
+                if current_key is not None:
+                    series.setdefault(current_key[0], []).append(self._latency_point(meta, samples))
+                current_key, samples, meta = key, [], row
+            samples.append(row['latency_ms'])
+        if current_key is not None:
+            series.setdefault(current_key[0], []).append(self._latency_point(meta, samples))
+        return series
+
+    @staticmethod
+    def _latency_point(meta, samples: List[float]) -> Dict:
+        return {
+            'run_id': meta['run_id'],
+            'started_at': meta['started_at'],
+            'git_rev': meta['git_rev'],
+            'count': len(samples),
+            'avg_ms': statistics.fmean(samples),
+            'p50_ms': _percentile(samples, 0.50),
+            'p95_ms': _percentile(samples, 0.95),
+        }
+
+    def latency_regressions(self, threshold: float = 1.25, baseline_runs: int = 5, days: int = 30) -> List[Dict]:
+        """Endpoints whose latest p50 exceeds the median p50 of the previous runs by `threshold`"""
+        regressions = []
+        for endpoint, points in self.endpoint_latency(days=days).items():
+            if len(points) < 2:
+                continue
+            latest = points[-1]
+            baseline = statistics.median(p['p50_ms'] for p in points[-baseline_runs - 1:-1])
+            if baseline > 0 and latest['p50_ms'] > baseline * threshold:
+                regressions.append({
+                    'endpoint': endpoint,
+                    'baseline_p50_ms': baseline,
+                    'latest_p50_ms': latest['p50_ms'],
+                    'ratio': latest['p50_ms'] / baseline,
+                    'git_rev': latest['git_rev'],
+                })
+        return sorted(regressions, key=lambda r: -r['ratio'])
+
+
+class ResultRecorder:
+    """Collects results and endpoint latencies of one suite run, saved in one go"""
+
+    def __init__(self, suite: str, environment: str = '', db_path: str = DEFAULT_DB_PATH):
+        self.suite = suite
+        self.environment = environment
+        self.db_path = db_path
+        self.started_at = time.time()
+        self.results: List[tuple] = []
+        self.latencies: List[tuple] = []
+
+    def record_response(self, response, *args, **kwargs):
+        """requests response hook: hooks={'response': recorder.record_response}"""
+        self.add_latency(response.url, response.request.method, response.status_code,
+                         response.elapsed.total_seconds())
+        return response
+
+    def track_session(self, session):
+        """Record latency of every response of a requests.Session"""
+        session.hooks.setdefault('response', []).append(self.record_response)
+        return session
+
+    def add_latency(self, url: str, method: str, status_code: int, seconds: float):
+        endpoint = urlsplit(url).path or url
+        self.latencies.append((endpoint, method, status_code, seconds * 1000, time.time()))
+
+    def add_result(self, test: str, status: str, duration: float = None, message: str = ''):
+        duration_ms = duration * 1000 if duration is not None else None
+        self.results.append((test, status, duration_ms, (message or '')[:500]))
+
+    def add_results(self, results: Iterable[Dict]):
+        """Add suite result dicts (test/name + success/passed/status [+ duration, message/details])"""
+        for result in results:
+            name = result.get('test') or result.get('name') or result.get('endpoint') or result.get('injection')
+            message = result.get('message') or result.get('details') or result.get('error') or ''
+            self.add_result(str(name), normalize_status(result), result.get('duration'),
+                            message if isinstance(message, str) else str(message))
+
+    def save(self) -> Optional[int]:
+        """Persist the run; never lets a store problem fail the suite itself"""
+        try:
+            store = ResultStore(self.db_path)
+            try:
+                return store.save_run(self.suite, self.environment, self.started_at, self.results, self.latencies)
+            finally:
+                store.close()
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not write results to {self.db_path}: {e}")
+            return None
+
+
+def _fmt_time(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M')
+
+
+def build_report(store: ResultStore, runs: int = 20, days: int = 30) -> Dict:
+    return {
+        'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'trends': {suite: store.run_trend(suite, runs) for suite in store.suites()},
+        'flaky': [f for f in store.flakiness(window=runs) if f['score'] > 0],
+        'latency': store.endpoint_latency(days=days),
+        'regressions': store.latency_regressions(days=days),
+    }
+
+
+def render_markdown(report: Dict) -> str:
+    lines = ["# Test Trend Report", "", f"**Generated:** {report['generated']}", ""]
+
+    lines += ["## Latency Regressions", ""]
+    if report['regressions']:
+        lines += ["| Endpoint | Baseline p50 | Latest p50 | Ratio | Rev |", "|---|---|---|---|---|"]
+        for r in report['regressions']:
+            lines.append(f"| {r['endpoint']} | {r['baseline_p50_ms']:.0f} ms | {r['latest_p50_ms']:.0f} ms "
+                         f"| {r['ratio']:.2f}x | {r['git_rev'] or '-'} |")
+    else:
+        lines.append("No endpoint slower than its baseline.")
+    lines.append("")
+
+    lines += ["## Suite Trends", ""]
+    for suite, trend in report['trends'].items():
+        lines += [f"### {suite}", "", "| Run | Date | Rev | Passed | Failed | Pass Rate |", "|---|---|---|---|---|---|"]
+        for t in trend:
+            lines.append(f"| {t['id']} | {_fmt_time(t['started_at'])} | {t['git_rev'] or '-'} | "
+                         f"{t['passed'] or 0} | {t['failed'] or 0} | {t['pass_rate']:.1f}% |")
+        lines.append("")
+
+    lines += ["## Flaky Tests", ""]
+    if report['flaky']:
+        lines += ["| Suite | Test | Runs | Passed | Flips | Score |", "|---|---|---|---|---|---|"]
+        for f in report['flaky']:
+            lines.append(f"| {f['suite']} | {f['test']} | {f['runs']} | {f['passed']} | {f['flips']} | {f['score']:.2f} |")
+    else:
+        lines.append("No flaky tests.")
+    lines.append("")
+
+    lines += ["## Endpoint Latency", ""]
+    for endpoint, points in sorted(report['latency'].items()):
+        lines += [f"### {endpoint}", "", "| Date | Rev | Requests | Avg | p50 | p95 |", "|---|---|---|---|---|---|"]
+        for p in points:
+            lines.append(f"| {_fmt_time(p['started_at'])} | {p['git_rev'] or '-'} | {p['count']} | "
+                         f"{p['avg_ms']:.0f} ms | {p['p50_ms']:.0f} ms | {p['p95_ms']:.0f} ms |")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def render_html(report: Dict) -> str:
+    def table(headers: List[str], rows: List[List]) -> str:
+        head = ''.join(f'<th>{html.escape(h)}</th>' for h in headers)
+        body = ''.join('<tr>' + ''.join(f'<td>{html.escape(str(c))}</td>' for c in row) + '</tr>' for row in rows)
+        return f'<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+    def bars(points: List[Dict]) -> str:
+        peak = max(p['p50_ms'] for p in points) or 1
+        return '<div class="bars">' + ''.join(
+            f'<span title="{_fmt_time(p["started_at"])}: {p["p50_ms"]:.0f} ms" '
+            f'style="height:{max(2, int(p["p50_ms"] / peak * 60))}px"></span>' for p in points
+        ) + '</div>'
+
+    parts = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Test Trend Report</title><style>',
+        'body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;margin-bottom:1.5em}',
+        'td,th{border:1px solid #ccc;padding:4px 8px;text-align:left}',
+        '.bars{display:flex;align-items:flex-end;gap:2px;height:64px}.bars span{width:8px;background:#3b82f6}',
+        '</style></head><body>',
+        f'<h1>Test Trend Report</h1><p>Generated: {html.escape(report["generated"])}</p>',
+        '<h2>Latency Regressions</h2>',
+    ]
+    if report['regressions']:
+        parts.append(table(['Endpoint', 'Baseline p50 (ms)', 'Latest p50 (ms)', 'Ratio', 'Rev'], [
+            [r['endpoint'], f"{r['baseline_p50_ms']:.0f}", f"{r['latest_p50_ms']:.0f}", f"{r['ratio']:.2f}x",
+             r['git_rev'] or '-'] for r in report['regressions']]))
+    else:
+        parts.append('<p>No endpoint slower than its baseline.</p>')
+
+    parts.append('<h2>Suite Trends</h2>')
+    for suite, trend in report['trends'].items():
+        parts.append(f'<h3>{html.escape(suite)}</h3>')
+        parts.append(table(['Run', 'Date', 'Rev', 'Passed', 'Failed', 'Pass Rate'], [
+            [t['id'], _fmt_time(t['started_at']), t['git_rev'] or '-', t['passed'] or 0, t['failed'] or 0,
+             f"{t['pass_rate']:.1f}%"] for t in trend]))
+
+    parts.append('<h2>Flaky Tests</h2>')
+    if report['flaky']:
+        parts.append(table(['Suite', 'Test', 'Runs', 'Passed', 'Flips', 'Score'], [
+            [f['suite'], f['test'], f['runs'], f['passed'], f['flips'], f"{f['score']:.2f}"] for f in report['flaky']]))
+    else:
+        parts.append('<p>No flaky tests.</p>')
+
+    parts.append('<h2>Endpoint Latency (p50 per run)</h2>')
+    for endpoint, points in sorted(report['latency'].items()):
+        parts.append(f'<h3>{html.escape(endpoint)}</h3>{bars(points)}')
+        parts.append(table(['Date', 'Rev', 'Requests', 'Avg (ms)', 'p50 (ms)', 'p95 (ms)'], [
+            [_fmt_time(p['started_at']), p['git_rev'] or '-', p['count'], f"{p['avg_ms']:.0f}",
+             f"{p['p50_ms']:.0f}", f"{p['p95_ms']:.0f}"] for p in points]))
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test result history and trend report")
+    parser.add_argument('command', choices=['report'], help="Action")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="SQLite database path")
+    parser.add_argument('--format', choices=['md', 'html'], default='md')
+    parser.add_argument('--output', help="Output file (default: stdout)")
+    parser.add_argument('--runs', type=int, default=20, help="Runs per suite / flakiness window")
+    parser.add_argument('--days', type=int, default=30, help="Latency history in days")
+    args = parser.parse_args()
+
+    store = ResultStore(args.db)
+    try:
+        report = build_report(store, args.runs, args.days)
+    finally:
+        store.close()
+
+    content = render_html(report) if args.format == 'html' else render_markdown(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(content)
+        print(f"📄 Trend report saved to: {args.output}")
+    else:
+        print(content)
+    return 1 if report['regressions'] else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -16,6 +16,8 @@ from pathlib import Path
 current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
+from result_store import ResultRecorder
+
 class MFATestRunner:
     def __init__(self):
         self.test_results = {}
@@ -112,6 +114,10 @@ class MFATestRunner:
             {
                 'script': 'mfa_user_flow_test.py',
                 'description': 'User Flow and Experience Tests'
+            },
+            {
+                'script': 'mfa_lockout_simulator.py',
+                'description': 'Lockout and Backup Code Timing Simulation'
             }
         ]
         
@@ -122,6 +128,20 @@ class MFATestRunner:
         
         self.end_time = datetime.now()
         self.generate_master_report()
+        self.record_results()
+    
+    def record_results(self):
+        """Store suite-level results (status + duration) in the result history"""
+        recorder = ResultRecorder("mfa_runner", "https://aze.mikropartner.de/aze-test/")
+        recorder.started_at = self.start_time.timestamp()
+        for script_name, result in self.test_results.items():
+            recorder.add_result(
+                script_name,
+                'pass' if result['success'] else ('error' if 'error' in result else 'fail'),
+                result['duration'],
+                result.get('error', '')
+            )
+        recorder.save()
     
     def generate_master_report(self):
         """Generate comprehensive master test report"""
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Synthetic AZE Dataset Generator
+Deterministic, realistic data for the schema in build/schema.sql (plus the
+migrations: nullable stop_time, master_data locations/daily_hours, onboarding
+columns, 'create' approvals with NULL entry_id, user_locations and
+approval_requests.requested_by_user_id).
+
+- users / master_data: role mix, part-time profiles, home office, locations
+  (mirrored into the user_locations junction table)
+- time_entries: several segments per day with breaks, vacation and sick
+  days, forgotten stops (NULL stop_time) and currently running timers
+- approval_requests: edit/delete/create with the JSON payloads approvals.php
+  writes (original_entry_data, new_data, reason_data), pending/resolved
+- daily_totals: derived from time_entries by load.sql after the bulk load
+
+Output is either LOAD DATA files (tab-separated, MySQL default escaping) or
+multi-row INSERT batches. Generation streams row by row per user, so memory
+stays bounded; users are split into shards that run in parallel and produce
+identical output for any worker count (entry ids are derived from the user).
+
+Usage:
+    python tests/synthetic_data.py --users 2000 --entries 20000000 --approvals 1000000 --out /tmp/aze-data
+    python tests/synthetic_data.py --format sql --batch 2000 --out /tmp/aze-sql
+    mysql --local-infile=1 aze_bench < /tmp/aze-data/load.sql
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+TABLE_COLUMNS = {
+    'users': ['id', 'username', 'display_name', 'role', 'azure_oid', 'created_at', 'onboarding_completed',
+              'home_location'],
+    'master_data': ['user_id', 'weekly_hours', 'workdays', 'can_work_from_home', 'locations', 'flexible_workdays',
+                    'daily_hours'],
+    'user_locations': ['user_id', 'location'],
+    'time_entries': ['id', 'user_id', 'username', 'date', 'start_time', 'stop_time', 'location', 'role',
+                     'created_at', 'updated_by', 'updated_at'],
+    'approval_requests': ['id', 'type', 'entry_id', 'original_entry_data', 'new_data', 'reason_data',
+                          'requested_by', 'requested_at', 'status', 'resolved_by', 'resolved_at', 'requested_by_user_id'],
+}
+TABLE_ORDER = ['users', 'master_data', 'user_locations', 'time_entries', 'approval_requests']
+
+LOCATIONS = ['Zentrale Berlin', 'Standort Hamburg', 'Standort Köln', 'Standort München', 'Standort Leipzig']
+HOME_OFFICE = 'Home-Office'
+CHANGE_REASONS = ['Arzttermin', 'Dienstgang', 'Vergessen einzustempeln', 'Vergessen auszustempeln',
+                  'Technische Störung', 'Sonstige']
+WEEKDAYS = ['Mo', 'Di', 'Mi', 'Do', 'Fr', 'Sa', 'So']
+ROLE_WEIGHTS = [('Admin', 1), ('Bereichsleiter', 2), ('Standortleiter', 5), ('Mitarbeiter', 85), ('Honorarkraft', 7)]
+FIRST_NAMES = ['Anna', 'Ben', 'Clara', 'David', 'Elena', 'Felix', 'Greta', 'Hannah', 'Jonas', 'Katrin', 'Lukas',
+               'Marie', 'Niklas', 'Olga', 'Paul', 'Sabine', 'Thomas', 'Ute', 'Vanessa', 'Wolfgang', 'Yvonne', 'Zoe']
+LAST_NAMES = ['Müller', 'Schmidt', 'Schneider', 'Fischer', 'Weber', 'Meyer', 'Wagner', 'Becker', 'Schulz',
+              'Hoffmann', 'Koch', 'Richter', 'Klein', 'Wolf', 'Schröder', 'Neumann', 'Schwarz', 'Braun']
+REASON_DETAILS = ['', '', 'Zeit nachgetragen', 'Kundentermin vor Ort', 'Terminal war offline', 'Rücksprache mit Leitung']
+# daily_totals is derived from time_entries (same statement as build/migrations/007_daily_totals.sql)
+DAILY_TOTALS_SQL = """REPLACE INTO daily_totals (user_id, date, total_seconds, pause_seconds, first_start, last_stop, segment_count)
+SELECT seg.user_id, seg.date, SUM(seg.dur), COALESCE(SUM(seg.gap), 0), MIN(seg.start_time),
+       MAX(IF(seg.rn_desc = 1, seg.stop_time, NULL)), COUNT(*)
+FROM (
+  SELECT user_id, date, start_time, stop_time,
+         IF(stop_time IS NULL, 0, MOD(TIME_TO_SEC(stop_time) - TIME_TO_SEC(start_time) + 86400, 86400)) AS dur,
+         IF(stop_time IS NULL, 0, GREATEST(0, TIME_TO_SEC(LEAD(start_time) OVER w)
+             - TIME_TO_SEC(stop_time) - IF(stop_time < start_time, 86400, 0))) AS gap,
+         ROW_NUMBER() OVER (PARTITION BY user_id, date ORDER BY start_time DESC, id DESC) AS rn_desc
+  FROM time_entries
+  WINDOW w AS (PARTITION BY user_id, date ORDER BY start_time, id)
+) seg
+GROUP BY seg.user_id, seg.date;"""
+
+# HH:MM:SS for every minute of the day
+CLOCK = [f"{m // 60:02d}:{m % 60:02d}:00" for m in range(24 * 60)]
+
+
+# ----------------------------------------------------------------------------- profiles
+
+def user_profile(seed: int, uid: int) -> Dict:
+    """Everything about a user, derived from (seed, uid) only - identical in every shard"""
+    rng = random.Random(seed * 1_000_003 + uid)
+    role = 'Admin' if uid == 1 else rng.choices([r for r, _ in ROLE_WEIGHTS], [w for _, w in ROLE_WEIGHTS])[0]
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    username = f"{first}.{last}.{uid}@mikropartner.de".lower().replace('ü', 'ue').replace('ö', 'oe')
+    location = LOCATIONS[rng.randrange(len(LOCATIONS))]
+
+    if role == 'Honorarkraft':
+        weekly = rng.choice([8.0, 10.0, 12.0, 15.0])
+        workdays = sorted(rng.sample(range(5), rng.randint(2, 3)))
+    else:
+        weekly = rng.choices([40.0, 38.5, 35.0, 30.0, 20.0], [50, 20, 10, 12, 8])[0]
+        workdays = list(range(5)) if weekly >= 30 else sorted(rng.sample(range(5), rng.randint(3, 4)))
+    per_day = round(weekly / len(workdays), 2)
+    daily_hours = {WEEKDAYS[d]: per_day for d in workdays} if rng.random() < 0.3 else None
+
+    if role in ('Admin', 'Bereichsleiter'):
+        locations = list(LOCATIONS) if role == 'Admin' else rng.sample(LOCATIONS, 2)
+    else:
+        locations = [location]
+    return {
+        'id': uid, 'username': username, 'display_name': f"{first} {last}", 'role': role,
+        'azure_oid': str(uuid.UUID(int=rng.getrandbits(128), version=4)), 'location': location,
+        'locations': locations, 'weekly_hours': weekly, 'workdays': workdays, 'per_day_minutes': int(per_day * 60),
+        'daily_hours': daily_hours, 'home_office': rng.random() < 0.35, 'flexible': rng.random() < 0.15,
+    }
+
+
+def leaders_by_location(seed: int, users: int) -> Dict[str, List[str]]:
+    """Usernames that resolve approvals for each location (Standortleiter, else Bereichsleiter/Admin)"""
+    leaders: Dict[str, List[str]] = {loc: [] for loc in LOCATIONS}
+    fallback: List[str] = []
+    for uid in range(1, users + 1):
+        profile = user_profile(seed, uid)
+        if profile['role'] == 'Standortleiter':
+            leaders[profile['location']].append(profile['username'])
+        elif profile['role'] in ('Admin', 'Bereichsleiter'):
+            fallback.append(profile['username'])
+    return {loc: names or fallback for loc, names in leaders.items()}
+
+
+def _quota(total: int, users: int, uid: int) -> Tuple[int, int]:
+    """(rows for this user, rows of all users before it) - an even split, remainder to the first users"""
+    base, rest = divmod(total, users)
+    count = base + (1 if uid <= rest else 0)
+    offset = (uid - 1) * base + min(uid - 1, rest)
+    return count, offset
+
+
+# ------------------------------------------------------------------------------- sinks
+
+def _tsv_value(value) -> str:
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        if '\\' in value or '\t' in value or '\n' in value:
+            return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+        return value
+    return str(value)
+
+
+def _sql_value(value) -> str:
+    if value is None:
+        return 'NULL'
+    if isinstance(value, str):
+        return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+    return str(value)
+
+
+class TsvSink:
+    """One LOAD DATA file per table and shard (MySQL default: tab separated, \\N for NULL)"""
+
+    def __init__(self, out: Path, shard: int, buffer_rows: int = 20000):
+        self.files = {t: open(out / f"{t}.{shard:03d}.tsv", 'w', encoding='utf-8', newline='\n') for t in TABLE_ORDER}
+        self.buffers: Dict[str, List[str]] = {t: [] for t in TABLE_ORDER}
+        self.buffer_rows = buffer_rows
+        self.counts = {t: 0 for t in TABLE_ORDER}
+
+    def write(self, table: str, row: tuple):
+        buf = self.buffers[table]
+        buf.append('\t'.join(map(_tsv_value, row)))
+        self.counts[table] += 1
+        if len(buf) >= self.buffer_rows:
+            self._flush(table)
+
+    def _flush(self, table: str):
+        buf = self.buffers[table]
+        if buf:
+            self.files[table].write('\n'.join(buf) + '\n')
+            buf.clear()
+
+    def close(self):
+        for table in TABLE_ORDER:
+            self._flush(table)
+            self.files[table].close()
+
+
+class SqlSink:
+    """Multi-row INSERT batches, one .sql file per shard"""
+
+    def __init__(self, out: Path, shard: int, batch: int = 1000):
+        self.file = open(out / f"data.{shard:03d}.sql", 'w', encoding='utf-8')
+        self.file.write("SET foreign_key_checks=0;\nSET unique_checks=0;\nSET autocommit=0;\n")
+        self.batch = batch
+        self.buffers: Dict[str, List[str]] = {t: [] for t in TABLE_ORDER}
+        self.counts = {t: 0 for t in TABLE_ORDER}
+
+    def write(self, table: str, row: tuple):
+        buf = self.buffers[table]
+        buf.append('(' + ','.join(map(_sql_value, row)) + ')')
+        self.counts[table] += 1
+        if len(buf) >= self.batch:
+            self._flush(table)
+
+    def _flush(self, table: str):
+        buf = self.buffers[table]
+        if buf:
+            columns = ','.join(f"`{c}`" for c in TABLE_COLUMNS[table])
+            self.file.write(f"INSERT INTO `{table}` ({columns}) VALUES\n" + ',\n'.join(buf) + ";\nCOMMIT;\n")
+            buf.clear()
+
+    def close(self):
+        for table in TABLE_ORDER:
+            self._flush(table)
+        self.file.write("SET foreign_key_checks=1;\nSET unique_checks=1;\n")
+        self.file.close()
+
+
+# -------------------------------------------------------------------------- generation
+
+def _entry_row(entry_id: int, profile: Dict, day: str, start: int, stop: Optional[int], location: str) -> tuple:
+    stamp_start = f"{day} {CLOCK[start]}"
+    stamp_end = f"{day} {CLOCK[stop]}" if stop is not None else stamp_start
+    return (entry_id, profile['id'], profile['username'], day, CLOCK[start],
+            CLOCK[stop] if stop is not None else None, location, profile['role'],
+            stamp_start, profile['username'], stamp_end)
+
+
+def _day_segments(rng: random.Random, profile: Dict) -> List[Tuple[int, int]]:
+    """Work segments (start, stop minutes) of one working day"""
+    target = max(60, int(rng.gauss(profile['per_day_minutes'], 25)))
+    start = min(600, max(360, int(rng.gauss(465, 35))))
+    if target > 360:
+        count = 3 if rng.random() < 0.15 else 2
+    else:
+        count = 2 if rng.random() < 0.3 else 1
+    parts = [target // count] * count
+    parts[-1] += target - sum(parts)
+
+    segments, cursor = [], start
+    for i, length in enumerate(parts):
+        stop = min(cursor + length, 24 * 60 - 1)
+        segments.append((cursor, stop))
+        # Break before the next segment: lunch after the first, short errands after later ones
+        cursor = stop + (rng.randint(30, 50) if i == 0 else rng.randint(5, 20))
+        if cursor >= 24 * 60 - 1:
+            break
+    return segments
+
+
+def generate_user(sink, seed: int, profile: Dict, entries: int, entry_offset: int, approvals: int,
+                  end_ordinal: int, leaders: Dict[str, List[str]], running_today: float):
+    rng = random.Random(seed * 7_919 + profile['id'])
+    uid, username = profile['id'], profile['username']
+
+    sink.write('users', (uid, username, profile['display_name'], profile['role'], profile['azure_oid'],
+                         f"{date.fromordinal(end_ordinal - 1500 + rng.randint(0, 900)).isoformat()} 09:00:00",
+                         1, profile['location']))
+    sink.write('master_data', (uid, f"{profile['weekly_hours']:.2f}",
+                               json.dumps([WEEKDAYS[d] for d in profile['workdays']]),
+                               int(profile['home_office']), json.dumps(profile['locations'], ensure_ascii=False),
+                               int(profile['flexible']),
+                               json.dumps(profile['daily_hours']) if profile['daily_hours'] else None))
+    for location in profile['locations']:
+        sink.write('user_locations', (uid, location))
+    if entries == 0:
+        return
+
+    # Which of this user's entries get an approval request (bounded by the per-user quota)
+    approval_slots = set(rng.sample(range(entries), min(approvals, entries)))
+    written, ordinal, absent = 0, end_ordinal, 0
+    workdays = set(profile['workdays'])
+
+    while written < entries:
+        day_date = date.fromordinal(ordinal)
+        ordinal -= 1
+        if day_date.weekday() not in workdays and not (profile['flexible'] and rng.random() < 0.05):
+            continue
+        if absent:
+            absent -= 1
+            continue
+        if rng.random() < 0.012:
+            absent = rng.randint(4, 9)      # vacation
+            continue
+        if rng.random() < 0.02:
+            absent = rng.randint(0, 2)      # sick
+            continue
+
+        day = day_date.isoformat()
+        location = HOME_OFFICE if profile['home_office'] and rng.random() < 0.25 else profile['location']
+        segments = _day_segments(rng, profile)
+        is_today = day_date.toordinal() == end_ordinal
+        for i, (start, stop) in enumerate(segments):
+            if written >= entries:
+                break
+            last = i == len(segments) - 1
+            if last and ((is_today and rng.random() < running_today) or rng.random() < 0.004):
+                stop = None                 # running timer today / forgotten stop in the past
+            entry_id = entry_offset + written + 1
+            row = _entry_row(entry_id, profile, day, start, stop, location)
+            sink.write('time_entries', row)
+            if written in approval_slots:
+                _write_approval(sink, rng, row, day_date, end_ordinal, leaders.get(profile['location'], []))
+            written += 1
+
+
+def _write_approval(sink, rng: random.Random, row: tuple, day_date: date, end_ordinal: int, leaders: List[str]):
+    entry_id, uid, username, day, start, stop, location, role, created_at, updated_by, updated_at = row
+    kind = rng.choices(['edit', 'delete', 'create'], [75, 10, 15])[0]
+    original = {'id': entry_id, 'user_id': uid, 'username': username, 'date': day, 'start_time': start,
+                'stop_time': stop, 'location': location, 'role': role, 'created_at': created_at,
+                'updated_by': updated_by, 'updated_at': updated_at}
+    shift = rng.choice([-30, -15, 15, 30, 45])
+    start_min = int(start[:2]) * 60 + int(start[3:5])
+    stop_min = int(stop[:2]) * 60 + int(stop[3:5]) if stop else min(start_min + 240, 24 * 60 - 1)
+    if kind == 'edit':
+        new_data = {'startTime': CLOCK[min(max(start_min + shift, 0), stop_min)], 'stopTime': CLOCK[stop_min]}
+    elif kind == 'create':
+        new_data = {'userId': uid, 'username': username, 'date': day, 'startTime': start, 'stopTime': CLOCK[stop_min],
+                    'location': location, 'role': role}
+        original, entry_id = {}, None
+    else:
+        new_data = {}
+    reason = 'Vergessen auszustempeln' if stop is None else rng.choice(CHANGE_REASONS)
+
+    requested_ord = min(end_ordinal, day_date.toordinal() + rng.randint(0, 5))
+    requested_at = f"{date.fromordinal(requested_ord).isoformat()} {CLOCK[rng.randint(420, 1080)]}"
+    recent = end_ordinal - requested_ord <= 14
+    status = rng.choices(['pending', 'genehmigt', 'abgelehnt'], [65, 30, 5] if recent else [2, 85, 13])[0]
+    resolved_by = resolved_at = None
+    if status != 'pending':
+        approvers = [name for name in leaders if name != username]
+        resolved_by = rng.choice(approvers) if approvers else None
+        resolved_at = f"{date.fromordinal(min(end_ordinal, requested_ord + rng.randint(0, 3))).isoformat()} " \
+                      f"{CLOCK[rng.randint(420, 1140)]}"
+
+    sink.write('approval_requests', (
+        str(uuid.UUID(int=rng.getrandbits(128), version=4)), kind, entry_id,
+        json.dumps(original, ensure_ascii=False), json.dumps(new_data, ensure_ascii=False),
+        json.dumps({'reason': reason, 'details': rng.choice(REASON_DETAILS)}, ensure_ascii=False),
+        username, requested_at, status, resolved_by, resolved_at, uid))
+
+
+def generate_shard(task: Tuple) -> Dict[str, int]:
+    shard, first_uid, last_uid, opts = task
+    out = Path(opts['out'])
+    sink = SqlSink(out, shard, opts['batch']) if opts['format'] == 'sql' else TsvSink(out, shard)
+    leaders = leaders_by_location(opts['seed'], opts['users'])
+    try:
+        for uid in range(first_uid, last_uid + 1):
+            entries, entry_offset = _quota(opts['entries'], opts['users'], uid)
+            approvals, _ = _quota(opts['approvals'], opts['users'], uid)
+            generate_user(sink, opts['seed'], user_profile(opts['seed'], uid), entries, entry_offset, approvals,
+                          opts['end_ordinal'], leaders, opts['running_today'])
+    finally:
+        sink.close()
+    return sink.counts
+
+
+def write_load_script(out: Path, fmt: str, shards: int):
+    """load.sql: settings row plus every generated file, for `mysql --local-infile=1 db < load.sql`"""
+    lines = ["SET foreign_key_checks=0;", "SET unique_checks=0;",
+             "REPLACE INTO global_settings (id, overtime_threshold, change_reasons, locations) VALUES "
+             f"(1, 5.00, {_sql_value(json.dumps(CHANGE_REASONS, ensure_ascii=False))}, "
+             f"{_sql_value(json.dumps(LOCATIONS, ensure_ascii=False))});"]
+    for table in TABLE_ORDER if fmt == 'tsv' else []:
+        columns = ', '.join(f"`{c}`" for c in TABLE_COLUMNS[table])
+        for shard in range(shards):
+            path = (out / f"{table}.{shard:03d}.tsv").resolve().as_posix()
+            lines.append(f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE `{table}` CHARACTER SET utf8mb4 ({columns});")
+    if fmt == 'sql':
+        lines += [f"SOURCE {(out / f'data.{shard:03d}.sql').resolve().as_posix()};" for shard in range(shards)]
+    lines += ["SET foreign_key_checks=1;", "SET unique_checks=1;", DAILY_TOTALS_SQL,
+              "ANALYZE TABLE users, master_data, user_locations, time_entries, approval_requests, daily_totals;"]
+    (out / 'load.sql').write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def generate(out: Path, users: int, entries: int, approvals: int, seed: int = 42, fmt: str = 'tsv',
+             batch: int = 1000, workers: int = None, end_date: date = None, running_today: float = 0.2) -> Dict:
+    """Generate the dataset into `out`; returns row counts per table"""
+    out.mkdir(parents=True, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, users))
+    shards = min(users, workers * 4)
+    opts = {'out': str(out), 'format': fmt, 'batch': batch, 'seed': seed, 'users': users, 'entries': entries,
+            'approvals': approvals, 'end_ordinal': (end_date or date.today()).toordinal(),
+            'running_today': running_today}
+    step = -(-users // shards)
+    tasks = [(i, i * step + 1, min(users, (i + 1) * step), opts) for i in range(shards) if i * step < users]
+
+    if workers == 1:
+        results = [generate_shard(t) for t in tasks]
+    else:
+        with Pool(workers) as pool:
+            results = pool.map(generate_shard, tasks)
+    write_load_script(out, fmt, len(tasks))
+
+    counts = {t: sum(r[t] for r in results) for t in TABLE_ORDER}
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic AZE dataset")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--entries', type=int, default=2_000_000, help="time_entries rows")
+    parser.add_argument('--approvals', type=int, default=100_000, help="approval_requests rows")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end-date', type=date.fromisoformat, default=None, help="Last day (default: today)")
+    parser.add_argument('--format', choices=['tsv', 'sql'], default='tsv',
+                        help="tsv = LOAD DATA files, sql = multi-row INSERT batches")
+    parser.add_argument('--batch', type=int, default=1000, help="Rows per INSERT (sql format)")
+    parser.add_argument('--workers', type=int, default=None, help="Parallel processes (default: CPU count)")
+    parser.add_argument('--out', required=True, help="Output directory")
+    args = parser.parse_args()
+
+    if args.approvals > args.entries:
+        parser.error("--approvals must not exceed --entries")
+
+    started = time.perf_counter()
+    counts = generate(Path(args.out), args.users, args.entries, args.approvals, args.seed, args.format,
+                      args.batch, args.workers, args.end_date)
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(f"✅ {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+    for table in TABLE_ORDER:
+        print(f"   {table:18s} {counts[table]:>12,}")
+    print(f"📄 Load with: mysql --local-infile=1 <database> < {Path(args.out) / 'load.sql'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the Playwright parsing of tests/impact_index.py
+
+Usage:
+    python -m pytest tests/test_impact_index.py
+    python tests/test_impact_index.py
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from impact_index import ImpactIndex  # noqa: E402
+
+SPEC_WITH_RUNTIME_SKIP = """
+import { test, expect } from '@playwright/test'
+
+test.describe('Time Entries API', () => {
+  test.beforeEach(async ({ page }) => {
+    const auth = await page.request.get('/api/auth-status.php')
+    if (auth.status() === 401) {
+      test.skip('User not authenticated - cannot test time entries API')
+    }
+  })
+
+  test('should fetch time entries', async ({ page }) => {
+    if (!process.env.API_URL) {
+      test.skip('No backend configured')
+    }
+    const response = await page.request.get('/api/time-entries.php')
+    expect(response.status()).toBe(200)
+    await page.request.get('/api/approvals.php')
+  })
+
+  test.skip('should export', async ({ page }) => {
+    await page.request.get('/api/export.php')
+  })
+})
+"""
+
+
+class PlaywrightParsingTest(unittest.TestCase):
+    def parse(self, source: str):
+        with tempfile.TemporaryDirectory() as tmp:
+            spec = Path(tmp) / 'fixture.spec.ts'
+            spec.write_text(source, encoding='utf-8')
+            return dict(ImpactIndex._playwright_tests(spec))
+
+    def test_runtime_skip_is_not_a_test(self):
+        tests = self.parse(SPEC_WITH_RUNTIME_SKIP)
+        self.assertEqual(sorted(tests), ['should export', 'should fetch time entries'])
+
+    def test_refs_after_runtime_skip_stay_with_enclosing_test(self):
+        tests = self.parse(SPEC_WITH_RUNTIME_SKIP)
+        self.assertEqual(tests['should fetch time entries'],
+                         {'auth-status.php', 'time-entries.php', 'approvals.php'})
+        self.assertEqual(tests['should export'], {'auth-status.php', 'export.php'})
+
+
+if __name__ == '__main__':
+    unittest.main()